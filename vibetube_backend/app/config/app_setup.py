@@ -1,10 +1,54 @@
+import asyncio
+from contextlib import asynccontextmanager
+import anyio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.constants.app_constants import FRONTEND_URL
+from app.config.database import async_engine
+from app.config.http_client import http_client, bind_app_loop
+from app.utils.trending import trending_worker
+from app.utils.trigram_index import trigram_index_worker
+from app.utils.suggest_index import suggest_index_worker
+from app.utils.view_buffer import view_buffer
+from app.utils.counters import channel_stats_worker
+from app.utils.timeline import fanout_worker
+from app.utils.upload_sessions import upload_gc_worker
+from app.utils.transcoding import transcode_pool
+from app.utils.media_blobs import media_blob_worker
+from app.utils.images import image_pool
+from app.routers.storage.storage_router import storage_router
 
 origins = ["http://localhost:5173", FRONTEND_URL]
 
+# started with the app and stopped (in reverse order) on shutdown
+background_workers = [
+    image_pool,
+    view_buffer,
+    trending_worker,
+    trigram_index_worker,
+    suggest_index_worker,
+    channel_stats_worker,
+    fanout_worker,
+    upload_gc_worker,
+    transcode_pool,
+    media_blob_worker,
+]
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # workers reach the pooled HTTP client through this loop
+    bind_app_loop(asyncio.get_running_loop())
+    for worker in background_workers:
+        worker.start()
+    yield
+    for worker in reversed(background_workers):
+        # off the loop, a worker may be waiting on it to finish its run
+        await anyio.to_thread.run_sync(worker.stop)
+    await http_client.aclose()
+    await async_engine.dispose()
+
 
 def configure_app(app: FastAPI):
 
@@ -14,14 +58,12 @@ def configure_app(app: FastAPI):
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor", "Location", "Upload-Offset", "Upload-Length"],
     )
 
     app.mount(
         "/storage/avatars", StaticFiles(directory="storage/avatars"), name="avatars"
     )
-    app.mount("/storage/videos", StaticFiles(directory="storage/videos"), name="videos")
-    app.mount(
-        "/storage/thumbnails",
-        StaticFiles(directory="storage/thumbnails"),
-        name="thumbnails",
-    )
+    # videos and thumbnails are served by the range-aware storage router
+    app.include_router(storage_router, prefix="/storage", tags=["Storage"])
+    app.mount("/storage/hls", StaticFiles(directory="storage/hls"), name="hls")
@@ -1,21 +1,179 @@
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy import create_engine, event, make_url
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
+from fastapi import Depends
+from app.config.jwt_config import get_optional_user_id
+from app.constants.app_constants import (
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    REPLICA_STICKY_SECONDS,
+    REPLICA_RETRY_SECONDS,
+    CACHE_KEY_PREFIX,
+)
+from app.utils.cache import response_cache
 import os
+import redis
+import threading
+import time
 load_dotenv()
 
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
 db_url = os.getenv("DATABASE_URL")
-engine = create_engine(db_url)
+# optional, reads use the primary when no replica is configured
+replica_url = os.getenv("DATABASE_REPLICA_URL")
+# the async engine reuses DATABASE_URL with an asyncio driver unless told otherwise
+async_db_url = os.getenv("ASYNC_DATABASE_URL") or make_url(db_url).set(
+    drivername=ASYNC_DRIVERS[make_url(db_url).get_backend_name()]
+)
+
+pool_options = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+)
+
+engine = create_engine(db_url, **pool_options)
 session = sessionmaker(autoflush=False, bind=engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+read_engine = create_engine(replica_url, **pool_options) if replica_url else engine
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+async_engine = create_async_engine(async_db_url, **pool_options)
+
+# expire_on_commit=False so returned objects can be serialized after commit
+# without an implicit (and, under asyncio, illegal) lazy refresh
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+class ReplicaRouter:
+    """
+    Decides per request whether reads may go to the replica. A user who
+    committed a write in the last REPLICA_STICKY_SECONDS reads from the
+    primary so they see their own changes, and everyone reads from the
+    primary for REPLICA_RETRY_SECONDS after the replica failed to connect.
+    Write marks are kept in Redis when it is configured, so the worker
+    serving the next request sees them too; replica health is per process.
+    """
+
+    def __init__(self, shared: redis.Redis | None = None):
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._sticky_until: dict[int, float] = {}
+        self._replica_down_until = 0.0
+
+    def mark_write(self, user_id: int):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._sticky_until) > 10000:
+                self._sticky_until = {
+                    key: until
+                    for key, until in self._sticky_until.items()
+                    if until > now
+                }
+            self._sticky_until[user_id] = now + REPLICA_STICKY_SECONDS
+        if self.shared is not None and read_engine is not engine:
+            try:
+                self.shared.set(
+                    f"{CACHE_KEY_PREFIX}sticky:{user_id}",
+                    1,
+                    px=int(REPLICA_STICKY_SECONDS * 1000),
+                )
+            except redis.RedisError as e:
+                print(f"Warning: Failed to share write mark of user {user_id}: {e}")
+
+    def mark_replica_down(self):
+        self._replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+
+    def use_primary(self, user_id: int | None) -> bool:
+        now = time.monotonic()
+        if read_engine is engine or now < self._replica_down_until:
+            return True
+        if user_id is None:
+            return False
+        with self._lock:
+            until = self._sticky_until.get(user_id)
+            if until is not None and until <= now:
+                del self._sticky_until[user_id]
+        if until is not None and until > now:
+            return True
+        if self.shared is None:
+            return False
+        try:
+            return bool(self.shared.exists(f"{CACHE_KEY_PREFIX}sticky:{user_id}"))
+        except redis.RedisError:
+            # can't tell whether the user just wrote, the primary is always current
+            return True
+
+replica_router = ReplicaRouter(response_cache.shared)
+
+@event.listens_for(Session, "after_flush")
+def _note_flushed_write(db: Session, flush_context):
+    db.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _note_executed_write(orm_execute_state):
+    # bulk and upsert statements change rows without a flush
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_write(db: Session):
+    db.info.pop("wrote", None)
+
+@event.listens_for(Session, "after_commit")
+def _stick_writer_to_primary(db: Session):
+    # write sessions carry the id of the user making the request; a commit
+    # that changed nothing leaves their reads on the replica
+    if db.info.pop("wrote", False) and db.info.get("user_id") is not None:
+        replica_router.mark_write(db.info["user_id"])
+
+def get_write_db(user_id: int | None = Depends(get_optional_user_id)):
+    db = SessionLocal(info={"user_id": user_id})
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+def get_read_db(user_id: int | None = Depends(get_optional_user_id)):
+    if replica_router.use_primary(user_id):
+        db = SessionLocal()
+    else:
+        db = ReadSessionLocal()
+        try:
+            # check out the connection now so a dead replica is caught here
+            db.connection()
+        except OperationalError as e:
+            print(f"Warning: read replica unavailable, using primary: {e}")
+            replica_router.mark_replica_down()
+            db.close()
+            db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db(user_id: int | None = Depends(get_optional_user_id)):
+    async with AsyncSessionLocal(info={"user_id": user_id}) as db:
+        yield db
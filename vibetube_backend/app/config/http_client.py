@@ -0,0 +1,49 @@
+import asyncio
+from collections.abc import Callable, Coroutine
+from concurrent.futures import wait
+import httpx
+from app.constants.app_constants import (
+    STORAGE_MAX_CONNECTIONS,
+    STORAGE_MAX_KEEPALIVE,
+    STORAGE_TIMEOUT_SECONDS,
+)
+
+# One keep-alive pool for all storage traffic. Requests beyond
+# STORAGE_MAX_CONNECTIONS wait for a free connection instead of opening more.
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(
+        max_connections=STORAGE_MAX_CONNECTIONS,
+        max_keepalive_connections=STORAGE_MAX_KEEPALIVE,
+    ),
+    timeout=httpx.Timeout(STORAGE_TIMEOUT_SECONDS),
+)
+
+_app_loop: asyncio.AbstractEventLoop | None = None
+
+
+def bind_app_loop(loop: asyncio.AbstractEventLoop):
+    global _app_loop
+    _app_loop = loop
+
+
+def run_on_app_loop(
+    coroutine: Coroutine,
+    heartbeat: Callable[[], None] | None = None,
+    interval: float = 5.0,
+):
+    """
+    Runs a coroutine on the app's event loop and waits for its result. For
+    background worker threads, so they share the pooled client too. While
+    it waits, the calling thread runs heartbeat every interval seconds.
+    """
+    if _app_loop is None:
+        coroutine.close()
+        raise RuntimeError("The app event loop is not running")
+    future = asyncio.run_coroutine_threadsafe(coroutine, _app_loop)
+    try:
+        while heartbeat and not wait([future], timeout=interval).done:
+            heartbeat()
+    except BaseException:
+        future.cancel()
+        raise
+    return future.result()
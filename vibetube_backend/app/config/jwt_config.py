@@ -11,6 +11,7 @@ import os
 load_dotenv()
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login", auto_error=False)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -67,3 +68,16 @@ async def get_current_user_id(
     except JWTError:
         # If decoding fails (wrong key, expired token, etc.)
         raise credentials_exception
+
+
+async def get_optional_user_id(
+    token: Annotated[str | None, Depends(optional_oauth2_scheme)],
+) -> int | None:
+    """Same as get_current_user_id, but anonymous or invalid tokens give None."""
+    if token is None:
+        return None
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        return int(payload["sub"])
+    except (JWTError, KeyError, TypeError, ValueError):
+        return None
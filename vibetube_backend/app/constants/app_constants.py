@@ -5,14 +5,145 @@ from dotenv import load_dotenv
 load_dotenv()
 
 FRONTEND_URL = os.getenv("FRONTEND_URL")
+LOCAL_STORAGE_DIR = Path("storage")
+# public base URL of storage/ when files are kept on local disk
+LOCAL_STORAGE_URL = os.getenv("LOCAL_STORAGE_URL", "http://127.0.0.1:8000/storage")
 AVATAR_DIR = Path("storage/avatars")
 VIDEO_DIR = Path("storage/videos")
 THUMB_DIR = Path("storage/thumbnails")
 THUMB_WIDTH = 320  # Standard thumbnail width
 THUMB_HEIGHT = 180  # Standard thumbnail height
 THUMB_QUALITY = 85  # JPEG quality for compression
+# widths rendered for every thumbnail; thumbnail_url is the THUMB_WIDTH one
+THUMB_VARIANT_WIDTHS = (160, 320, 640)
+AVATAR_SIZE = 128  # profile_image
+AVATAR_VARIANT_SIZES = (48, 128)
+AVATAR_QUALITY = 85
+# WEBP or AVIF, for thumbnails and avatars
+IMAGE_FORMAT = os.getenv("IMAGE_FORMAT", "WEBP").upper()
+# processes decoding and encoding uploaded images
+IMAGE_WORKERS = max(
+    1, int(os.getenv("IMAGE_WORKERS", str(min(os.cpu_count() or 1, 4))))
+)
 DEFAULT_VIDEO_LIMIT = 12
+DEFAULT_COMMENT_LIMIT = 20
+
+# Postgres text search configuration used for the videos search vector
+SEARCH_TS_CONFIG = os.getenv("SEARCH_TS_CONFIG", "english")
+
+# Typo tolerant (trigram) search index
+SEARCH_TRIGRAM_THRESHOLD = float(os.getenv("SEARCH_TRIGRAM_THRESHOLD", "0.3"))
+SEARCH_INDEX_REFRESH_SECONDS = int(os.getenv("SEARCH_INDEX_REFRESH_SECONDS", "600"))
+
+# Search-as-you-type suggestions
+SUGGEST_MAX_RESULTS = 10
+# prefixes matching more entries than this keep their top results precomputed
+SUGGEST_SCAN_LIMIT = 64
+
+# Write-behind view recording
+VIEW_FLUSH_INTERVAL_MS = int(os.getenv("VIEW_FLUSH_INTERVAL_MS", "1000"))
+VIEW_FLUSH_MAX_EVENTS = int(os.getenv("VIEW_FLUSH_MAX_EVENTS", "500"))
+VIEW_DURABILITY = os.getenv("VIEW_DURABILITY", "journal")  # memory | journal | sync
+# each process journals to <stem>.<pid><suffix> next to this path
+VIEW_JOURNAL_PATH = Path(os.getenv("VIEW_JOURNAL_PATH", "storage/view_journal.log"))
+
+# Trending worker
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", "300"))
+TRENDING_WINDOW_SIZE = int(os.getenv("TRENDING_WINDOW_SIZE", "500"))
+
+# Channel statistics reconciliation
+CHANNEL_STATS_RECONCILE_SECONDS = int(
+    os.getenv("CHANNEL_STATS_RECONCILE_SECONDS", "3600")
+)
+
+# Subscription feed fan-out
+FANOUT_INTERVAL_SECONDS = int(os.getenv("FANOUT_INTERVAL_SECONDS", "5"))
+FANOUT_BATCH_SIZE = int(os.getenv("FANOUT_BATCH_SIZE", "1000"))
+# channels above this many subscribers are pulled at read time instead of pushed
+FANOUT_MAX_SUBSCRIBERS = int(os.getenv("FANOUT_MAX_SUBSCRIBERS", "10000"))
+FANOUT_BACKFILL_VIDEOS = 50  # recent videos copied into a timeline on subscribe
+
+# Database connection pool, applied to both the sync and the async engine
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds, -1 disables
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+# Read replica routing
+# reads from a user who just wrote go to the primary for this long
+REPLICA_STICKY_SECONDS = float(os.getenv("REPLICA_STICKY_SECONDS", "5"))
+# how long reads stay on the primary after the replica failed to connect
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+
+# Streaming uploads; Supabase resumable uploads require exactly 6 MB chunks
+UPLOAD_CHUNK_SIZE = 6 * 1024 * 1024
+
+# Resumable uploads
+UPLOAD_SESSION_DIR = Path(os.getenv("UPLOAD_SESSION_DIR", "storage/uploads"))
+# sessions untouched for this long are deleted together with their staged bytes
+UPLOAD_SESSION_TTL_SECONDS = int(os.getenv("UPLOAD_SESSION_TTL_SECONDS", "86400"))
+UPLOAD_SESSION_GC_SECONDS = int(os.getenv("UPLOAD_SESSION_GC_SECONDS", "3600"))
+
+# Media probing (ffprobe)
+MEDIA_PROBE_CONCURRENCY = int(
+    os.getenv("MEDIA_PROBE_CONCURRENCY", str(os.cpu_count() or 1))
+)
+MEDIA_PROBE_CACHE_SIZE = 10000  # probe results kept in memory, keyed by content hash
+
+# HLS transcoding
+HLS_DIR = Path("storage/hls")
+# (height, video kbit/s) rungs; rungs above the source height are skipped
+HLS_LADDER = [(240, 400), (480, 1000), (720, 2500), (1080, 5000)]
+HLS_SEGMENT_SECONDS = 6
+TRANSCODE_WORKERS = max(
+    1, min(int(os.getenv("TRANSCODE_WORKERS", "2")), os.cpu_count() or 1)
+)
+TRANSCODE_POLL_SECONDS = int(os.getenv("TRANSCODE_POLL_SECONDS", "30"))
+TRANSCODE_MAX_ATTEMPTS = 3
+# a running job without a progress update for this long is considered dead
+TRANSCODE_STALE_SECONDS = int(os.getenv("TRANSCODE_STALE_SECONDS", "600"))
+
+# Object storage: supabase, s3 or local
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+# pooled HTTP client shared by every storage request
+STORAGE_MAX_CONNECTIONS = int(os.getenv("STORAGE_MAX_CONNECTIONS", "32"))
+STORAGE_MAX_KEEPALIVE = int(os.getenv("STORAGE_MAX_KEEPALIVE", "16"))
+STORAGE_TIMEOUT_SECONDS = float(os.getenv("STORAGE_TIMEOUT_SECONDS", "60"))
+STORAGE_RETRIES = int(os.getenv("STORAGE_RETRIES", "3"))
+STORAGE_RETRY_BACKOFF_SECONDS = 0.5  # doubled after every failed attempt
+# S3-compatible stores (AWS, MinIO, R2...), addressed path-style
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL")
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_REGION = os.getenv("S3_REGION", "us-east-1")
+S3_ACCESS_KEY_ID = os.getenv("S3_ACCESS_KEY_ID")
+S3_SECRET_ACCESS_KEY = os.getenv("S3_SECRET_ACCESS_KEY")
+# e.g. a CDN in front of the bucket; defaults to {S3_ENDPOINT_URL}/{S3_BUCKET}
+S3_PUBLIC_URL = os.getenv("S3_PUBLIC_URL")
+
+# Streaming of locally stored files
+FILE_HANDLE_CACHE_SIZE = int(os.getenv("FILE_HANDLE_CACHE_SIZE", "256"))  # open fds
+STREAM_CHUNK_SIZE = 256 * 1024
+
+# Content-hash deduplication of stored media
+MEDIA_BLOB_GC_SECONDS = int(os.getenv("MEDIA_BLOB_GC_SECONDS", "86400"))
+# unreferenced blobs are deleted only after this long, so an upload that has
+# just matched one can still take a reference on it
+MEDIA_BLOB_GRACE_SECONDS = int(os.getenv("MEDIA_BLOB_GRACE_SECONDS", "3600"))
+
+# Read-through response cache
+CACHE_SIZE = int(os.getenv("CACHE_SIZE", "4096"))  # entries kept in each process
+CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+# feeds and search results also move with view counts, so they expire sooner
+FEED_CACHE_TTL_SECONDS = int(os.getenv("FEED_CACHE_TTL_SECONDS", "30"))
+# shared tier (Redis or any server speaking its protocol); unset keeps the
+# cache in-process only
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "vibetube:cache:")
+CACHE_REDIS_TIMEOUT_SECONDS = 0.25  # a slow cache must not be slower than the query
 
 os.makedirs(VIDEO_DIR, exist_ok=True)
 os.makedirs(THUMB_DIR, exist_ok=True)
 os.makedirs(AVATAR_DIR, exist_ok=True)
+os.makedirs(UPLOAD_SESSION_DIR, exist_ok=True)
+os.makedirs(HLS_DIR, exist_ok=True)
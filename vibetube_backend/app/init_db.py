@@ -1,6 +1,24 @@
-from app.config.database import engine
+from app.config.database import engine, SessionLocal
 from app.models.database_models import Base
+from app.utils.schema_upgrade import upgrade_schema
+from app.utils.search import refresh_search_vectors
+from app.utils.counters import recount_like_counters
+from app.utils.timeline import backfill_timelines
 
 print("creating database this file ......")
 Base.metadata.create_all(bind=engine)
+# tables that already existed get the columns and indexes added since
+upgrade_schema(engine)
+
+# index videos that were stored before the search vector existed, bring
+# the denormalized counters in line with their source tables and fill the
+# timelines of subscriptions made before there were timelines
+db = SessionLocal()
+try:
+    refresh_search_vectors(db, only_missing=True)
+    recount_like_counters(db)
+    backfill_timelines(db)
+    db.commit()
+finally:
+    db.close()
 print("Done.")
@@ -1,4 +1,4 @@
-from app.config.app_setup import configure_app
+from app.config.app_setup import configure_app, lifespan
 from dotenv import load_dotenv
 from app.routers.main_router import main_router
 from fastapi import (
@@ -7,7 +7,7 @@ from fastapi import (
 
 load_dotenv()
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 configure_app(app=app)
 
 app.include_router(main_router, prefix="/api")
@@ -5,12 +5,39 @@ from sqlalchemy import (
     ForeignKey,
     DateTime,
     Text,
+    BigInteger,
+    Float,
+    Boolean,
+    Index,
     UniqueConstraint,
     CheckConstraint,
+    JSON,
 )
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
+from sqlalchemy.sql.expression import FunctionElement
 from app.config.database import Base
+import random
+
+
+class random_fraction(FunctionElement):
+    """Uniform float in [0, 1), evaluated by the database."""
+
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(random_fraction)
+def _random_fraction(element, compiler, **kw):
+    return "random()"
+
+
+@compiles(random_fraction, "sqlite")
+def _random_fraction_sqlite(element, compiler, **kw):
+    # SQLite's random() is a signed 64-bit integer
+    return "((abs(random()) % 1000000000) / 1000000000.0)"
 
 
 # ---------------- USER = CHANNEL ----------------
@@ -23,9 +50,16 @@ class User(Base):
     password_hash = Column(String(255), nullable=False)
 
     profile_image = Column(String, nullable=True)
+    # {"48": url, "128": url}, NULL for generated avatars
+    avatar_variants = Column(JSON, nullable=True)
     channel_description = Column(Text, nullable=True)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # last profile edit, NULL until the first one. Name and avatar are embedded
+    # in video and comment responses, so their ETags depend on the latest one
+    updated_at = Column(
+        DateTime(timezone=True), nullable=True, onupdate=func.now(), index=True
+    )
 
     # Relationships
     videos = relationship("Video", back_populates="owner", cascade="all, delete")
@@ -47,6 +81,26 @@ class User(Base):
     )
 
 
+# ---------------- CHANNEL STATS ----------------
+class ChannelStats(Base):
+    """
+    Running totals for the channel analytics endpoint, bumped by the upload,
+    view and subscribe paths and periodically reconciled.
+    """
+
+    __tablename__ = "channel_stats"
+
+    channel_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    total_videos = Column(Integer, nullable=False, default=0, server_default="0")
+    total_views = Column(Integer, nullable=False, default=0, server_default="0")
+    total_subscribers = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
 # ---------------- VIDEOS ----------------
 class Video(Base):
     __tablename__ = "videos"
@@ -59,13 +113,83 @@ class Video(Base):
 
     video_url = Column(String, nullable=False)
     thumbnail_url = Column(String, nullable=False)
+    # {"160": url, "320": url, "640": url}; thumbnail_url is the 320 px one
+    thumbnail_variants = Column(JSON, nullable=True)
 
     visibility = Column(String(20), default="public")
     category = Column(String(50), nullable=True)
 
     views = Column(Integer, default=0)
-    duration = Column(String(10), nullable=False)
+    # maintained by the like toggle, so reading them never counts `likes`
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    dislike_count = Column(Integer, nullable=False, default=0, server_default="0")
+    duration = Column(String(10), nullable=False)  # "MM:SS", for display
+    # probed media metadata, stored so the file never has to be probed again
+    duration_seconds = Column(Float, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    video_codec = Column(String(32), nullable=True)
+    audio_codec = Column(String(32), nullable=True)
+    bit_rate = Column(BigInteger, nullable=True)
+    frame_rate = Column(Float, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the file
+    thumbnail_hash = Column(String(64), nullable=True, index=True)  # of the source
+    # HLS master playlist, set once the transcoding worker has finished
+    hls_url = Column(String, nullable=True)
+    # queued | processing | ready | failed, NULL for videos uploaded before HLS
+    processing_status = Column(String(20), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # bumped by every write to the row, view count flushes included
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    # last comment or reply posted on the video
+    comments_updated_at = Column(DateTime(timezone=True), nullable=True)
+
+    # weighted title / username / description vector, maintained by app.utils.search
+    search_vector = Column(TSVECTOR().with_variant(Text, "sqlite"), nullable=True)
+
+    # False until the fan-out worker has pushed the video to subscriber timelines.
+    # Videos from before the column existed count as done: init_db backfills
+    # the existing subscriptions instead of the worker pushing the catalog.
+    fanned_out = Column(
+        Boolean,
+        nullable=False,
+        default=False,
+        server_default=text("false"),
+        info={"backfill": True},
+    )
+    # set instead when the channel was too large to push to: subscribers pull
+    # the video at read time, whatever the channel's size is by then
+    pull_only = Column(
+        Boolean, nullable=False, default=False, server_default=text("false")
+    )
+
+    # uniform key in [0, 1) used by the random feed to sample through an index
+    random_key = Column(
+        Float, nullable=False, default=random.random, server_default=random_fraction()
+    )
+
+    __table_args__ = (
+        Index("ix_videos_random_key", "random_key"),
+        # composite indexes backing the keyset pagination of the feeds
+        Index("ix_videos_created_at_id", "created_at", "id"),
+        Index("ix_videos_category_created_at_id", "category", "created_at", "id"),
+        Index("ix_videos_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index("ix_videos_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_videos_pending_fanout",
+            "id",
+            postgresql_where=text("NOT fanned_out"),
+        ),
+        Index(
+            "ix_videos_pull_only_user_id_created_at_id",
+            "user_id",
+            "created_at",
+            "id",
+            postgresql_where=text("pull_only"),
+        ),
+    )
 
     # Relationships
     owner = relationship("User", back_populates="videos")
@@ -74,6 +198,80 @@ class Video(Base):
     view = relationship("View", back_populates="video", cascade="all, delete")
 
 
+# ---------------- TRANSCODING ----------------
+class TranscodeJob(Base):
+    """One HLS transcode per video, claimed and run by app.utils.transcoding."""
+
+    __tablename__ = "transcode_jobs"
+
+    id = Column(Integer, primary_key=True)
+    video_id = Column(
+        Integer,
+        ForeignKey("videos.id", ondelete="CASCADE"),
+        unique=True,
+        nullable=False,
+    )
+    # queued | running | done | failed
+    status = Column(String(20), nullable=False, default="queued")
+    progress = Column(Float, nullable=False, default=0.0, server_default="0")
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # doubles as the heartbeat of a running job
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (Index("ix_transcode_jobs_status_id", "status", "id"),)
+
+
+# ---------------- TRENDING ----------------
+class VideoTrending(Base):
+    """Pre-ranked trending window, rebuilt by the trending worker."""
+
+    __tablename__ = "video_trending"
+
+    video_id = Column(
+        Integer, ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank = Column(Integer, unique=True, index=True, nullable=False)
+    score = Column(Float, nullable=False)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    video = relationship("Video")
+
+
+# ---------------- SUBSCRIPTION TIMELINES ----------------
+class TimelineEntry(Base):
+    """
+    One row per (subscriber, video) pushed by the fan-out worker. created_at
+    copies the video's, so the feed is a range scan on one user's rows.
+    """
+
+    __tablename__ = "timeline"
+
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    video_id = Column(
+        Integer, ForeignKey("videos.id", ondelete="CASCADE"), primary_key=True
+    )
+    channel_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_timeline_user_id_created_at_video_id",
+            "user_id",
+            "created_at",
+            "video_id",
+        ),
+        Index("ix_timeline_user_id_channel_id", "user_id", "channel_id"),
+    )
+
+
 # ---------------- LIKES / DISLIKES ----------------
 class Like(Base):
     __tablename__ = "likes"
@@ -86,6 +284,8 @@ class Like(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (UniqueConstraint("user_id", "video_id", name="_user_like_uc"),)
+
     # Relationships
     user = relationship("User", back_populates="likes")
     video = relationship("Video", back_populates="likes")
@@ -100,11 +300,29 @@ class Comment(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
     video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"))
+    # replies are one level deep: parent_id always points at a top-level comment
+    parent_id = Column(
+        Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=True
+    )
 
     text = Column(Text, nullable=False)
+    reply_count = Column(Integer, nullable=False, default=0, server_default="0")
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        # top-level comments of a video, newest first
+        Index(
+            "ix_comments_video_id_parent_id_created_at_id",
+            "video_id",
+            "parent_id",
+            "created_at",
+            "id",
+        ),
+        # replies of a thread, oldest first
+        Index("ix_comments_parent_id_created_at_id", "parent_id", "created_at", "id"),
+    )
+
     # Relationships
     user = relationship("User", back_populates="comments")
     video = relationship("Video", back_populates="comments")
@@ -119,7 +337,10 @@ class View(Base):
     video_id = Column(Integer, ForeignKey("videos.id", ondelete="CASCADE"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    __table_args__ = (UniqueConstraint("user_id", "video_id", name="_user_video_uc"),)
+    __table_args__ = (
+        UniqueConstraint("user_id", "video_id", name="_user_video_uc"),
+        Index("ix_view_user_id_created_at_id", "user_id", "created_at", "id"),
+    )
 
     # relationship
     user = relationship("User", back_populates="view")
@@ -149,3 +370,54 @@ class Subscription(Base):
     channel = relationship(
         "User", back_populates="subscribers", foreign_keys=[channel_id]
     )
+
+
+class UploadSession(Base):
+    """A resumable upload in progress; the bytes are staged in UPLOAD_SESSION_DIR."""
+
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(36), primary_key=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    length = Column(BigInteger, nullable=False)
+    upload_offset = Column(BigInteger, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (Index("ix_upload_sessions_updated_at", "updated_at"),)
+
+
+class MediaBlob(Base):
+    """
+    One stored object per distinct file and backend, shared by every Video
+    whose video or thumbnail source has the same bytes. ref_count is the
+    number of such videos.
+    """
+
+    __tablename__ = "media_blobs"
+
+    content_hash = Column(String(64), primary_key=True)  # sha256 of the stored bytes
+    # the same bytes get a blob per backend, local uploads never share remote ones
+    backend = Column(String(20), primary_key=True)  # supabase | s3 | local
+    kind = Column(String(20), nullable=False)  # video | thumbnail
+    object_name = Column(String, nullable=False)
+    url = Column(String, nullable=False)
+    # {width: object_name} of every rendered size, for thumbnails
+    variants = Column(JSON, nullable=True)
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # last change of ref_count; unreferenced blobs are kept for a grace period
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    __table_args__ = (
+        Index("ix_media_blobs_ref_count_updated_at", "ref_count", "updated_at"),
+    )
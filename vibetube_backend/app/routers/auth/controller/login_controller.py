@@ -3,7 +3,7 @@ from app.utils.password_utils import verify_hash
 from app.schemas import pydantic_models
 from app.models import database_models
 from sqlalchemy.orm import Session
-from app.config.database import get_db
+from app.config.database import get_write_db
 from datetime import timedelta
 from app.config import jwt_config
 
@@ -11,7 +11,9 @@ router = APIRouter()
 
 
 # @router.post("/", response_model=pydantic_models.Token)
-def login_user(user_details: pydantic_models.UserLogin, db: Session = Depends(get_db)):
+def login_user(
+    user_details: pydantic_models.UserLogin, db: Session = Depends(get_write_db)
+):
 
     user_exists = (
         db.query(database_models.User).filter_by(username=user_details.username).first()
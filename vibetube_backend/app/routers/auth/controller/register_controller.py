@@ -3,8 +3,10 @@ from fastapi import Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.models import database_models
 from app.schemas import pydantic_models
-from app.config.database import get_db
+from app.config.database import get_write_db
 from app.utils.password_utils import hash_password
+from app.utils.suggest_index import suggest_index
+from app.utils.cache import response_cache
 import random
 
 router = APIRouter()
@@ -12,7 +14,7 @@ color_list = ["orange", "blue", "black", "red", "green"]
 
 
 def register_user(
-    user_details: pydantic_models.UserCreate, db: Session = Depends(get_db)
+    user_details: pydantic_models.UserCreate, db: Session = Depends(get_write_db)
 ):
     user_exists = (
         db.query(database_models.User).filter_by(username=user_details.username).first()
@@ -43,6 +45,10 @@ def register_user(
         )
         db.add(user)
         db.commit()
+
+        suggest_index.set_channel(user.id, user.username)
+        # a lookup of this id before it existed may have been cached
+        response_cache.invalidate(f"channel:{user.id}")
         return {"msg": "creation successful!"}
 
     raise HTTPException(
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.models import database_models
-from app.config.database import get_db
+from app.config.database import get_read_db
 from app.config.jwt_config import get_current_user_id
 
 router = APIRouter()
@@ -9,7 +9,8 @@ router = APIRouter()
 
 # @router.get("/")
 def verify_token(
-    db: Session = Depends(get_db), current_user_id: int = Depends(get_current_user_id)
+    db: Session = Depends(get_read_db),
+    current_user_id: int = Depends(get_current_user_id),
 ):
     user = db.query(database_models.User).filter_by(id=current_user_id).first()
     if not user:
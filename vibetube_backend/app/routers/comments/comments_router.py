@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from app.schemas import pydantic_models
 from app.routers.comments.controller.create_comment import create_comment
-from app.routers.comments.controller.get_comments import get_comments
+from app.routers.comments.controller.get_comments import get_comments, get_replies
 
 comments_router = APIRouter()
 
@@ -12,6 +12,13 @@ comments_router.add_api_route(
     response_model=list[pydantic_models.CommentOut],
 )
 
+comments_router.add_api_route(
+    "/{comment_id}/replies",
+    get_replies,
+    methods=["GET"],
+    response_model=list[pydantic_models.CommentOut],
+)
+
 comments_router.add_api_route(
     "/", create_comment, methods=["POST"], response_model=pydantic_models.CommentOut
 )
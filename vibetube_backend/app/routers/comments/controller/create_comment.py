@@ -1,24 +1,54 @@
 from app.schemas import pydantic_models
-from fastapi import Depends
+from fastapi import Depends, HTTPException
+from sqlalchemy import func, update
 from sqlalchemy.orm import Session
 from app.config.jwt_config import get_current_user_id
 from app.models import database_models
-from app.config.database import get_db
+from app.config.database import get_write_db
+from app.utils.cache import response_cache
 
 
 def create_comment(
     data: pydantic_models.CommentCreate,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
+    if data.parent_id is not None:
+        parent = db.get(database_models.Comment, data.parent_id)
+        if not parent or parent.video_id != data.video_id:
+            raise HTTPException(status_code=404, detail="Parent comment not found")
+        if parent.parent_id is not None:
+            raise HTTPException(
+                status_code=400, detail="Replies can only be one level deep"
+            )
+
+        db.execute(
+            update(database_models.Comment)
+            .where(database_models.Comment.id == data.parent_id)
+            .values(reply_count=database_models.Comment.reply_count + 1)
+        )
 
-    username = db.query(database_models.User).filter_by(id=current_user_id).first()
     new_comment = database_models.Comment(
-        video_id=data.video_id, user_id=current_user_id, text=data.text
+        video_id=data.video_id,
+        user_id=current_user_id,
+        parent_id=data.parent_id,
+        text=data.text,
     )
 
     db.add(new_comment)
+    # the version stamp of the video's comment pages
+    db.execute(
+        update(database_models.Video)
+        .where(database_models.Video.id == data.video_id)
+        .values(comments_updated_at=func.now())
+    )
     db.commit()
     db.refresh(new_comment)
 
+    # a reply also moves its parent's reply_count in the top-level page
+    tags = [f"comments:{data.video_id}"]
+    if data.parent_id is not None:
+        tags.append(f"replies:{data.parent_id}")
+    response_cache.invalidate(*tags)
+
     return new_comment
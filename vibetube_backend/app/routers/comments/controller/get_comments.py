@@ -1,17 +1,132 @@
 from app.models import database_models
+from app.schemas import pydantic_models
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session
-from fastapi import Depends
+from fastapi import Depends, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import joinedload
-from app.config.database import get_db
+from typing import Optional
+from app.config.database import get_read_db
+from app.constants.app_constants import DEFAULT_COMMENT_LIMIT
+from app.utils.cache import response_cache, PROFILES_TAG
+from app.utils.conditional import Validators
+from app.utils.pagination import encode_cursor, seek_page
 
 
-def get_comments(video_id: int, db: Session = Depends(get_db)):
-    comments = (
-        db.query(database_models.Comment)
-        .join(database_models.Comment.user)
-        .options(joinedload(database_models.Comment.user))
-        .filter(database_models.Comment.video_id == video_id)
-        .order_by(database_models.Comment.created_at.desc())
-        .all()
+def comments_page(query, cursor, offset, limit, newest_first: bool = True) -> dict:
+    comments = seek_page(
+        query.options(joinedload(database_models.Comment.user)),
+        database_models.Comment.created_at,
+        database_models.Comment.id,
+        cursor,
+        offset,
+        limit,
+        newest_first=newest_first,
+    ).all()
+
+    next_cursor = None
+    if len(comments) == limit:
+        next_cursor = encode_cursor(comments[-1].created_at, comments[-1].id)
+    return {
+        "comments": jsonable_encoder(
+            [
+                pydantic_models.CommentOut.model_validate(c, from_attributes=True)
+                for c in comments
+            ]
+        ),
+        "next_cursor": next_cursor,
+    }
+
+
+def comment_validators(db: Session, video_stamp) -> Validators | None:
+    """
+    Validators of comment pages, from `video_stamp` (a select of the video's
+    comments_updated_at) and the last profile edit of anyone, as commenters'
+    names and avatars are embedded. None when the select finds no row.
+    """
+    latest_profile_edit = select(
+        func.max(database_models.User.updated_at)
+    ).scalar_subquery()
+    stamps = db.execute(video_stamp.add_columns(latest_profile_edit)).first()
+    return Validators("comments", *stamps) if stamps else None
+
+
+def send_page(page: dict, response: Response):
+    if page["next_cursor"]:
+        response.headers["X-Next-Cursor"] = page["next_cursor"]
+    return page["comments"]
+
+
+def get_comments(
+    video_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_COMMENT_LIMIT, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """
+    Top-level comments of a video, newest first. Replies are not included;
+    each comment carries its reply_count and replies are fetched per thread.
+    """
+    Video = database_models.Video
+    validators = comment_validators(
+        db, select(Video.comments_updated_at).where(Video.id == video_id)
+    )
+    version = ""
+    if validators is not None:
+        if (not_modified := validators.respond(request, response)) is not None:
+            return not_modified
+        version = validators.etag
+
+    def load():
+        query = db.query(database_models.Comment).filter(
+            database_models.Comment.video_id == video_id,
+            database_models.Comment.parent_id.is_(None),
+        )
+        return comments_page(query, cursor, offset, limit)
+
+    page = response_cache.cached(
+        f"comments:{video_id}:{cursor}:{offset}:{limit}:{version}",
+        [f"comments:{video_id}", PROFILES_TAG],
+        load,
+    )
+    return send_page(page, response)
+
+
+def get_replies(
+    comment_id: int,
+    request: Request,
+    response: Response,
+    limit: int = Query(DEFAULT_COMMENT_LIMIT, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    db: Session = Depends(get_read_db),
+):
+    """Replies of one thread, oldest first so the conversation reads in order."""
+    Video = database_models.Video
+    Comment = database_models.Comment
+    # any new comment on the video bumps the stamp, replies to this thread included
+    validators = comment_validators(
+        db,
+        select(Video.comments_updated_at)
+        .join(Comment, Comment.video_id == Video.id)
+        .where(Comment.id == comment_id),
+    )
+    version = ""
+    if validators is not None:
+        if (not_modified := validators.respond(request, response)) is not None:
+            return not_modified
+        version = validators.etag
+
+    def load():
+        query = db.query(Comment).filter(Comment.parent_id == comment_id)
+        return comments_page(query, cursor, offset, limit, newest_first=False)
+
+    page = response_cache.cached(
+        f"replies:{comment_id}:{cursor}:{offset}:{limit}:{version}",
+        [f"replies:{comment_id}", PROFILES_TAG],
+        load,
     )
-    return comments
+    return send_page(page, response)
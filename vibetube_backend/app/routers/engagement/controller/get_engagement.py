@@ -0,0 +1,66 @@
+from fastapi import Depends
+from sqlalchemy.orm import Session
+from app.schemas import pydantic_models
+from app.models import database_models
+from app.config.database import get_read_db
+from app.config.jwt_config import get_current_user_id
+
+
+def get_engagement(
+    data: pydantic_models.EngagementBatch,
+    db: Session = Depends(get_read_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Like and subscription state for a whole feed page in one call. Uses at
+    most four IN (...) queries however many videos and channels are asked
+    for; each entry has the same shape as the single-item endpoints.
+    """
+    video_ids = set(data.video_ids)
+    channel_ids = set(data.channel_ids)
+    videos = {}
+    channels = {}
+
+    if video_ids:
+        counts = db.query(
+            database_models.Video.id,
+            database_models.Video.like_count,
+            database_models.Video.dislike_count,
+        ).filter(database_models.Video.id.in_(video_ids))
+        liked = {
+            video_id
+            for (video_id,) in db.query(database_models.Like.video_id).filter(
+                database_models.Like.user_id == current_user_id,
+                database_models.Like.video_id.in_(video_ids),
+            )
+        }
+        for video_id, likes, dislikes in counts:
+            videos[video_id] = {
+                "liked": "true" if video_id in liked else "false",
+                "likes": likes + dislikes,
+            }
+
+    if channel_ids:
+        subscriber_counts = dict(
+            db.query(
+                database_models.ChannelStats.channel_id,
+                database_models.ChannelStats.total_subscribers,
+            ).filter(database_models.ChannelStats.channel_id.in_(channel_ids))
+        )
+        subscribed = {
+            channel_id
+            for (channel_id,) in db.query(
+                database_models.Subscription.channel_id
+            ).filter(
+                database_models.Subscription.user_id == current_user_id,
+                database_models.Subscription.channel_id.in_(channel_ids),
+            )
+        }
+        for channel_id in channel_ids:
+            channels[channel_id] = {
+                "subscribed": "true" if channel_id in subscribed else "false",
+                "subscribers": subscriber_counts.get(channel_id, 0),
+                "owner_watching": str(channel_id == current_user_id),
+            }
+
+    return {"videos": videos, "channels": channels}
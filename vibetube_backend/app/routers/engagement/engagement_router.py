@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from app.routers.engagement.controller.get_engagement import get_engagement
+
+engagement_router = APIRouter()
+
+engagement_router.add_api_route("/", get_engagement, methods=["POST"])
@@ -1,30 +1,40 @@
 from fastapi import Depends
+from sqlalchemy import exists
 from sqlalchemy.orm import Session
 from app.models import database_models
 from app.config.jwt_config import get_current_user_id
-from app.config.database import get_db
+from app.config.database import get_read_db
 
 
 def get_likes_count(
     video_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
-    count = (
-        db.query(database_models.Like)
-        .filter(database_models.Like.video_id == video_id)
-        .count()
-    )
+    # counters live on the video row; the user's own reaction is a unique-index probe.
+    # "likes" counts every reaction row and "liked" any reaction, as they always have
     user_liked = (
-        db.query(database_models.Like)
-        .filter(
+        exists()
+        .where(
             database_models.Like.video_id == video_id,
             database_models.Like.user_id == current_user_id,
         )
+        .label("user_liked")
+    )
+    row = (
+        db.query(
+            database_models.Video.like_count,
+            database_models.Video.dislike_count,
+            user_liked,
+        )
+        .filter(database_models.Video.id == video_id)
         .first()
     )
+    if not row:
+        return {"liked": "false", "likes": 0}
 
-    if user_liked:
-        return {"liked": "true", "likes": count}
+    likes, dislikes, liked = row
+    if liked:
+        return {"liked": "true", "likes": likes + dislikes}
     else:
-        return {"liked": "false", "likes": count}
+        return {"liked": "false", "likes": likes + dislikes}
@@ -1,35 +1,82 @@
 from app.schemas import pydantic_models
 from sqlalchemy.orm import Session
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
 from app.models import database_models
 from app.config.jwt_config import get_current_user_id
-from app.config.database import get_db
+from app.config.database import get_write_db
+from app.utils.upserts import upsert_insert
+
+# SQLSTATE foreign_key_violation
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def is_foreign_key_violation(error: IntegrityError) -> bool:
+    # psycopg2 reports the SQLSTATE, sqlite3 only a message
+    if getattr(error.orig, "pgcode", None) == FOREIGN_KEY_VIOLATION:
+        return True
+    return "FOREIGN KEY constraint failed" in str(error.orig)
 
 
 def like_video(
     data: pydantic_models.LikeToggle,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
+    """
+    Toggles the user's reaction in one transaction: delete the existing row
+    if there is one, otherwise insert it, and move the matching counter on
+    the video by the same amount. The response and the counter follow the
+    row the statements actually removed or added: when a concurrent click
+    inserted the same reaction first, the insert does nothing and the
+    reaction is reported as added, since it is there.
+    """
+    Like = database_models.Like
+    Video = database_models.Video
 
-    existing = (
-        db.query(database_models.Like)
-        .filter(
-            database_models.Like.video_id == data.video_id,
-            database_models.Like.user_id == current_user_id,
+    def move_counters(reaction: str, step: int) -> bool:
+        moved = db.execute(
+            update(Video)
+            .where(Video.id == data.video_id)
+            .values(
+                like_count=Video.like_count + (step if reaction == "like" else 0),
+                dislike_count=Video.dislike_count
+                + (step if reaction == "dislike" else 0),
+            )
         )
-        .first()
-    )
+        return moved.rowcount == 1
 
-    if existing:
-        db.delete(existing)
-        db.commit()
-        return {"message": "Removed"}
+    try:
+        removed = db.scalar(
+            delete(Like)
+            .where(Like.video_id == data.video_id, Like.user_id == current_user_id)
+            .returning(Like.type)
+        )
+        if removed is not None:
+            move_counters(removed, -1)
+            db.commit()
+            return {"message": "Removed"}
 
-    new_like = database_models.Like(
-        video_id=data.video_id, user_id=current_user_id, type=data.type
-    )
+        added = db.scalar(
+            upsert_insert(db, Like)
+            .values(user_id=current_user_id, video_id=data.video_id, type=data.type)
+            .on_conflict_do_nothing(index_elements=[Like.user_id, Like.video_id])
+            .returning(Like.type)
+        )
+        # without enforced foreign keys a missing video only shows here
+        if added is not None and not move_counters(added, 1):
+            db.rollback()
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Video not found"
+            )
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        if not is_foreign_key_violation(e):
+            raise
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Video not found"
+        )
 
-    db.add(new_like)
-    db.commit()
     return {"message": "Added"}
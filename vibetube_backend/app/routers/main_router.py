@@ -3,6 +3,8 @@ from app.routers.auth.auth_router import auth_router
 from app.routers.videos.videos_router import videos_router
 from app.routers.subscribers.subscriber_router import subscriber_router
 from app.routers.users.user_router import user_router
+from app.routers.engagement.engagement_router import engagement_router
+from app.routers.metrics.metrics_router import metrics_router
 
 main_router = APIRouter()
 
@@ -12,3 +14,5 @@ main_router.include_router(
     subscriber_router, prefix="/subscribers", tags=["Subscribers"]
 )
 main_router.include_router(user_router, prefix="/users", tags=["Users"])
+main_router.include_router(engagement_router, prefix="/engagement", tags=["Engagement"])
+main_router.include_router(metrics_router, prefix="/metrics", tags=["Metrics"])
@@ -0,0 +1,6 @@
+from app.utils.cache import response_cache
+
+
+def cache_stats():
+    """Hit and miss counts of this process's response cache, per key namespace."""
+    return response_cache.stats()
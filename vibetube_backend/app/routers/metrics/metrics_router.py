@@ -0,0 +1,6 @@
+from fastapi import APIRouter
+from app.routers.metrics.controller.cache_stats import cache_stats
+
+metrics_router = APIRouter()
+
+metrics_router.add_api_route("/cache", cache_stats, methods=["GET"])
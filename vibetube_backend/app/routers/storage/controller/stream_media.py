@@ -0,0 +1,12 @@
+from fastapi import Request
+from app.constants.app_constants import VIDEO_DIR, THUMB_DIR
+from app.utils.file_streaming import stream_file
+
+
+async def stream_video(filename: str, request: Request):
+    """Locally stored video, with Range support for seeking."""
+    return await stream_file(request, VIDEO_DIR, filename)
+
+
+async def stream_thumbnail(filename: str, request: Request):
+    return await stream_file(request, THUMB_DIR, filename)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from app.routers.storage.controller.stream_media import stream_video, stream_thumbnail
+
+storage_router = APIRouter()
+
+storage_router.add_api_route(
+    "/videos/{filename}", stream_video, methods=["GET", "HEAD"]
+)
+
+storage_router.add_api_route(
+    "/thumbnails/{filename}", stream_thumbnail, methods=["GET", "HEAD"]
+)
@@ -1,13 +1,13 @@
 from sqlalchemy.orm import Session
 from fastapi import Depends
-from app.config.database import get_db
+from app.config.database import get_read_db
 from app.config.jwt_config import get_current_user_id
 from app.models import database_models
 
 
 def get_subscribers(
     channel_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
 
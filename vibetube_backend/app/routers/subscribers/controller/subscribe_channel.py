@@ -2,13 +2,15 @@ from app.schemas import pydantic_models
 from sqlalchemy.orm import Session
 from fastapi import Depends, HTTPException, status
 from app.models import database_models
-from app.config.database import get_db
+from app.config.database import get_write_db
 from app.config.jwt_config import get_current_user_id
+from app.utils.counters import bump_channel_stats
+from app.utils.timeline import backfill_timeline, drop_from_timeline
 
 
 def subscribe_to_channel(
     data: pydantic_models.SubscribeToggle,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_write_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
     if data.user_id == current_user_id:
@@ -27,6 +29,8 @@ def subscribe_to_channel(
 
     if existing:
         db.delete(existing)
+        bump_channel_stats(db, [{"channel_id": data.user_id, "total_subscribers": -1}])
+        drop_from_timeline(db, current_user_id, data.user_id)
         db.commit()
         return {"message": "Removed"}
 
@@ -36,5 +40,8 @@ def subscribe_to_channel(
     )
 
     db.add(new_subscribe)
+    bump_channel_stats(db, [{"channel_id": data.user_id, "total_subscribers": 1}])
+    # earlier uploads were fanned out before this subscription existed
+    backfill_timeline(db, current_user_id, data.user_id)
     db.commit()
     return {"message": "Added"}
@@ -1,16 +1,35 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from fastapi import Depends
-from app.config.database import get_db
+from fastapi import Depends, Request, Response
+from fastapi.encoders import jsonable_encoder
+from app.config.database import get_read_db
 from app.models import database_models
+from app.utils.cache import response_cache
+from app.utils.conditional import Validators
 
 
 def channel_details(
     channel_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
 ):
-    channel = (
-        db.query(database_models.User)
-        .filter(database_models.User.id == channel_id)
-        .first()
+    User = database_models.User
+    stamps = db.execute(
+        select(User.created_at, User.updated_at).where(User.id == channel_id)
+    ).first()
+    version = ""
+    if stamps is not None:
+        validators = Validators("channel", channel_id, *stamps)
+        if (not_modified := validators.respond(request, response)) is not None:
+            return not_modified
+        version = validators.etag
+
+    def load():
+        channel = db.query(User).filter(User.id == channel_id).first()
+        # the hash has no business in a response, let alone a shared cache
+        return jsonable_encoder(channel, exclude={"password_hash"})
+
+    return response_cache.cached(
+        f"channel:{channel_id}:{version}", [f"channel:{channel_id}"], load
     )
-    return channel
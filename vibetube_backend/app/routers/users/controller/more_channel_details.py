@@ -1,40 +1,37 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from fastapi import Depends
-from app.config.database import get_db
+from fastapi import Depends, Request, Response
+from app.config.database import get_read_db
 from app.models import database_models
+from app.utils.conditional import Validators
 
 
 def more_channel_details(
     channel_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
 ):
-    total_videos = (
-        db.query(database_models.Video)
-        .filter(database_models.Video.user_id == channel_id)
-        .count()
-    )
+    # totals are maintained on write, so this is a single primary-key lookup
+    ChannelStats = database_models.ChannelStats
+    stats = db.execute(
+        select(
+            ChannelStats.total_videos,
+            ChannelStats.total_views,
+            ChannelStats.total_subscribers,
+            ChannelStats.updated_at,
+        ).where(ChannelStats.channel_id == channel_id)
+    ).first()
+    if not stats:
+        return {"total_videos": 0, "total_views": 0, "total_subscribers": 0}
+
+    # updated_at alone would miss two bumps within the same (SQLite) second
+    validators = Validators("channel_stats", channel_id, *stats)
+    if (not_modified := validators.respond(request, response)) is not None:
+        return not_modified
 
-    total_views = (
-        db.query(database_models.View)
-        .join(
-            # 2. Join to the Video table
-            database_models.Video,
-            # 3. Use the explicit ON condition (or rely on relationships)
-            database_models.View.video_id == database_models.Video.id,
-        )
-        .filter(
-            # 4. Filter by the video's owner (the channel_id)
-            database_models.Video.user_id == channel_id
-        )
-        .count()
-    )
-    total_subscribers = (
-        db.query(database_models.Subscription)
-        .filter(database_models.Subscription.channel_id == channel_id)
-        .count()
-    )
     return {
-        "total_videos": total_videos,
-        "total_views": total_views,
-        "total_subscribers": total_subscribers,
+        "total_videos": stats.total_videos,
+        "total_views": stats.total_views,
+        "total_subscribers": stats.total_subscribers,
     }
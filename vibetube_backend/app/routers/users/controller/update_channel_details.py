@@ -1,24 +1,30 @@
 from fastapi import Form, UploadFile, File, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.config.jwt_config import get_current_user_id
 from app.models import database_models
-from PIL import Image
-from io import BytesIO
-from app.config.database import get_db
+from app.config.database import get_async_db
+import asyncio
 import uuid
-from app.config.supabase_config import supabase
-from app.constants.supabase_constants import BUCKET_NAME
+from fastapi.concurrency import run_in_threadpool
+from app.constants.app_constants import AVATAR_SIZE
+from app.utils.images import avatar_variants, IMAGE_EXTENSION, IMAGE_CONTENT_TYPE
+from app.utils.storage import storage
+from app.utils.search import refresh_search_vectors
+from app.utils.trigram_index import trigram_index
+from app.utils.suggest_index import suggest_index
+from app.utils.cache import response_cache, PROFILES_TAG
 
 
 async def update_channel_details(
     username: str = Form(...),
     description: str = Form(None),
     profile_image: UploadFile | None = File(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
     # 1. Verify User Exists
-    user = db.query(database_models.User).filter_by(id=current_user_id).first()
+    user = await db.scalar(select(database_models.User).filter_by(id=current_user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -30,51 +36,52 @@ async def update_channel_details(
             raise HTTPException(status_code=400, detail="Invalid image type")
 
         try:
-            # Read file bytes into memory
+            # Decode once and render every avatar size in the image pool.
+            # Avatars are cropped to a square, so transparent PNGs and odd
+            # aspect ratios come out clean
             contents = await profile_image.read()
-            img = Image.open(BytesIO(contents))
+            variants = await avatar_variants(contents)
 
-            # Convert to RGB to support saving cleanly as a standard JPEG/WEBP
-            # (Avoids alpha-channel errors if they upload a transparent PNG)
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-
-            # Resize avatar to your standard scale
-            img = img.resize((128, 128))
-
-            # Save optimized image into an in-memory byte buffer
-            avatar_buffer = BytesIO()
-            img.save(avatar_buffer, format="JPEG", quality=85)
-            avatar_buffer.seek(0)  # Reset buffer stream position to the beginning
-
-            # Generate a unique path/filename for the bucket file
-            # Example: "user_42/avatar_a1b2c3d4.jpg"
+            # Generate a unique path/filename for each stored file
+            # Example: "avatars/user_42/avatar_a1b2c3d4_128.webp"
             unique_token = uuid.uuid4().hex[:8]
-            avatar_filename = f"user_{current_user_id}/avatar_{unique_token}.jpg"
+            avatar_names = {
+                size: f"avatars/user_{current_user_id}/avatar_{unique_token}_{size}{IMAGE_EXTENSION}"
+                for size in variants
+            }
 
-            # 3. Optional: Delete old avatar from Supabase to prevent storage clutter
-            # We look at the saved string path in your DB if it's already a Supabase pointer
-            if user.profile_image and "supabase.co" in user.profile_image:
+            # 3. Upload raw optimized bytes straight to storage
+            await asyncio.gather(
+                *(
+                    storage.put(
+                        avatar_names[size], data, IMAGE_CONTENT_TYPE, "max-age=3600"
+                    )
+                    for size, data in variants.items()
+                )
+            )
+
+            # 4. Optional: Delete old avatars to prevent storage clutter
+            # Only files of the current backend are ours to remove; generated
+            # avatars and files from a previous backend are left alone
+            old_urls = {user.profile_image, *(user.avatar_variants or {}).values()}
+            old_paths = [
+                # e.g., from ".../public/bucket/avatars/user_42/avatar_old.webp" -> "avatars/user_42/avatar_old.webp"
+                object_name
+                for url in old_urls
+                if url and (object_name := storage.object_for_url(url))
+            ]
+            if old_paths:
                 try:
-                    # Extract the old file path from the stored public URL
-                    # e.g., from ".../public/avatars/user_42/avatar_old.jpg" -> "user_42/avatar_old.jpg"
-                    old_path = user.profile_image.split(f"{BUCKET_NAME}/")[-1]
-                    supabase.storage.from_(BUCKET_NAME).remove([old_path])
+                    await storage.delete(old_paths)
                 except Exception as clean_err:
                     print(f"Warning: Failed to clear old avatar asset: {clean_err}")
 
-            # 4. Upload raw optimized bytes straight to Supabase
-            supabase.storage.from_(BUCKET_NAME).upload(
-                path=avatar_filename,
-                file=avatar_buffer.read(),
-                file_options={"content-type": "image/jpeg", "cache-control": "3600"},
-            )
-
-            # 5. Fetch and update the direct target URL string
-            public_avatar_url = supabase.storage.from_(BUCKET_NAME).get_public_url(
-                avatar_filename
-            )
-            user.profile_image = public_avatar_url
+            # 5. Fetch and update the direct target URL strings
+            user.avatar_variants = {
+                str(size): storage.public_url(name)
+                for size, name in avatar_names.items()
+            }
+            user.profile_image = user.avatar_variants[str(AVATAR_SIZE)]
 
         except Exception as e:
             raise HTTPException(
@@ -84,9 +91,26 @@ async def update_channel_details(
             await profile_image.close()
 
     # 6. Save text fields and commit changes
+    username_changed = user.username != username
     user.username = username
     user.channel_description = description
-    db.commit()
-    db.refresh(user)
+
+    # the channel name is part of every one of its videos' search vectors
+    if username_changed:
+        await db.flush()
+        await db.run_sync(refresh_search_vectors, user_id=current_user_id)
+
+    await db.commit()
+    await db.refresh(user)
+
+    if username_changed:
+        trigram_index.set_username(user.id, user.username)
+        suggest_index.set_channel(user.id, user.username)
+
+    # name and avatar are embedded in video, feed, search and comment entries
+    tags = [f"channel:{current_user_id}"]
+    if username_changed or profile_image:
+        tags.append(PROFILES_TAG)
+    await run_in_threadpool(response_cache.invalidate, *tags)
 
     return user
@@ -1,11 +1,44 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request, Response
 from app.models import database_models
-from app.config.database import get_db
+from app.config.database import get_read_db
+from app.utils.cache import response_cache, PROFILES_TAG
+from app.utils.conditional import Validators
+from app.utils.video_cards import FastJSONResponse, card_query, dumps, video_card
 
 
-def get_single_video(video_id: int, db: Session = Depends(get_db)):
-    video = db.query(database_models.Video).filter_by(id=video_id).first()
-    if not video:
+def get_single_video(
+    video_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+):
+    Video = database_models.Video
+    User = database_models.User
+    # the row's own stamp plus the owner's, whose name and avatar are embedded
+    stamps = db.execute(
+        select(Video.updated_at, User.updated_at)
+        .join(User, User.id == Video.user_id)
+        .where(Video.id == video_id)
+    ).first()
+    if stamps is None:
         raise HTTPException(status_code=404, detail="Video not found")
-    return video
+    validators = Validators("video", video_id, *stamps)
+    if (not_modified := validators.respond(request, response)) is not None:
+        return not_modified
+
+    def load():
+        row = card_query(db).filter(Video.id == video_id).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="Video not found")
+        return dumps(video_card(row)).decode()
+
+    # keyed by version too, so a body is never sent with a newer ETag than its own
+    body = response_cache.cached(
+        f"video:{video_id}:{validators.etag}",
+        [f"video:{video_id}", PROFILES_TAG],
+        load,
+    )
+    # a returned response skips the one FastAPI injected, validators included
+    return FastJSONResponse(body.encode(), headers=validators.headers)
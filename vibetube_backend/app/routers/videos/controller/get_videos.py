@@ -1,50 +1,98 @@
 from app.models import database_models
 from fastapi import Query, Depends, HTTPException
 from typing import Optional
-from app.constants.app_constants import DEFAULT_VIDEO_LIMIT
-from sqlalchemy.orm import Session, joinedload
-from app.config.database import get_db
-from app.config.jwt_config import get_current_user_id
+from app.constants.app_constants import DEFAULT_VIDEO_LIMIT, FEED_CACHE_TTL_SECONDS
 from sqlalchemy import func
-from datetime import datetime
+from sqlalchemy.orm import Session
+from app.config.database import get_read_db
+from app.config.jwt_config import get_current_user_id
+from app.utils.pagination import (
+    encode_cursor,
+    encode_position_cursor,
+    decode_position_cursor,
+    seek_page,
+)
+from app.utils.timeline import subscription_feed_ids
+from app.utils.cache import response_cache, PROFILES_TAG
+from app.utils.video_cards import FastJSONResponse, card_query, dumps, video_card
+import random
 
+VALID_CATEGORIES = {
+    "music",
+    "movies",
+    "gaming",
+    "anime",
+    "education",
+    "entertainment",
+    "tech",
+    "news",
+    "vlogs",
+    "trending",
+    "liked",
+    "history",
+    "ChannelVideos",
+    "subscriptions",
+}
+# the same page for every viewer; random and the per-user feeds are not cached
+SHARED_FEEDS = VALID_CATEGORIES - {"liked", "history", "subscriptions"}
 
-def get_videos(
-    vid_query: str = Query("random", min_length=1),
-    limit: int = Query(DEFAULT_VIDEO_LIMIT, ge=1, le=50),  # Max 50 per request
-    offset: int = Query(0, ge=0),
-    exclude_ids: Optional[str] = Query(None),
-    channel_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id),
-):
+
+def sample_random_videos(query, limit: int):
     """
-    Fetches videos with pagination using limit and offset.
+    Draws `limit` independent pivots and takes, for each, the first video
+    at or after it in the random_key index, wrapping around to the start of
+    the index past the last key. All seeks run as subqueries of one
+    statement, so the cost depends on `limit`, not on the number of videos.
+    Pivots that land on a video already picked are drawn again.
     """
-    VALID_CATEGORIES = {
-        "music",
-        "movies",
-        "gaming",
-        "anime",
-        "education",
-        "entertainment",
-        "tech",
-        "news",
-        "vlogs",
-        "trending",
-        "liked",
-        "history",
-        "ChannelVideos",
-    }
+    Video = database_models.Video
+    videos = []
+    while len(videos) < limit:
+        unpicked = query
+        if videos:
+            unpicked = query.filter(Video.id.notin_([video.id for video in videos]))
 
-    if vid_query != "random" and vid_query not in VALID_CATEGORIES:
-        raise HTTPException(400, "Invalid category")
+        def first_from(pivot: float):
+            return (
+                unpicked.with_entities(Video.id)
+                .filter(Video.random_key >= pivot)
+                .order_by(Video.random_key)
+                .limit(1)
+                .scalar_subquery()
+            )
+
+        seeks = [
+            func.coalesce(first_from(random.random()), first_from(0.0))
+            for _ in range(limit - len(videos))
+        ]
+        drawn = unpicked.filter(Video.id.in_(seeks)).all()
+        if not drawn:
+            break  # every video is on the page already
+        videos += drawn
 
+    # rows come back in the order the IN list was scanned, not drawn
+    random.shuffle(videos)
+    return videos
+
+
+def fetch_feed(
+    db: Session,
+    vid_query: str,
+    limit: int,
+    offset: int,
+    cursor: str | None,
+    exclude_ids: str | None,
+    channel_id: int | None,
+    current_user_id: int | None,
+):
+    """
+    One page of a feed as (card_query rows, cursor of the next page or None).
+    Rows carry plain columns, so no entities are hydrated for the page.
+    """
     # Base query
-    basequery = db.query(database_models.Video).options(
-        joinedload(database_models.Video.owner)
-    )
+    basequery = card_query(db)
     exclude_ids_list = []
+    next_cursor = None
 
     if vid_query == "random":
         if exclude_ids:
@@ -58,64 +106,156 @@ def get_videos(
                     database_models.Video.id.notin_(exclude_ids_list)
                 )
 
-        videos = basequery.order_by(func.random()).limit(limit).all()
+        videos = sample_random_videos(basequery, limit)
 
     elif vid_query == "liked":
-        videos = (
+        videos = seek_page(
             basequery.join(
                 database_models.Like,
                 database_models.Like.video_id == database_models.Video.id,
-            )
-            .filter(database_models.Like.user_id == current_user_id)
-            .order_by(database_models.Video.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
-        )
+            ).filter(database_models.Like.user_id == current_user_id),
+            database_models.Video.created_at,
+            database_models.Video.id,
+            cursor,
+            offset,
+            limit,
+        ).all()
 
     elif vid_query == "history":
-        videos = (
+        # history is ordered by when the user watched, so the cursor tracks the View row
+        rows = seek_page(
             basequery.join(
                 database_models.View,
                 database_models.View.video_id == database_models.Video.id,
             )
             .filter(database_models.View.user_id == current_user_id)
-            .order_by(database_models.View.created_at.desc())
-            .offset(offset)
+            .add_columns(
+                database_models.View.created_at.label("viewed_at"),
+                database_models.View.id.label("view_id"),
+            ),
+            database_models.View.created_at,
+            database_models.View.id,
+            cursor,
+            offset,
+            limit,
+        ).all()
+        videos = rows
+        if len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1].viewed_at, rows[-1].view_id)
+
+    elif vid_query == "trending":
+        # read the window pre-ranked by the trending worker; ranks are 1..N so
+        # both the cursor and the offset fallback become an index seek on rank
+        last_rank = decode_position_cursor(cursor) if cursor else offset
+        rows = (
+            basequery.join(
+                database_models.VideoTrending,
+                database_models.VideoTrending.video_id == database_models.Video.id,
+            )
+            .filter(database_models.VideoTrending.rank > last_rank)
+            .add_columns(database_models.VideoTrending.rank)
+            .order_by(database_models.VideoTrending.rank)
             .limit(limit)
             .all()
         )
+        videos = rows
+        if len(rows) == limit:
+            next_cursor = encode_position_cursor(rows[-1].rank)
 
-    elif vid_query == "trending":
-        current_time = datetime.utcnow()
+    elif vid_query == "subscriptions":
+        # page keys come from the fanned-out timeline merged with videos
+        # pulled from large channels, then the page itself is loaded by id
+        keys = subscription_feed_ids(db, current_user_id, cursor, offset, limit)
+        by_id = {
+            video.id: video
+            for video in basequery.filter(
+                database_models.Video.id.in_([video_id for _, video_id in keys])
+            )
+        }
+        videos = [by_id[video_id] for _, video_id in keys if video_id in by_id]
+        if len(keys) == limit:
+            next_cursor = encode_cursor(*keys[-1])
 
-        # compute age in hours
-        age_hours = func.greatest(
-            func.extract("epoch", current_time - database_models.Video.created_at)
-            / 3600.0,
-            0.0,
-        )
+    elif vid_query == "ChannelVideos":
+        videos = seek_page(
+            basequery.filter(database_models.Video.user_id == channel_id),
+            database_models.Video.created_at,
+            database_models.Video.id,
+            cursor,
+            offset,
+            limit,
+        ).all()
+    else:
+        videos = seek_page(
+            basequery.filter(database_models.Video.category == vid_query),
+            database_models.Video.created_at,
+            database_models.Video.id,
+            cursor,
+            offset,
+            limit,
+        ).all()
 
-        # trend score formula
-        trend_score = database_models.Video.views / func.pow(age_hours + 2, 1.2)
+    # the remaining feeds all seek on the video's own (created_at, id)
+    if (
+        vid_query not in ("random", "history", "trending", "subscriptions")
+        and len(videos) == limit
+    ):
+        next_cursor = encode_cursor(videos[-1].created_at, videos[-1].id)
+
+    return videos, next_cursor
+
+
+def get_videos(
+    vid_query: str = Query("random", min_length=1),
+    limit: int = Query(DEFAULT_VIDEO_LIMIT, ge=1, le=50),  # Max 50 per request
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
+    exclude_ids: Optional[str] = Query(None),
+    channel_id: Optional[int] = Query(None),
+    db: Session = Depends(get_read_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Fetches videos with keyset pagination. The cursor for the next page is
+    returned in the X-Next-Cursor header; `offset` is still honoured when no
+    cursor is sent.
+    """
+    if vid_query != "random" and vid_query not in VALID_CATEGORIES:
+        raise HTTPException(400, "Invalid category")
 
-        videos = (
-            basequery.order_by(trend_score.desc()).offset(offset).limit(limit).all()
+    def encoded_page() -> tuple[bytes, str | None]:
+        videos, next_cursor = fetch_feed(
+            db,
+            vid_query,
+            limit,
+            offset,
+            cursor,
+            exclude_ids,
+            channel_id,
+            current_user_id,
         )
-    elif vid_query == "ChannelVideos":
-        videos = (
-            basequery.filter(database_models.Video.user_id == channel_id)
-            .order_by(database_models.Video.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
+        return dumps([video_card(row) for row in videos]), next_cursor
+
+    if vid_query in SHARED_FEEDS:
+
+        def load():
+            # cached already encoded, so hits are sent without touching JSON
+            body, next_cursor = encoded_page()
+            return {"body": body.decode(), "next_cursor": next_cursor}
+
+        if vid_query == "ChannelVideos":
+            tags = [f"videos:{channel_id}", PROFILES_TAG]
+        else:
+            tags = [f"feed:{vid_query}", PROFILES_TAG]
+        page = response_cache.cached(
+            f"feed:{vid_query}:{channel_id}:{cursor}:{offset}:{limit}",
+            tags,
+            load,
+            FEED_CACHE_TTL_SECONDS,
         )
+        body, next_cursor = page["body"].encode(), page["next_cursor"]
     else:
-        videos = (
-            basequery.filter(database_models.Video.category == vid_query)
-            .order_by(database_models.Video.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
-        )
-    return videos
+        body, next_cursor = encoded_page()
+
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return FastJSONResponse(body, headers=headers)
@@ -0,0 +1,208 @@
+import fcntl
+import os
+import uuid
+import anyio
+from fastapi import Depends, File, Form, Header, HTTPException, Request, Response
+from fastapi import UploadFile
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from starlette.datastructures import Headers
+from starlette.requests import ClientDisconnect
+from app.config.database import get_async_db
+from app.config.jwt_config import get_current_user_id
+from app.models import database_models
+from app.schemas import pydantic_models
+from app.utils.upload_sessions import staged_path, remove_staged
+from app.routers.videos.controller.upload_videos import (
+    VIDEO_EXTENSIONS,
+    THUMB_EXTENSIONS,
+    publish_video,
+)
+
+# sessions currently receiving a PATCH in this process
+receiving: set[str] = set()
+
+
+def offset_mismatch(session: database_models.UploadSession) -> HTTPException:
+    return HTTPException(
+        status_code=409,
+        detail="Upload-Offset does not match",
+        headers=offset_headers(session),
+    )
+
+
+def lock_staged(file, session: database_models.UploadSession):
+    """
+    Takes an flock on the staged file, so PATCHes handled by other workers
+    can't write it at the same time, and finalizing can't read it halfway.
+    """
+    try:
+        fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise HTTPException(
+            status_code=409,
+            detail="Upload is already in progress",
+            headers=offset_headers(session),
+        )
+
+
+async def get_owned_session(
+    db: AsyncSession, session_id: str, current_user_id: int
+) -> database_models.UploadSession:
+    session = await db.get(database_models.UploadSession, session_id)
+    if not session or session.user_id != current_user_id:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return session
+
+
+def offset_headers(session: database_models.UploadSession) -> dict:
+    return {
+        "Upload-Offset": str(session.upload_offset),
+        "Upload-Length": str(session.length),
+        "Cache-Control": "no-store",
+    }
+
+
+async def create_upload_session(
+    data: pydantic_models.UploadSessionCreate,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """Starts a resumable upload; chunks are then PATCHed to the returned Location."""
+    if not data.filename.lower().endswith(VIDEO_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Invalid video format")
+
+    session = database_models.UploadSession(
+        id=str(uuid.uuid4()),
+        user_id=current_user_id,
+        filename=data.filename,
+        content_type=data.content_type,
+        length=data.length,
+        upload_offset=0,
+    )
+    await anyio.Path(staged_path(session.id)).touch()
+    db.add(session)
+    await db.commit()
+
+    response.headers["Location"] = f"/api/videos/uploads/{session.id}"
+    return session
+
+
+async def get_upload_offset(
+    session_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    session = await get_owned_session(db, session_id, current_user_id)
+    return Response(status_code=200, headers=offset_headers(session))
+
+
+async def append_upload_chunk(
+    session_id: str,
+    request: Request,
+    upload_offset: int = Header(..., alias="Upload-Offset"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """
+    Appends the request body at `Upload-Offset`, streaming it to the staged
+    file so memory use doesn't depend on the chunk size. If the connection
+    drops, whatever arrived is kept and the client resumes from there.
+    """
+    session = await get_owned_session(db, session_id, current_user_id)
+    if session_id in receiving:
+        raise HTTPException(status_code=409, detail="Upload is already in progress")
+    if upload_offset != session.upload_offset:
+        raise offset_mismatch(session)
+    # claimed before the next await, or a concurrent PATCH passes the check too
+    receiving.add(session_id)
+    try:
+        committed = session.upload_offset
+        offset = committed
+        async with await anyio.open_file(staged_path(session_id), "r+b") as staged:
+            lock_staged(staged.wrapped, session)
+            # a PATCH in another worker may have moved it before the lock was ours
+            await db.refresh(session, ["upload_offset"])
+            # end the read transaction so no pooled connection is held while the body streams in
+            await db.commit()
+            if session.upload_offset != committed:
+                raise offset_mismatch(session)
+
+            # drops bytes past the committed offset left by an interrupted write
+            await staged.truncate(offset)
+            await staged.seek(offset)
+            try:
+                async for chunk in request.stream():
+                    if offset + len(chunk) > session.length:
+                        await staged.truncate(committed)
+                        raise HTTPException(
+                            status_code=413, detail="Chunk exceeds upload length"
+                        )
+                    await staged.write(chunk)
+                    offset += len(chunk)
+            except ClientDisconnect:
+                pass
+            await staged.flush()
+
+            # compare-and-set: the lock only covers the workers of this host
+            UploadSession = database_models.UploadSession
+            result = await db.execute(
+                update(UploadSession)
+                .where(
+                    UploadSession.id == session_id,
+                    UploadSession.upload_offset == committed,
+                )
+                .values(upload_offset=offset)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if result.rowcount == 0:
+            await db.refresh(session)
+            raise offset_mismatch(session)
+    finally:
+        receiving.discard(session_id)
+
+    set_committed_value(session, "upload_offset", offset)
+    return Response(status_code=204, headers=offset_headers(session))
+
+
+async def finalize_upload(
+    session_id: str,
+    title: str = Form(...),
+    description: str = Form(None),
+    category: str = Form(None),
+    thumbnail: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """Publishes a fully received upload through the regular upload pipeline."""
+    session = await get_owned_session(db, session_id, current_user_id)
+    if session_id in receiving or session.upload_offset != session.length:
+        raise HTTPException(
+            status_code=409,
+            detail="Upload is incomplete",
+            headers=offset_headers(session),
+        )
+    if not thumbnail.filename.lower().endswith(THUMB_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Invalid thumbnail format")
+
+    video = UploadFile(
+        file=await anyio.to_thread.run_sync(open, staged_path(session_id), "rb"),
+        size=session.length,
+        filename=os.path.basename(session.filename),
+        headers=Headers({"content-type": session.content_type}),
+    )
+    try:
+        lock_staged(video.file, session)
+        new_video = await publish_video(
+            db, current_user_id, video, thumbnail, title, description, category
+        )
+    finally:
+        await video.close()
+
+    await db.delete(session)
+    await db.commit()
+    await anyio.to_thread.run_sync(remove_staged, session_id)
+    return new_video
@@ -1,22 +1,56 @@
 from fastapi import Query, Depends
-from app.config.database import get_db
+from app.config.database import get_read_db
+from app.constants.app_constants import FEED_CACHE_TTL_SECONDS
 from app.models import database_models
-from sqlalchemy.orm import joinedload, Session
-from sqlalchemy import or_, case
+from app.utils.search import supports_full_text, build_search_query
+from app.utils.trigram_index import trigram_index
+from app.utils.cache import response_cache, PROFILES_TAG
+from app.utils.video_cards import FastJSONResponse, card_query, dumps
+from sqlalchemy.orm import Session
+from sqlalchemy import or_, case, func
 
 
-def search_videos(
-    query: str = Query(..., min_length=1),
-    offset: int = Query(0, ge=0),
-    limit: int = Query(12, le=100),
-    db: Session = Depends(get_db),
-):
+def serialize_search_result(row) -> dict:
+    """A search hit from a card_query row."""
+    return {
+        "id": row.id,
+        "title": row.title,
+        "thumbnail_url": row.thumbnail_url,
+        "duration": row.duration,
+        "video_url": row.video_url,
+        "username": row.owner_username,
+        "profile_image": row.owner_profile_image,
+        "views": row.views,
+        "created_at": row.created_at.isoformat(),
+    }
+
+
+def full_text_search(db: Session, query: str, offset: int, limit: int):
+    """Ranks matches of the GIN-indexed search vector with ts_rank."""
+    ts_query = build_search_query(query)
+    if ts_query is None:
+        return []
+
+    search_vector = database_models.Video.search_vector
+    return (
+        card_query(db)
+        .filter(search_vector.op("@@")(ts_query))
+        .order_by(
+            func.ts_rank(search_vector, ts_query).desc(),
+            database_models.Video.views.desc(),
+        )
+        .offset(offset)
+        .limit(limit)
+        .all()
+    )
+
+
+def substring_search(db: Session, query: str, offset: int, limit: int):
+    """ilike matching, used where tsvector is not available (e.g. SQLite)."""
     like_query = f"%{query}%"
 
-    videos = (
-        db.query(database_models.Video)
-        .join(database_models.Video.owner)
-        .options(joinedload(database_models.Video.owner))
+    return (
+        card_query(db)
         .filter(
             or_(
                 database_models.Video.title.ilike(like_query),
@@ -37,17 +71,54 @@ def search_videos(
         .all()
     )
 
-    return [
-        {
-            "id": video.id,
-            "title": video.title,
-            "thumbnail_url": video.thumbnail_url,
-            "duration": video.duration,
-            "video_url": video.video_url,
-            "username": video.owner.username,
-            "profile_image": video.owner.profile_image,
-            "views": video.views,
-            "created_at": video.created_at.isoformat(),
-        }
-        for video in videos
-    ]
+
+def fuzzy_search(db: Session, query: str, offset: int, limit: int):
+    """Typo tolerant matching through the in-process trigram index."""
+    ranked_ids = trigram_index.search(query, offset, limit)
+    if not ranked_ids:
+        return []
+
+    rows = card_query(db).filter(database_models.Video.id.in_(ranked_ids)).all()
+    by_id = {row.id: row for row in rows}
+    return [by_id[video_id] for video_id in ranked_ids if video_id in by_id]
+
+
+def exact_search(db: Session, query: str, offset: int, limit: int):
+    if supports_full_text(db):
+        return full_text_search(db, query, offset, limit)
+    return substring_search(db, query, offset, limit)
+
+
+def search_videos(
+    query: str = Query(..., min_length=1),
+    offset: int = Query(0, ge=0),
+    limit: int = Query(12, le=100),
+    mode: str = Query("auto", pattern="^(auto|exact|fuzzy)$"),
+    db: Session = Depends(get_read_db),
+):
+    """
+    exact: text search only. fuzzy: trigram similarity only.
+    auto: text search, falling back to fuzzy when the query matches nothing
+    at all (so a misspelt query still pages through fuzzy results).
+    """
+
+    def load():
+        if mode == "fuzzy":
+            videos = fuzzy_search(db, query, offset, limit)
+        else:
+            videos = exact_search(db, query, offset, limit)
+            if (
+                mode == "auto"
+                and not videos
+                and (offset == 0 or not exact_search(db, query, 0, 1))
+            ):
+                videos = fuzzy_search(db, query, offset, limit)
+        return dumps([serialize_search_result(row) for row in videos]).decode()
+
+    body = response_cache.cached(
+        f"search:{mode}:{offset}:{limit}:{query}",
+        ["search", PROFILES_TAG],
+        load,
+        FEED_CACHE_TTL_SECONDS,
+    )
+    return FastJSONResponse(body.encode())
@@ -0,0 +1,14 @@
+from fastapi import Query
+from app.constants.app_constants import SUGGEST_MAX_RESULTS
+from app.utils.suggest_index import suggest_index
+
+
+def suggest_videos(
+    query: str = Query(..., min_length=1),
+    limit: int = Query(8, ge=1, le=SUGGEST_MAX_RESULTS),
+):
+    """
+    Title and channel name completions for a prefix, most viewed first.
+    Served from memory, so it never touches the database.
+    """
+    return suggest_index.suggest(query, limit)
@@ -1,197 +1,240 @@
 from fastapi import Depends, HTTPException
 from app.config.jwt_config import get_current_user_id
-from app.config.database import get_db
+from app.config.database import get_async_db
 from app.models import database_models
 from fastapi import UploadFile, File, Form
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
 import os
 import uuid
-import shutil
-from PIL import Image
-from io import BytesIO
-from app.utils.videos import get_video_duration
-from app.constants.app_constants import (
-    VIDEO_DIR,
-    THUMB_DIR,
-    THUMB_WIDTH,
-    THUMB_HEIGHT,
-    THUMB_QUALITY,
-)
-from app.constants.supabase_constants import BUCKET_NAME
-from app.config.supabase_config import supabase
-
-
-async def upload_video(
-    title: str = Form(...),
-    description: str = Form(None),
-    category: str = Form(None),
-    video: UploadFile = File(...),
-    thumbnail: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    current_user_id: int = Depends(get_current_user_id),
-):
-    # 1. Validate video & image extensions
-    if not video.filename.lower().endswith((".mp4", ".mov", ".avi", ".webm")):
-        raise HTTPException(status_code=400, detail="Invalid video format")
-
-    if not thumbnail.filename.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
-        raise HTTPException(status_code=400, detail="Invalid thumbnail format")
-
+import hashlib
+from fastapi.concurrency import run_in_threadpool
+from app.utils.videos import known_media_info, probe_media
+from app.utils.streaming_upload import hash_upload, stream_to_storage
+from app.utils.storage import StorageBackend, storage, local_storage, get_backend
+from app.utils.search import search_vector_for_new_video
+from app.utils.trigram_index import trigram_index
+from app.utils.suggest_index import suggest_index
+from app.utils.counters import bump_channel_stats
+from app.utils.timeline import fanout_worker
+from app.utils.transcoding import transcode_pool
+from app.utils.media_blobs import claim_blob, match_blob, ready_renditions
+from app.utils.images import thumbnail_variants, IMAGE_EXTENSION, IMAGE_CONTENT_TYPE
+from app.utils.cache import response_cache
+from app.constants.app_constants import THUMB_WIDTH
+
+VIDEO_EXTENSIONS = (".mp4", ".mov", ".avi", ".webm")
+THUMB_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp")
+
+
+async def publish_video(
+    db: AsyncSession,
+    current_user_id: int,
+    video: UploadFile,
+    thumbnail: UploadFile,
+    title: str,
+    description: str | None,
+    category: str | None,
+    target: StorageBackend = storage,
+) -> database_models.Video:
+    """
+    Stores a validated upload in `target` and creates its Video row. Shared
+    by the one-shot upload and the finalize step of resumable uploads. Files
+    whose bytes are already stored reuse that object and are not uploaded
+    or probed again.
+    """
     video_extension = os.path.splitext(video.filename)[1]
-    thumb_extension = ".webp"
-
-    video_filename = f"{uuid.uuid4()}{video_extension}"
-    thumb_filename = f"{uuid.uuid4()}{thumb_extension}"
-
-    # Temporary local paths for processing
-    temp_video_path = os.path.join(VIDEO_DIR, video_filename)
+    video_name = f"videos/{uuid.uuid4()}{video_extension}"
+    thumb_stem = f"thumbnails/{uuid.uuid4()}"
+    uploaded = []  # objects created by this request
 
+    # 1. Hash the video and look for a copy of the same bytes in `target`
+    video_hash = await hash_upload(video)
+    video_blob = await db.run_sync(match_blob, video_hash, target.name)
     try:
-        # 2. Save video locally temporarily to extract duration
-        with open(temp_video_path, "wb") as buffer:
-            shutil.copyfileobj(video.file, buffer)
-
-        duration = get_video_duration(temp_video_path)
-        if duration == 0:
-            raise HTTPException(
-                status_code=500, detail="Could not extract video duration."
+        media = None
+        if video_blob is not None:
+            media = await db.run_sync(known_media_info, video_hash)
+        # don't hold a pooled connection while the bytes stream
+        await db.commit()
+        if video_blob is not None and media is None:
+            media = await run_in_threadpool(probe_media, video_blob.url)
+
+        # 2. Otherwise stream it to storage, probing it on the way
+        if video_blob is None:
+            streamed = await stream_to_storage(
+                target, video, video_name, video.content_type, video_hash
             )
+            uploaded.append(video_name)
+            media = streamed.media
+            video_object = (target.name, video_name, target.public_url(video_name))
+            video_size = streamed.size
+        else:
+            video_object = (video_blob.backend, video_blob.object_name, video_blob.url)
+            video_size = video_blob.size
+    except RuntimeError:
+        raise HTTPException(status_code=500, detail="Could not extract video duration.")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Upload workflow failed: {str(e)}")
 
-        # 3. Process Thumbnail entirely in-memory using BytesIO
+    try:
+        # 3. Render the thumbnail sizes in the image pool, unless this exact
+        # image is already stored
         thumb_content = await thumbnail.read()
-        img = Image.open(BytesIO(thumb_content))
-
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-
-        img.thumbnail((THUMB_WIDTH, THUMB_HEIGHT))
-
-        # Save optimized image into a bytes buffer instead of writing to disk
-        thumb_buffer = BytesIO()
-        img.save(thumb_buffer, format="WEBP", quality=THUMB_QUALITY)
-        thumb_buffer.seek(0)  # Reset buffer pointer to the beginning
-
-        # 4. Upload Assets to Supabase Storage
-
-        # Upload Video from local temp file
-        with open(temp_video_path, "rb") as vf:
-            supabase.storage.from_(BUCKET_NAME).upload(
-                path=video_filename,
-                file=vf,
-                file_options={"content-type": video.content_type},
+        thumb_hash = hashlib.sha256(thumb_content).hexdigest()
+        thumb_blob = await db.run_sync(match_blob, thumb_hash, target.name)
+        if thumb_blob is None:
+            variants = await thumbnail_variants(thumb_content)
+            thumb_names = {
+                str(width): f"{thumb_stem}_{width}{IMAGE_EXTENSION}"
+                for width in variants
+            }
+            await asyncio.gather(
+                *(
+                    target.put(thumb_names[str(width)], data, IMAGE_CONTENT_TYPE)
+                    for width, data in variants.items()
+                )
             )
-
-        # Upload Thumbnail from our memory buffer
-        supabase.storage.from_(BUCKET_NAME).upload(
-            path=thumb_filename,
-            file=thumb_buffer.read(),
-            file_options={"content-type": "image/webp"},
+            uploaded.extend(thumb_names.values())
+            thumb_name = thumb_names[str(THUMB_WIDTH)]
+            thumb_object = (target.name, thumb_name, target.public_url(thumb_name))
+            thumb_size = sum(len(data) for data in variants.values())
+        else:
+            thumb_names = thumb_blob.variants
+            thumb_object = (thumb_blob.backend, thumb_blob.object_name, thumb_blob.url)
+            thumb_size = thumb_blob.size
+
+        # 4. Reference both blobs; a concurrent upload of the same bytes may
+        # have registered them first, in which case its objects are used
+        video_blob = await db.run_sync(
+            claim_blob, video_hash, "video", *video_object, video_size
         )
-
-        # 5. Get Public URLs from Supabase
-        video_url = supabase.storage.from_(BUCKET_NAME).get_public_url(video_filename)
-        thumbnail_url = supabase.storage.from_(BUCKET_NAME).get_public_url(
-            thumb_filename
+        thumb_blob = await db.run_sync(
+            claim_blob,
+            thumb_hash,
+            "thumbnail",
+            *thumb_object,
+            thumb_size,
+            variants=thumb_names,
         )
+        # an identical video that is already transcoded shares its renditions
+        hls_url = await db.run_sync(ready_renditions, video_hash, video_blob.url)
 
-        # 6. Save public production URLs to Postgres database
+        # 5. Save public production URLs to Postgres database
+        thumb_storage = get_backend(thumb_blob.backend)
         new_video = database_models.Video(
             user_id=current_user_id,
-            video_url=video_url,
-            thumbnail_url=thumbnail_url,
-            duration=duration,
+            video_url=video_blob.url,
+            thumbnail_url=thumb_blob.url,
+            thumbnail_variants={
+                width: thumb_storage.public_url(name)
+                for width, name in (thumb_blob.variants or {}).items()
+            },
+            **media.as_columns(),
+            content_hash=video_hash,
+            thumbnail_hash=thumb_hash,
             title=title,
             description=description,
             category=category,
+            search_vector=await db.run_sync(
+                search_vector_for_new_video, title, description, current_user_id
+            ),
+            hls_url=hls_url,
+            processing_status="ready" if hls_url else "queued",
         )
         db.add(new_video)
-        db.commit()
-        db.refresh(new_video)
-
-        return new_video
+        await db.flush()
+        if hls_url is None:
+            db.add(database_models.TranscodeJob(video_id=new_video.id))
+        await db.run_sync(
+            bump_channel_stats, [{"channel_id": current_user_id, "total_videos": 1}]
+        )
+        await db.commit()
+        await db.refresh(new_video)
+        # VideoOut embeds the owner, which can't be lazy loaded under asyncio
+        await db.refresh(new_video, ["owner"])
 
     except Exception as e:
-        db.rollback()
+        await db.rollback()
+        # don't leave orphaned objects in storage
+        try:
+            if uploaded:
+                await target.delete(uploaded)
+        except Exception as clean_err:
+            print(f"Warning: Failed to remove uploaded assets: {clean_err}")
         raise HTTPException(status_code=500, detail=f"Upload workflow failed: {str(e)}")
 
-    finally:
-        # Crucial: Always clean up the temporary local video file regardless of success or failure
-        if os.path.exists(temp_video_path):
-            os.remove(temp_video_path)
+    # objects that lost the race to register the same bytes
+    kept = {video_blob.object_name, thumb_blob.object_name}
+    kept.update((thumb_blob.variants or {}).values())
+    duplicates = [name for name in uploaded if name not in kept]
+    if duplicates:
+        try:
+            await target.delete(duplicates)
+        except Exception as clean_err:
+            print(f"Warning: Failed to remove duplicate assets: {clean_err}")
+
+    trigram_index.add_video(new_video.id, new_video.user_id, new_video.title)
+    suggest_index.add_title(new_video.title)
+    # with a shared cache tier this is a network round trip
+    await run_in_threadpool(
+        response_cache.invalidate,
+        f"feed:{new_video.category}",
+        f"videos:{current_user_id}",
+        "search",
+    )
+    fanout_worker.wake()
+    if hls_url is None:
+        # renditions are built in the background, the original plays meanwhile
+        transcode_pool.wake()
+
+    return new_video
 
 
-async def upload_video_locally(
+async def upload_video(
     title: str = Form(...),
     description: str = Form(None),
     category: str = Form(None),
     video: UploadFile = File(...),
     thumbnail: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id),
 ):
-
-    # Validate video
-    if not video.filename.lower().endswith((".mp4", ".mov", ".avi", ".webm")):
+    # 1. Validate video & image extensions
+    if not video.filename.lower().endswith(VIDEO_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Invalid video format")
 
-    # Validate image
-    if not thumbnail.filename.lower().endswith((".jpg", ".jpeg", ".png", ".webp")):
+    if not thumbnail.filename.lower().endswith(THUMB_EXTENSIONS):
         raise HTTPException(status_code=400, detail="Invalid thumbnail format")
 
-    video_extension = os.path.splitext(video.filename)[1]  # e.g., .mp4
-    thumb_extension = ".webp"
-    video_filename = f"{uuid.uuid4()}{video_extension}"  # e.g., d9e1c52a-9d5c-4a91-bf1f-a3003c12a92f.mp4
-    thumb_filename = f"{uuid.uuid4()}{thumb_extension}"
-    video_path = os.path.join(VIDEO_DIR, video_filename)
-    thumb_path = os.path.join(THUMB_DIR, thumb_filename)
-
-    # Save video
-    with open(video_path, "wb") as buffer:
-        shutil.copyfileobj(video.file, buffer)
-
-    # Extract duration
-    duration = get_video_duration(video_path)
-
-    if duration == 0:
-        # If metadata can't be read, delete file and abort
-        os.remove(video_path)
-        raise HTTPException(status_code=500, detail="Could not extract video duration.")
-
-    # Save thumbnail
-    try:
-        thumb_content = await thumbnail.read()
-        img = Image.open(BytesIO(thumb_content))
-
-        # Convert to RGB (required for saving as JPEG/WEBP in some cases)
-        if img.mode != "RGB":
-            img = img.convert("RGB")
-
-        # Resize the image
-        img.thumbnail((THUMB_WIDTH, THUMB_HEIGHT))  # Preserves aspect ratio
+    return await publish_video(
+        db, current_user_id, video, thumbnail, title, description, category
+    )
 
-        # Save the optimized image to the target path
-        img.save(thumb_path, format="WEBP", quality=THUMB_QUALITY)
 
-    except Exception as e:  # if thumbnail fails videos gets deleted too.
-        if os.path.exists(video_path):
-            os.remove(video_path)
+async def upload_video_locally(
+    title: str = Form(...),
+    description: str = Form(None),
+    category: str = Form(None),
+    video: UploadFile = File(...),
+    thumbnail: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id),
+):
+    """Same as upload_video, but always keeps the files on this machine."""
+    if not video.filename.lower().endswith(VIDEO_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Invalid video format")
 
-        raise HTTPException(
-            status_code=500, detail=f"Failed to process or save thumbnail: {e}"
-        )
+    if not thumbnail.filename.lower().endswith(THUMB_EXTENSIONS):
+        raise HTTPException(status_code=400, detail="Invalid thumbnail format")
 
-    # 5. Save to database
-    video = database_models.Video(
-        user_id=current_user_id,
-        video_url=f"http://127.0.0.1:8000/storage/videos/{video_filename}",
-        thumbnail_url=f"http://127.0.0.1:8000/storage/thumbnails/{thumb_filename}",
-        duration=duration,
-        title=title,
-        description=description,
-        category=category,
+    return await publish_video(
+        db,
+        current_user_id,
+        video,
+        thumbnail,
+        title,
+        description,
+        category,
+        target=local_storage,
     )
-
-    db.add(video)
-    db.commit()
-    db.refresh(video)
-    return video
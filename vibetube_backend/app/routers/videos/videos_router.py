@@ -4,8 +4,15 @@ from app.routers.likes.likes_router import likes_router
 from app.routers.comments.comments_router import comments_router
 from app.routers.videos.controller.get_videos import get_videos
 from app.routers.videos.controller.upload_videos import upload_video
+from app.routers.videos.controller.resumable_upload import (
+    create_upload_session,
+    get_upload_offset,
+    append_upload_chunk,
+    finalize_upload,
+)
 from app.routers.videos.controller.get_single_video import get_single_video
 from app.routers.videos.controller.search_videos import search_videos
+from app.routers.videos.controller.suggest_videos import suggest_videos
 from app.routers.videos.controller.update_view import update_view
 
 videos_router = APIRouter()
@@ -18,7 +25,28 @@ videos_router.add_api_route(
     "/", upload_video, methods=["POST"], response_model=pydantic_models.VideoOut
 )
 
+videos_router.add_api_route(
+    "/uploads",
+    create_upload_session,
+    methods=["POST"],
+    status_code=201,
+    response_model=pydantic_models.UploadSessionOut,
+)
+videos_router.add_api_route(
+    "/uploads/{session_id}", get_upload_offset, methods=["HEAD"]
+)
+videos_router.add_api_route(
+    "/uploads/{session_id}", append_upload_chunk, methods=["PATCH"], status_code=204
+)
+videos_router.add_api_route(
+    "/uploads/{session_id}/finalize",
+    finalize_upload,
+    methods=["POST"],
+    response_model=pydantic_models.VideoOut,
+)
+
 videos_router.add_api_route("/search", search_videos, methods=["GET"])
+videos_router.add_api_route("/suggest", suggest_videos, methods=["GET"])
 videos_router.add_api_route("/view", update_view, methods=["POST"])
 
 videos_router.add_api_route(
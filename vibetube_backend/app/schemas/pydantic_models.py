@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field
 from typing import Optional
 from datetime import datetime
 
@@ -14,6 +14,7 @@ class UserLogin(BaseModel):
 class UserOut(BaseModel):
     id : int
     profile_image : Optional[str] = None
+    avatar_variants : Optional[dict[str, str]] = None
     channel_description : Optional[str] = None
     created_at : datetime
 
@@ -31,6 +32,7 @@ class UserInVideo(BaseModel):
     id: int
     username: str
     profile_image: Optional[str] = None 
+    avatar_variants: Optional[dict[str, str]] = None
 
     class Config:
         orm_mode = True
@@ -40,9 +42,15 @@ class VideoOut(VideoCreate):
     user_id: int
     video_url: str
     thumbnail_url: str
+    thumbnail_variants: Optional[dict[str, str]] = None
     views: int
     created_at: datetime
     duration: str
+    duration_seconds: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    hls_url: Optional[str] = None
+    processing_status: Optional[str] = None
     owner: UserInVideo
     class Config:
         orm_mode = True
@@ -60,9 +68,14 @@ class SubscribeToggle(BaseModel):
 class ViewIncrement(BaseModel):
     video_id: int
 
+class EngagementBatch(BaseModel):
+    video_ids: list[int] = Field(default_factory=list, max_length=100)
+    channel_ids: list[int] = Field(default_factory=list, max_length=100)
+
 class CommentCreate(BaseModel):
     video_id: int
     text: str
+    parent_id: Optional[int] = None
 
 
 class CommentUserOut(BaseModel):
@@ -75,13 +88,28 @@ class CommentUserOut(BaseModel):
 class CommentOut(BaseModel):
     id: int
     video_id: int
+    parent_id: Optional[int] = None
     text: str
+    reply_count: int = 0
     created_at: datetime
     user: CommentUserOut 
 
     class Config:
         orm_mode = True
 
+class UploadSessionCreate(BaseModel):
+    filename: str
+    content_type: str
+    length: int = Field(gt=0)
+
+class UploadSessionOut(BaseModel):
+    id: str
+    length: int
+    upload_offset: int
+
+    class Config:
+        orm_mode = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
\ No newline at end of file
@@ -0,0 +1,57 @@
+import threading
+from typing import Callable
+
+
+class PeriodicWorker:
+    """
+    Runs `task` on a daemon thread every `interval` seconds until stopped.
+    The first run happens as soon as the worker starts, `wake()` triggers an
+    early run and `run_on_stop` gives the task one last run during shutdown.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        task: Callable[[], None],
+        run_on_stop: bool = False,
+    ):
+        self.name = name
+        self.interval = interval
+        self.task = task
+        self.run_on_stop = run_on_stop
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+
+    def _run_task(self):
+        try:
+            self.task()
+        except Exception as e:
+            # a failed run must not kill the worker, the next tick retries
+            print(f"Warning: background task '{self.name}' failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._run_task()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+        if self.run_on_stop:
+            self._run_task()
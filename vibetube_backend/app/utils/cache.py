@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Callable
+import redis
+from app.constants.app_constants import (
+    CACHE_SIZE,
+    CACHE_TTL_SECONDS,
+    REDIS_URL,
+    CACHE_KEY_PREFIX,
+    CACHE_REDIS_TIMEOUT_SECONDS,
+)
+
+# embedded in every cached response that shows a channel's name or avatar
+PROFILES_TAG = "profiles"
+# a tag version outlives every entry stamped with an older version, so an
+# expired (reset) version can't make an old entry valid again
+TAG_TTL_SECONDS = 2 * CACHE_TTL_SECONDS
+
+
+class LocalCache:
+    """Thread-safe LRU whose entries also expire after their TTL."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+class TaggedCache:
+    """
+    Read-through cache for JSON-ready responses. Each entry is stamped with
+    the versions of its tags when it was loaded; invalidating a tag bumps
+    its version, so every entry carrying it stops matching without having
+    to be found and deleted.
+
+    Entries live in a per-process LRU and, when a shared client is given,
+    in Redis as well. Tag versions then live in Redis too, so an
+    invalidation reaches every process before its local copies are served.
+    """
+
+    def __init__(self, size: int, shared: redis.Redis | None = None):
+        self.local = LocalCache(size)
+        self.shared = shared
+        self._lock = threading.Lock()
+        self._versions: dict[str, int] = {}  # only used without a shared tier
+        self._stats: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"local_hits": 0, "shared_hits": 0, "misses": 0, "errors": 0}
+        )
+
+    def _count(self, key: str, outcome: str):
+        # keys are "<namespace>:...", e.g. "video:12"
+        namespace = key.split(":", 1)[0]
+        with self._lock:
+            self._stats[namespace][outcome] += 1
+
+    def tag_versions(self, tags: list[str]) -> list[int]:
+        if self.shared is None:
+            with self._lock:
+                return [self._versions.get(tag, 0) for tag in tags]
+        values = self.shared.mget([CACHE_KEY_PREFIX + "tag:" + tag for tag in tags])
+        return [int(value or 0) for value in values]
+
+    def cached(
+        self,
+        key: str,
+        tags: list[str],
+        load: Callable[[], Any],
+        ttl: float = CACHE_TTL_SECONDS,
+    ) -> Any:
+        """
+        Returns the entry for `key`, calling `load` on a miss. The value
+        must be made of JSON types and must not be modified by the caller.
+        Exceptions from `load` propagate and nothing is cached.
+        """
+        ttl = min(ttl, CACHE_TTL_SECONDS)
+        try:
+            # read before loading: an invalidation racing the load then
+            # leaves the new entry already stale instead of hiding the write
+            versions = self.tag_versions(tags)
+        except redis.RedisError as e:
+            self._count(key, "errors")
+            print(f"Warning: Cache unavailable, reading through: {e}")
+            return load()
+
+        entry = self.local.get(key)
+        if entry is not None and entry[0] == versions:
+            self._count(key, "local_hits")
+            return entry[1]
+
+        if self.shared is not None:
+            entry_key = CACHE_KEY_PREFIX + "entry:" + key
+            try:
+                raw, remaining_ms = (
+                    self.shared.pipeline(transaction=False)
+                    .get(entry_key)
+                    .pttl(entry_key)
+                    .execute()
+                )
+            except redis.RedisError:
+                self._count(key, "errors")
+                raw = None
+            if raw is not None:
+                stored_versions, value = json.loads(raw)
+                if stored_versions == versions and remaining_ms > 0:
+                    self.local.set(key, (versions, value), remaining_ms / 1000)
+                    self._count(key, "shared_hits")
+                    return value
+
+        self._count(key, "misses")
+        value = load()
+        self.local.set(key, (versions, value), ttl)
+        if self.shared is not None:
+            try:
+                self.shared.set(
+                    CACHE_KEY_PREFIX + "entry:" + key,
+                    json.dumps([versions, value], separators=(",", ":")),
+                    ex=max(1, int(ttl)),
+                )
+            except redis.RedisError:
+                self._count(key, "errors")
+        return value
+
+    def invalidate(self, *tags: str):
+        """Makes every entry carrying any of `tags` stale, in all processes."""
+        if self.shared is None:
+            with self._lock:
+                for tag in tags:
+                    self._versions[tag] = self._versions.get(tag, 0) + 1
+            return
+
+        pipeline = self.shared.pipeline(transaction=False)
+        for tag in tags:
+            pipeline.incr(CACHE_KEY_PREFIX + "tag:" + tag)
+            pipeline.expire(CACHE_KEY_PREFIX + "tag:" + tag, TAG_TTL_SECONDS)
+        try:
+            pipeline.execute()
+        except redis.RedisError as e:
+            # entries already cached stay until their TTL runs out
+            print(f"Warning: Failed to invalidate cache tags {tags}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            namespaces = {name: dict(counts) for name, counts in self._stats.items()}
+
+        def with_ratio(counts: dict) -> dict:
+            hits = counts["local_hits"] + counts["shared_hits"]
+            lookups = hits + counts["misses"]
+            return {**counts, "hit_ratio": round(hits / lookups, 4) if lookups else 0}
+
+        totals = defaultdict(int)
+        for counts in namespaces.values():
+            for outcome, count in counts.items():
+                totals[outcome] += count
+        return {
+            "shared_tier": self.shared is not None,
+            "local_entries": len(self.local),
+            "total": with_ratio(
+                {
+                    "local_hits": totals["local_hits"],
+                    "shared_hits": totals["shared_hits"],
+                    "misses": totals["misses"],
+                    "errors": totals["errors"],
+                }
+            ),
+            "namespaces": {
+                name: with_ratio(counts) for name, counts in sorted(namespaces.items())
+            },
+        }
+
+
+def create_shared_client() -> redis.Redis | None:
+    if not REDIS_URL:
+        return None
+    # the pool is thread-safe; controllers call the cache from FastAPI's threadpool
+    return redis.Redis.from_url(
+        REDIS_URL,
+        socket_timeout=CACHE_REDIS_TIMEOUT_SECONDS,
+        socket_connect_timeout=CACHE_REDIS_TIMEOUT_SECONDS,
+        health_check_interval=30,
+    )
+
+
+response_cache = TaggedCache(CACHE_SIZE, create_shared_client())
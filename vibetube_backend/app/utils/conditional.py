@@ -0,0 +1,64 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from starlette.requests import Request
+from starlette.responses import Response
+
+# stored copies must be revalidated, which is what makes the 304s useful
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def as_utc(stamp: datetime) -> datetime:
+    # SQLite hands back naive timestamps, which func.now() writes in UTC
+    if stamp.tzinfo is None:
+        return stamp.replace(tzinfo=timezone.utc)
+    return stamp.astimezone(timezone.utc)
+
+
+class Validators:
+    """
+    ETag and Last-Modified of a response, derived from version stamps that
+    are cheap to read (row timestamps and counters maintained on write), so
+    they can be checked before the response itself is built.
+    """
+
+    def __init__(self, kind: str, *stamps):
+        digest = hashlib.blake2b(repr((kind, *stamps)).encode(), digest_size=12)
+        self.etag = f'W/"{digest.hexdigest()}"'
+        times = [as_utc(stamp) for stamp in stamps if isinstance(stamp, datetime)]
+        self.last_modified = max(times) if times else None
+
+    @property
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def matches(self, request: Request) -> bool:
+        """Whether the client's copy is current, per RFC 9110 section 13.2.2."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # weak comparison: W/ prefixes are ignored on both sides
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or self.etag.removeprefix("W/") in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since is None or self.last_modified is None:
+            return False
+        try:
+            since = as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second precision
+        return self.last_modified.replace(microsecond=0) <= since
+
+    def respond(self, request: Request, response: Response) -> Response | None:
+        """
+        Puts the validators on `response` and returns a 304 to send instead
+        when the client's copy is current, None when the body is needed.
+        """
+        if self.matches(request):
+            return Response(status_code=304, headers=self.headers)
+        response.headers.update(self.headers)
+        return None
@@ -0,0 +1,104 @@
+from sqlalchemy import func, select, true, update
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models import database_models
+from app.constants.app_constants import CHANNEL_STATS_RECONCILE_SECONDS
+from app.utils.background import PeriodicWorker
+from app.utils.upserts import upsert_insert
+
+
+def recount_like_counters(db: Session):
+    """Recomputes the denormalized like / dislike counters from `likes`."""
+    Like = database_models.Like
+    Video = database_models.Video
+
+    def count_of(reaction: str):
+        return (
+            select(func.count())
+            .where(Like.video_id == Video.id, Like.type == reaction)
+            .scalar_subquery()
+        )
+
+    db.execute(
+        update(Video).values(
+            like_count=count_of("like"), dislike_count=count_of("dislike")
+        ),
+        execution_options={"synchronize_session": False},
+    )
+
+
+def bump_channel_stats(db: Session, deltas: list[dict]):
+    """
+    Applies {"channel_id", "total_videos", "total_views", "total_subscribers"}
+    increments as upserts, creating a channel's row on its first change.
+    Runs inside the caller's transaction.
+    """
+    if not deltas:
+        return
+    ChannelStats = database_models.ChannelStats
+    counters = ("total_videos", "total_views", "total_subscribers")
+
+    rows = [
+        {"channel_id": delta["channel_id"], **{c: delta.get(c, 0) for c in counters}}
+        for delta in deltas
+    ]
+    stmt = upsert_insert(db, ChannelStats)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChannelStats.channel_id],
+        set_={
+            **{
+                c: getattr(ChannelStats, c) + getattr(stmt.excluded, c)
+                for c in counters
+            },
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt, rows)
+
+
+def reconcile_channel_stats(db: Session):
+    """Recomputes every channel's totals from the source tables to undo drift."""
+    User = database_models.User
+    Video = database_models.Video
+    View = database_models.View
+    Subscription = database_models.Subscription
+    ChannelStats = database_models.ChannelStats
+
+    totals = select(
+        User.id,
+        select(func.count(Video.id)).where(Video.user_id == User.id).scalar_subquery(),
+        select(func.count(View.id))
+        .join(Video, View.video_id == Video.id)
+        .where(Video.user_id == User.id)
+        .scalar_subquery(),
+        select(func.count(Subscription.id))
+        .where(Subscription.channel_id == User.id)
+        .scalar_subquery(),
+    ).where(true())
+    stmt = upsert_insert(db, ChannelStats).from_select(
+        ["channel_id", "total_videos", "total_views", "total_subscribers"], totals
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ChannelStats.channel_id],
+        set_={
+            "total_videos": stmt.excluded.total_videos,
+            "total_views": stmt.excluded.total_views,
+            "total_subscribers": stmt.excluded.total_subscribers,
+            "updated_at": func.now(),
+        },
+    )
+    db.execute(stmt)
+    db.commit()
+
+
+def reconcile_channel_stats_job():
+    db = SessionLocal()
+    try:
+        reconcile_channel_stats(db)
+    finally:
+        db.close()
+
+
+channel_stats_worker = PeriodicWorker(
+    "channel-stats", CHANNEL_STATS_RECONCILE_SECONDS, reconcile_channel_stats_job
+)
@@ -0,0 +1,316 @@
+import mimetypes
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from email.utils import formatdate, parsedate
+from pathlib import Path
+import anyio
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.constants.app_constants import FILE_HANDLE_CACHE_SIZE, STREAM_CHUNK_SIZE
+
+# uploads are stored under fresh uuid names and never rewritten in place
+IMMUTABLE_NAME = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(_\d+)?\.\w+$"
+)
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+MAX_RANGES = 16  # more than this in one request and the whole file is sent
+
+
+class OpenFile:
+    """An open read-only file plus the validators computed when it was opened."""
+
+    def __init__(self, path: Path):
+        self.file = open(path, "rb", buffering=0)
+        stat = os.fstat(self.file.fileno())
+        self.inode = stat.st_ino
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content_type = (
+            mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        )
+        self.users = 0
+        self.evicted = False
+
+    def not_modified(self, request_headers: Headers) -> bool:
+        """Whether the client's copy is current, judged as StaticFiles did."""
+        if if_none_match := request_headers.get("if-none-match"):
+            if if_none_match.strip() == "*":
+                return True
+            tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+            return self.etag in tags
+
+        if_modified_since = request_headers.get("if-modified-since")
+        if not if_modified_since:
+            return False
+        since = parsedate(if_modified_since)
+        return since is not None and parsedate(self.last_modified) <= since
+
+    def read(self, offset: int, length: int) -> bytes:
+        # pread leaves the shared file position alone, so concurrent
+        # responses can read the same descriptor
+        return os.pread(self.file.fileno(), length, offset)
+
+
+class FileHandleCache:
+    """
+    LRU of open descriptors for the most recently streamed files, so a
+    player seeking through a video doesn't reopen it for every range. An
+    evicted file is closed once the last response using it has finished.
+    """
+
+    def __init__(self, size: int = FILE_HANDLE_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Path, OpenFile] = OrderedDict()
+
+    def acquire(self, path: Path) -> OpenFile:
+        stat = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and (
+                entry.inode != stat.st_ino or entry.mtime_ns != stat.st_mtime_ns
+            ):
+                self._evict(path)
+                entry = None
+            if entry is None:
+                entry = OpenFile(path)
+                self._entries[path] = entry
+                while len(self._entries) > self.size:
+                    self._evict(next(iter(self._entries)))
+            self._entries.move_to_end(path)
+            entry.users += 1
+            return entry
+
+    def release(self, entry: OpenFile):
+        with self._lock:
+            entry.users -= 1
+            if entry.evicted and entry.users == 0:
+                entry.file.close()
+
+    def _evict(self, path: Path):
+        entry = self._entries.pop(path)
+        entry.evicted = True
+        if entry.users == 0:
+            entry.file.close()
+
+
+file_handles = FileHandleCache()
+
+
+def parse_ranges(header: str, size: int) -> list[tuple[int, int]] | None:
+    """
+    [start, end) byte ranges of a Range header, sorted and merged. None
+    means the header should be ignored and the whole file sent; a header
+    with no satisfiable range raises 416.
+    """
+    unit, _, specs = header.partition("=")
+    if unit.strip().lower() != "bytes":
+        return None
+
+    ranges = []
+    for spec in specs.split(","):
+        first, dash, last = spec.strip().partition("-")
+        if not dash:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) + 1 if last else size
+                if last and end <= start:
+                    return None
+            else:
+                start, end = max(size - int(last), 0), size
+        except ValueError:
+            return None
+        # ranges starting past the end (or "-0") can't be satisfied
+        if start < size and end > start:
+            ranges.append((start, min(end, size)))
+
+    if not ranges:
+        raise HTTPException(
+            status_code=416, headers={"Content-Range": f"bytes */{size}"}
+        )
+    if len(ranges) > MAX_RANGES:
+        return None
+
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeFileResponse(Response):
+    """
+    Serves a file from the handle cache, honouring single and multi range
+    requests. Bodies go out with the server's zero-copy send extensions
+    when it offers them, otherwise in STREAM_CHUNK_SIZE preads.
+    """
+
+    def __init__(self, request: Request, entry: OpenFile, immutable: bool):
+        self.entry = entry
+        self.send_body = request.method != "HEAD"
+        self.ranges = None
+        self.boundary = None
+        self.parts: list[tuple[bytes, int, int]] = []
+        headers = {"accept-ranges": "bytes", **validator_headers(entry, immutable)}
+
+        range_header = request.headers.get("range")
+        if_range = request.headers.get("if-range")
+        # a stale If-Range means the client's partial copy is outdated
+        if range_header and if_range in (None, entry.etag, entry.last_modified):
+            try:
+                self.ranges = parse_ranges(range_header, entry.size)
+            except HTTPException:
+                file_handles.release(entry)
+                raise
+
+        if self.ranges is None:
+            status_code = 200
+            media_type = entry.content_type
+            self.parts = [(b"", 0, entry.size)]
+        elif len(self.ranges) == 1:
+            status_code = 206
+            media_type = entry.content_type
+            start, end = self.ranges[0]
+            headers["content-range"] = f"bytes {start}-{end - 1}/{entry.size}"
+            self.parts = [(b"", start, end)]
+        else:
+            status_code = 206
+            self.boundary = uuid.uuid4().hex
+            media_type = f"multipart/byteranges; boundary={self.boundary}"
+            self.parts = [
+                (
+                    (
+                        f"--{self.boundary}\r\n"
+                        f"Content-Type: {entry.content_type}\r\n"
+                        f"Content-Range: bytes {start}-{end - 1}/{entry.size}\r\n\r\n"
+                    ).encode("latin-1"),
+                    start,
+                    end,
+                )
+                for start, end in self.ranges
+            ]
+
+        super().__init__(
+            status_code=status_code, headers=headers, media_type=media_type
+        )
+        length = sum(len(head) + end - start for head, start, end in self.parts)
+        if self.boundary:
+            length += len(self.parts) * 2 + len(self.closing)
+        self.headers["content-length"] = str(length)
+
+    @property
+    def closing(self) -> bytes:
+        return f"--{self.boundary}--\r\n".encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if not self.send_body:
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            extensions = scope.get("extensions", {})
+            if self.ranges is None and "http.response.pathsend" in extensions:
+                await send(
+                    {"type": "http.response.pathsend", "path": self.entry.file.name}
+                )
+                return
+
+            for head, start, end in self.parts:
+                if head:
+                    await send(
+                        {"type": "http.response.body", "body": head, "more_body": True}
+                    )
+                await self.send_range(send, extensions, start, end)
+                if self.boundary:
+                    await send(
+                        {
+                            "type": "http.response.body",
+                            "body": b"\r\n",
+                            "more_body": True,
+                        }
+                    )
+            await send(
+                {
+                    "type": "http.response.body",
+                    "body": self.closing if self.boundary else b"",
+                }
+            )
+        except OSError:
+            # the client went away mid-transfer, e.g. a player seeking on
+            pass
+        finally:
+            file_handles.release(self.entry)
+
+    async def send_range(self, send: Send, extensions: dict, start: int, end: int):
+        if "http.response.zerocopysend" in extensions:
+            await send(
+                {
+                    "type": "http.response.zerocopysend",
+                    "file": self.entry.file,
+                    "offset": start,
+                    "count": end - start,
+                    "more_body": True,
+                }
+            )
+            return
+
+        offset = start
+        while offset < end:
+            chunk = await anyio.to_thread.run_sync(
+                self.entry.read, offset, min(STREAM_CHUNK_SIZE, end - offset)
+            )
+            if not chunk:
+                # the file shrank under us; the announced length can't be met
+                raise OSError("File truncated while streaming")
+            offset += len(chunk)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+
+
+def validator_headers(entry: OpenFile, immutable: bool) -> dict[str, str]:
+    return {
+        "etag": entry.etag,
+        "last-modified": entry.last_modified,
+        "cache-control": (
+            IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL
+        ),
+    }
+
+
+async def stream_file(request: Request, directory: Path, filename: str) -> Response:
+    # path parameters can't contain "/", this keeps out "." and ".." too
+    if filename.startswith(".") or os.sep in filename:
+        raise HTTPException(status_code=404, detail="File not found")
+    try:
+        # stat and open block, keep them off the event loop
+        entry = await anyio.to_thread.run_sync(
+            file_handles.acquire, directory / filename
+        )
+    except (FileNotFoundError, IsADirectoryError):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    immutable = bool(IMMUTABLE_NAME.match(filename))
+    # checked before Range, a current copy needs no part of the body
+    if entry.not_modified(request.headers):
+        file_handles.release(entry)
+        return Response(status_code=304, headers=validator_headers(entry, immutable))
+    return RangeFileResponse(request, entry, immutable)
@@ -0,0 +1,124 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from PIL import Image, features
+from fastapi.concurrency import run_in_threadpool
+from app.constants.app_constants import (
+    THUMB_WIDTH,
+    THUMB_HEIGHT,
+    THUMB_QUALITY,
+    THUMB_VARIANT_WIDTHS,
+    AVATAR_VARIANT_SIZES,
+    AVATAR_QUALITY,
+    IMAGE_FORMAT,
+    IMAGE_WORKERS,
+)
+
+IMAGE_TYPES = {"WEBP": (".webp", "image/webp"), "AVIF": (".avif", "image/avif")}
+
+if IMAGE_FORMAT in IMAGE_TYPES and features.check(IMAGE_FORMAT.lower()):
+    OUTPUT_FORMAT = IMAGE_FORMAT
+else:
+    print(f"Warning: {IMAGE_FORMAT} images are not supported, using WEBP")
+    OUTPUT_FORMAT = "WEBP"
+IMAGE_EXTENSION, IMAGE_CONTENT_TYPE = IMAGE_TYPES[OUTPUT_FORMAT]
+
+
+def downscale(img: Image.Image, size: tuple[int, int]) -> Image.Image:
+    """
+    Resizes to exactly `size`. reduce() first box-averages whole pixel
+    blocks, which is far cheaper than resampling the full image, and
+    leaves at least 2x for the LANCZOS pass to keep it sharp.
+    """
+    factor = min(img.width // size[0], img.height // size[1]) // 2
+    if factor > 1:
+        img = img.reduce(factor)
+    return img.resize(size, Image.LANCZOS)
+
+
+def fit_within(img: Image.Image, box: tuple[int, int]) -> tuple[int, int]:
+    """Largest size with the image's aspect ratio inside box, never upscaled."""
+    scale = min(box[0] / img.width, box[1] / img.height, 1)
+    return max(1, round(img.width * scale)), max(1, round(img.height * scale))
+
+
+def crop_square(img: Image.Image) -> Image.Image:
+    side = min(img.width, img.height)
+    left = (img.width - side) // 2
+    top = (img.height - side) // 2
+    return img.crop((left, top, left + side, top + side))
+
+
+def render_variants(
+    content: bytes, boxes: list[tuple[int, int]], square: bool, quality: int
+) -> list[bytes]:
+    """
+    Decodes the image once and encodes one OUTPUT_FORMAT image per box,
+    largest first so each variant is scaled from the previous one. Runs in
+    the image pool's worker processes.
+    """
+    img = Image.open(BytesIO(content))
+    # JPEGs are decoded straight at 1/2, 1/4 or 1/8 scale when that's enough
+    img.draft("RGB", max(boxes))
+    if img.mode != "RGB":
+        img = img.convert("RGB")
+    if square:
+        img = crop_square(img)
+
+    encoded = {}
+    for box in sorted(boxes, reverse=True):
+        img = downscale(img, box if square else fit_within(img, box))
+        buffer = BytesIO()
+        img.save(buffer, format=OUTPUT_FORMAT, quality=quality)
+        encoded[box] = buffer.getvalue()
+    return [encoded[box] for box in boxes]
+
+
+class ImagePool:
+    """
+    Process pool for Pillow work, which holds the GIL and would otherwise
+    stall the event loop or every threadpool request in this worker.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self):
+        # spawn, as forking would copy the app's running threads and locks
+        self._executor = ProcessPoolExecutor(
+            self.workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def stop(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            # outside the app lifespan, e.g. in scripts
+            return await run_in_threadpool(fn, *args)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, fn, *args
+        )
+
+
+image_pool = ImagePool(IMAGE_WORKERS)
+
+
+async def thumbnail_variants(content: bytes) -> dict[int, bytes]:
+    """Encoded thumbnails keyed by width, each fitting a 16:9 box."""
+    boxes = [
+        (width, width * THUMB_HEIGHT // THUMB_WIDTH) for width in THUMB_VARIANT_WIDTHS
+    ]
+    images = await image_pool.run(render_variants, content, boxes, False, THUMB_QUALITY)
+    return dict(zip(THUMB_VARIANT_WIDTHS, images))
+
+
+async def avatar_variants(content: bytes) -> dict[int, bytes]:
+    """Encoded square avatars keyed by side length."""
+    boxes = [(size, size) for size in AVATAR_VARIANT_SIZES]
+    images = await image_pool.run(render_variants, content, boxes, True, AVATAR_QUALITY)
+    return dict(zip(AVATAR_VARIANT_SIZES, images))
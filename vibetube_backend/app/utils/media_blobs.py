@@ -0,0 +1,142 @@
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import and_, delete, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.config.http_client import run_on_app_loop
+from app.models import database_models
+from app.constants.app_constants import MEDIA_BLOB_GC_SECONDS, MEDIA_BLOB_GRACE_SECONDS
+from app.utils.background import PeriodicWorker
+from app.utils.storage import get_backend
+
+
+def match_blob(
+    db: Session, content_hash: str, backend: str
+) -> database_models.MediaBlob | None:
+    """
+    The blob already holding these bytes in `backend`, if any. Matching
+    restarts its grace period, so collect_unused_blobs can't delete it
+    before the upload that found it takes its reference.
+    """
+    MediaBlob = database_models.MediaBlob
+    return db.execute(
+        update(MediaBlob)
+        .where(MediaBlob.content_hash == content_hash, MediaBlob.backend == backend)
+        .values(updated_at=func.now())
+        .returning(MediaBlob)
+    ).scalar_one_or_none()
+
+
+def claim_blob(
+    db: Session,
+    content_hash: str,
+    kind: str,
+    backend: str,
+    object_name: str,
+    url: str,
+    size: int,
+    variants: dict | None = None,
+) -> database_models.MediaBlob:
+    """
+    Takes a reference on the blob for `content_hash`, registering the given
+    object if the hash is new. When a concurrent upload of the same bytes
+    registered first, its object wins; the returned row says which one.
+    """
+    MediaBlob = database_models.MediaBlob
+    return db.execute(
+        pg_insert(MediaBlob)
+        .values(
+            content_hash=content_hash,
+            kind=kind,
+            backend=backend,
+            object_name=object_name,
+            url=url,
+            size=size,
+            variants=variants,
+            ref_count=1,
+        )
+        .on_conflict_do_update(
+            index_elements=[MediaBlob.content_hash, MediaBlob.backend],
+            set_={"ref_count": MediaBlob.ref_count + 1, "updated_at": func.now()},
+        )
+        .returning(MediaBlob)
+    ).scalar_one()
+
+
+def ready_renditions(db: Session, content_hash: str, video_url: str) -> str | None:
+    """HLS playlist already built for a video stored in the same blob, if any."""
+    Video = database_models.Video
+    return db.scalar(
+        select(Video.hls_url)
+        .where(
+            Video.content_hash == content_hash,
+            Video.video_url == video_url,
+            Video.processing_status == "ready",
+        )
+        .limit(1)
+    )
+
+
+def collect_unused_blobs(db: Session):
+    """
+    Recounts references from the videos table, which also catches videos
+    removed by a cascade, then deletes blobs that have been unreferenced for
+    MEDIA_BLOB_GRACE_SECONDS together with their stored objects.
+    """
+    MediaBlob = database_models.MediaBlob
+    Video = database_models.Video
+
+    # the url tells apart the blobs of the same bytes on different backends
+    refs = (
+        select(func.count())
+        .where(
+            or_(
+                and_(
+                    Video.content_hash == MediaBlob.content_hash,
+                    Video.video_url == MediaBlob.url,
+                ),
+                and_(
+                    Video.thumbnail_hash == MediaBlob.content_hash,
+                    Video.thumbnail_url == MediaBlob.url,
+                ),
+            )
+        )
+        .scalar_subquery()
+    )
+    db.execute(
+        update(MediaBlob).where(MediaBlob.ref_count != refs).values(ref_count=refs)
+    )
+    db.commit()
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=MEDIA_BLOB_GRACE_SECONDS)
+    # rows go first: a missing object is worse than an orphaned one
+    unused = defaultdict(list)
+    for backend, object_name, variants in db.execute(
+        delete(MediaBlob)
+        .where(MediaBlob.ref_count == 0, MediaBlob.updated_at < cutoff)
+        .returning(MediaBlob.backend, MediaBlob.object_name, MediaBlob.variants)
+    ):
+        unused[backend].append(object_name)
+        unused[backend].extend(set((variants or {}).values()) - {object_name})
+    db.commit()
+    for backend, object_names in unused.items():
+        try:
+            run_on_app_loop(get_backend(backend).delete(object_names))
+        except Exception as e:
+            print(
+                f"Warning: Failed to remove {len(object_names)} unused media objects: {e}"
+            )
+
+
+def collect_unused_blobs_job():
+    db = SessionLocal()
+    try:
+        collect_unused_blobs(db)
+    finally:
+        db.close()
+
+
+media_blob_worker = PeriodicWorker(
+    "media-blob-gc", MEDIA_BLOB_GC_SECONDS, collect_unused_blobs_job
+)
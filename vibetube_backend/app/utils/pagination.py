@@ -0,0 +1,78 @@
+import base64
+import json
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy import String, literal, tuple_
+from sqlalchemy.orm import Session
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Packs the (created_at, id) of the last row of a page into an opaque token."""
+    payload = json.dumps([created_at.isoformat(), row_id])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Returns the (created_at, id) stored in a cursor made by encode_cursor."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        created_at, row_id = json.loads(payload)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def cursor_key(db: Session, cursor: str) -> tuple:
+    """
+    The (created_at, id) of a cursor as values to compare the key columns
+    with. SQLite compares timestamps as text, and rows stamped by the
+    CURRENT_TIMESTAMP default hold 'YYYY-MM-DD HH:MM:SS' while a bound
+    datetime is written with microseconds, so there a whole-second
+    timestamp is bound in the default's form.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    if db.get_bind().dialect.name == "sqlite" and created_at.microsecond == 0:
+        return literal(created_at.strftime("%Y-%m-%d %H:%M:%S"), String), row_id
+    return created_at, row_id
+
+
+def encode_position_cursor(position: int) -> str:
+    """Cursor carrying a single position in a ranked list, e.g. a trending rank."""
+    payload = json.dumps({"position": position})
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_position_cursor(cursor: str) -> int:
+    try:
+        payload = base64.urlsafe_b64decode(cursor.encode("ascii"))
+        return int(json.loads(payload)["position"])
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(400, "Invalid cursor")
+
+
+def seek_page(
+    query,
+    created_at_col,
+    id_col,
+    cursor: str | None,
+    offset: int,
+    limit: int,
+    newest_first: bool = True,
+):
+    """
+    Orders by (created_at, id) and seeks past the cursor's key when one is
+    given, so deep pages cost the same as the first. Falls back to offset for
+    clients that don't send a cursor yet.
+    """
+    if newest_first:
+        query = query.order_by(created_at_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(created_at_col, id_col)
+
+    if cursor:
+        key = tuple_(created_at_col, id_col)
+        last_key = tuple_(*cursor_key(query.session, cursor))
+        query = query.filter(key < last_key if newest_first else key > last_key)
+    else:
+        query = query.offset(offset)
+    return query.limit(limit)
@@ -0,0 +1,97 @@
+from sqlalchemy import Engine, delete, func, inspect, select, text, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.schema import AddConstraint, CreateColumn
+from sqlalchemy.sql.elements import ClauseElement, TextClause
+from app.models.database_models import Base
+
+
+def upgrade_schema(engine: Engine):
+    """
+    Adds the columns, constraints and indexes the models gained since a table
+    was created. `create_all` only creates missing tables, so a database from
+    an older release is brought up to date here. Every step checks the live
+    schema first, running it again changes nothing.
+    """
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            added = [column for column in table.columns if column.name not in existing]
+            if added:
+                add_columns(conn, table, added)
+
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            uniques = {
+                constraint["name"]
+                for constraint in inspector.get_unique_constraints(table.name)
+            }
+            for constraint in table.constraints:
+                if (
+                    constraint.__visit_name__ == "unique_constraint"
+                    and constraint.name not in uniques | indexes
+                ):
+                    add_unique_constraint(conn, table, constraint)
+            for index in table.indexes:
+                if index.name not in indexes:
+                    index.create(conn)
+
+
+def has_expression_default(column) -> bool:
+    default = column.server_default
+    return (
+        default is not None
+        and isinstance(default.arg, ClauseElement)
+        and not isinstance(default.arg, TextClause)
+    )
+
+
+def add_columns(conn: Connection, table, columns):
+    preparer = conn.dialect.identifier_preparer
+    sqlite = conn.dialect.name == "sqlite"
+    backfill = {}
+    for column in columns:
+        if sqlite and has_expression_default(column):
+            # SQLite only adds columns with constant defaults: add it bare and
+            # fill the existing rows with the default expression instead
+            column_ddl = "%s %s" % (
+                preparer.format_column(column),
+                conn.dialect.type_compiler_instance.process(column.type),
+            )
+            backfill[column.name] = column.server_default.arg
+        else:
+            column_ddl = str(CreateColumn(column).compile(dialect=conn.dialect))
+        if "backfill" in column.info:
+            # the value rows from before the column get, instead of the default
+            backfill[column.name] = column.info["backfill"]
+        conn.execute(
+            text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {column_ddl}")
+        )
+        if not sqlite:
+            for foreign_key in column.foreign_keys:
+                conn.execute(AddConstraint(foreign_key.constraint))
+    if backfill:
+        # after every column exists, an onupdate column may be among them
+        conn.execute(update(table).values(backfill))
+
+
+def add_unique_constraint(conn: Connection, table, constraint):
+    columns = [table.c[column.name] for column in constraint.columns]
+    # rows from before the constraint can collide, keep the latest of each
+    latest = select(func.max(table.c.id)).group_by(*columns)
+    conn.execute(delete(table).where(table.c.id.not_in(latest)))
+    if conn.dialect.name == "sqlite":
+        # SQLite has no ALTER TABLE ... ADD CONSTRAINT, a unique index enforces
+        # the same and ON CONFLICT on the columns resolves against it
+        preparer = conn.dialect.identifier_preparer
+        conn.execute(
+            text(
+                "CREATE UNIQUE INDEX %s ON %s (%s)"
+                % (
+                    preparer.quote(constraint.name),
+                    preparer.format_table(table),
+                    ", ".join(preparer.format_column(column) for column in columns),
+                )
+            )
+        )
+    else:
+        conn.execute(AddConstraint(constraint))
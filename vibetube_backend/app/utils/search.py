@@ -0,0 +1,81 @@
+import re
+from sqlalchemy import func, select, update, literal_column
+from sqlalchemy.orm import Session
+from app.models import database_models
+from app.constants.app_constants import SEARCH_TS_CONFIG
+
+
+def supports_full_text(db: Session) -> bool:
+    """tsvector search is Postgres only, other backends use the ilike path."""
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def build_search_vector(title, username, description):
+    """
+    Weighted tsvector expression: title ranks above the channel name,
+    which ranks above the description.
+    """
+
+    def weighted(text, weight):
+        # the weight is a "char" argument, inline it so no driver types it as varchar
+        return func.setweight(
+            func.to_tsvector(SEARCH_TS_CONFIG, func.coalesce(text, "")),
+            literal_column(f"'{weight}'"),
+        )
+
+    return (
+        weighted(title, "A")
+        .op("||")(weighted(username, "B"))
+        .op("||")(weighted(description, "C"))
+    )
+
+
+def search_vector_for_new_video(db: Session, title, description, user_id: int):
+    """Value for Video.search_vector on insert, evaluated inside the INSERT."""
+    if not supports_full_text(db):
+        return None
+    username = (
+        select(database_models.User.username)
+        .where(database_models.User.id == user_id)
+        .scalar_subquery()
+    )
+    return build_search_vector(title, username, description)
+
+
+def refresh_search_vectors(
+    db: Session, user_id: int | None = None, only_missing: bool = False
+):
+    """
+    Rebuilds stored search vectors from the current titles and usernames.
+    Scope it to one channel after a rename, or to rows that were never indexed.
+    """
+    if not supports_full_text(db):
+        return
+
+    Video = database_models.Video
+    User = database_models.User
+    stmt = (
+        update(Video)
+        .where(Video.user_id == User.id)
+        .values(
+            search_vector=build_search_vector(
+                Video.title, User.username, Video.description
+            )
+        )
+    )
+    if user_id is not None:
+        stmt = stmt.where(Video.user_id == user_id)
+    if only_missing:
+        stmt = stmt.where(Video.search_vector.is_(None))
+    db.execute(stmt, execution_options={"synchronize_session": False})
+
+
+def build_search_query(query: str):
+    """
+    Turns free text into a prefix tsquery ("lofi beats" -> "lofi:* & beats:*"),
+    so partially typed words still match. Returns None if nothing is searchable.
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    return func.to_tsquery(SEARCH_TS_CONFIG, " & ".join(f"{t}:*" for t in terms))
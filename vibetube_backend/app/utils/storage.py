@@ -0,0 +1,507 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote, unquote
+from xml.etree import ElementTree
+import anyio
+import httpx
+from app.config.http_client import http_client
+from app.constants.supabase_constants import SUPABASE_URL, SUPABASE_KEY, BUCKET_NAME
+from app.constants.app_constants import (
+    STORAGE_BACKEND,
+    STORAGE_RETRIES,
+    STORAGE_RETRY_BACKOFF_SECONDS,
+    LOCAL_STORAGE_DIR,
+    LOCAL_STORAGE_URL,
+    S3_ENDPOINT_URL,
+    S3_BUCKET,
+    S3_REGION,
+    S3_ACCESS_KEY_ID,
+    S3_SECRET_ACCESS_KEY,
+    S3_PUBLIC_URL,
+)
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# raised before any byte of the request went out, so even a request that
+# creates something can be sent again
+NOT_SENT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class StorageError(Exception):
+    pass
+
+
+async def with_retries(
+    send: Callable[[], Awaitable[httpx.Response]],
+    idempotent: bool = True,
+) -> httpx.Response:
+    """
+    Sends a request, retrying connection errors and transient statuses with
+    exponential backoff. Raises for any final error status. A request that
+    is not idempotent is only retried when it never reached the server.
+    """
+    retried_errors = httpx.TransportError if idempotent else NOT_SENT_ERRORS
+    for attempt in range(STORAGE_RETRIES + 1):
+        last_attempt = attempt == STORAGE_RETRIES
+        try:
+            response = await send()
+        except retried_errors:
+            if last_attempt:
+                raise
+        else:
+            if (
+                response.status_code not in RETRY_STATUSES
+                or not idempotent
+                or last_attempt
+            ):
+                return response.raise_for_status()
+        await asyncio.sleep(STORAGE_RETRY_BACKOFF_SECONDS * 2**attempt)
+
+
+class StorageBackend(ABC):
+    """
+    Where uploaded media is kept. Object names are "/"-separated paths such
+    as "videos/<uuid>.mp4"; every backend serves them from public_url().
+    """
+
+    name: str
+
+    @abstractmethod
+    async def put(
+        self,
+        object_name: str,
+        data: bytes,
+        content_type: str,
+        cache_control: str | None = None,
+    ): ...
+
+    @abstractmethod
+    async def put_stream(
+        self,
+        object_name: str,
+        chunks: AsyncIterator[bytes],
+        size: int,
+        content_type: str,
+    ) -> int:
+        """
+        Stores an object from UPLOAD_CHUNK_SIZE chunks without holding it in
+        memory and returns its size. Nothing is left behind if it fails.
+        """
+        ...
+
+    @abstractmethod
+    async def delete(self, object_names: list[str]): ...
+
+    @abstractmethod
+    def public_url(self, object_name: str) -> str: ...
+
+    def object_for_url(self, url: str) -> str | None:
+        """Object name behind a public URL of this backend, None for others."""
+        prefix = self.public_url("")
+        return unquote(url[len(prefix) :]) if url.startswith(prefix) else None
+
+
+class LocalStorage(StorageBackend):
+    """Files under storage/ on this machine, served by the app itself."""
+
+    name = "local"
+
+    def __init__(self, root: Path, base_url: str):
+        self.root = root
+        self.base_url = base_url
+
+    def path(self, object_name: str) -> anyio.Path:
+        path = (self.root / object_name).resolve()
+        if not path.is_relative_to(self.root.resolve()):
+            raise ValueError(f"Invalid object name: {object_name}")
+        return anyio.Path(path)
+
+    async def put(self, object_name, data, content_type, cache_control=None):
+        path = self.path(object_name)
+        await path.parent.mkdir(parents=True, exist_ok=True)
+        await path.write_bytes(data)
+
+    async def put_stream(self, object_name, chunks, size, content_type):
+        path = self.path(object_name)
+        await path.parent.mkdir(parents=True, exist_ok=True)
+        written = 0
+        try:
+            async with await anyio.open_file(path, "wb") as target:
+                async for chunk in chunks:
+                    await target.write(chunk)
+                    written += len(chunk)
+        except BaseException:
+            await path.unlink(missing_ok=True)
+            raise
+        return written
+
+    async def delete(self, object_names):
+        for object_name in object_names:
+            await self.path(object_name).unlink(missing_ok=True)
+
+    def public_url(self, object_name):
+        return f"{self.base_url}/{quote(object_name)}"
+
+
+class ResumableUpload:
+    """Client side of a Supabase (tus protocol) resumable upload."""
+
+    def __init__(self, storage: "SupabaseStorage", object_name: str, content_type: str):
+        self.storage = storage
+        self.object_name = object_name
+        self.content_type = content_type
+        self.location: str | None = None
+        self.offset = 0
+
+    def headers(self, **extra) -> dict:
+        return {**self.storage.auth_headers, "Tus-Resumable": "1.0.0", **extra}
+
+    async def create(self, length: int):
+        metadata = {
+            "bucketName": self.storage.bucket,
+            "objectName": self.object_name,
+            "contentType": self.content_type,
+        }
+        response = await with_retries(
+            lambda: http_client.post(
+                f"{self.storage.api_url}/upload/resumable",
+                headers=self.headers(
+                    **{
+                        "Upload-Length": str(length),
+                        "Upload-Metadata": ",".join(
+                            f"{key} {base64.b64encode(value.encode()).decode()}"
+                            for key, value in metadata.items()
+                        ),
+                    }
+                ),
+            ),
+            # every POST starts a new upload; a repeat would orphan the first
+            idempotent=False,
+        )
+        self.location = response.headers["Location"]
+
+    async def send(self, chunk: bytes):
+        for attempt in range(STORAGE_RETRIES + 1):
+            try:
+                response = await http_client.patch(
+                    self.location,
+                    content=chunk,
+                    headers=self.headers(
+                        **{
+                            "Upload-Offset": str(self.offset),
+                            "Content-Type": "application/offset+octet-stream",
+                        }
+                    ),
+                )
+                if response.status_code not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    self.offset = int(response.headers["Upload-Offset"])
+                    return
+            except httpx.TransportError:
+                pass
+            if attempt == STORAGE_RETRIES:
+                raise StorageError(f"Upload of {self.object_name} kept failing")
+            await asyncio.sleep(STORAGE_RETRY_BACKOFF_SECONDS * 2**attempt)
+
+            # the chunk may have been stored before the error; ask the server
+            response = await with_retries(
+                lambda: http_client.head(self.location, headers=self.headers())
+            )
+            offset = int(response.headers["Upload-Offset"])
+            if offset == self.offset + len(chunk):
+                self.offset = offset
+                return
+            if offset != self.offset:
+                raise StorageError(f"Upload of {self.object_name} lost its offset")
+
+    async def abort(self):
+        if self.location is None:
+            return
+        try:
+            await http_client.delete(self.location, headers=self.headers())
+        except httpx.HTTPError as e:
+            print(f"Warning: Failed to abort upload of {self.object_name}: {e}")
+
+
+class SupabaseStorage(StorageBackend):
+    """A Supabase Storage bucket, over its REST and tus endpoints."""
+
+    name = "supabase"
+
+    def __init__(self, url: str, key: str, bucket: str):
+        self.api_url = f"{url}/storage/v1"
+        self.bucket = bucket
+        self.auth_headers = {"authorization": f"Bearer {key}", "apikey": key}
+
+    async def put(self, object_name, data, content_type, cache_control=None):
+        headers = {**self.auth_headers, "content-type": content_type}
+        if cache_control:
+            headers["cache-control"] = cache_control
+        await with_retries(
+            lambda: http_client.post(
+                f"{self.api_url}/object/{quote(self.bucket)}/{quote(object_name)}",
+                content=data,
+                # upsert, so a retry after a lost response doesn't conflict
+                headers={**headers, "x-upsert": "true"},
+            )
+        )
+
+    async def put_stream(self, object_name, chunks, size, content_type):
+        upload = ResumableUpload(self, object_name, content_type)
+        try:
+            await upload.create(size)
+            async for chunk in chunks:
+                await upload.send(chunk)
+        except BaseException:
+            await upload.abort()
+            raise
+        return upload.offset
+
+    async def delete(self, object_names):
+        await with_retries(
+            lambda: http_client.request(
+                "DELETE",
+                f"{self.api_url}/object/{quote(self.bucket)}",
+                json={"prefixes": object_names},
+                headers=self.auth_headers,
+            )
+        )
+
+    def public_url(self, object_name):
+        return f"{self.api_url}/object/public/{quote(self.bucket)}/{quote(object_name)}"
+
+
+class S3Storage(StorageBackend):
+    """
+    An S3-compatible bucket (AWS, MinIO, R2...) addressed path-style, with
+    requests signed by AWS Signature Version 4. Large objects go up as
+    multipart uploads, one part per chunk.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        region: str,
+        access_key_id: str,
+        secret_access_key: str,
+        public_url: str | None = None,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.public_base_url = (
+            public_url or f"{self.endpoint_url}/{quote(bucket)}"
+        ).rstrip("/")
+
+    def signed_request(
+        self,
+        method: str,
+        object_name: str = "",
+        params: dict | None = None,
+        content: bytes = b"",
+        headers: dict | None = None,
+    ) -> Awaitable[httpx.Response]:
+        path = f"/{quote(self.bucket)}"
+        if object_name:
+            path += f"/{quote(object_name)}"
+        url = httpx.URL(f"{self.endpoint_url}{path}", params=params or {})
+
+        now = datetime.now(timezone.utc)
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        headers = {
+            **{key.lower(): value for key, value in (headers or {}).items()},
+            "host": url.netloc.decode("ascii"),
+            "x-amz-date": amz_date,
+            # the body is sent over TLS, so it isn't hashed into the signature
+            "x-amz-content-sha256": "UNSIGNED-PAYLOAD",
+        }
+        signed_headers = ";".join(sorted(headers))
+        canonical_request = "\n".join(
+            [
+                method,
+                path,
+                "&".join(
+                    f"{quote(key, safe='-_.~')}={quote(value, safe='-_.~')}"
+                    for key, value in sorted((params or {}).items())
+                ),
+                "".join(f"{key}:{headers[key].strip()}\n" for key in sorted(headers)),
+                signed_headers,
+                "UNSIGNED-PAYLOAD",
+            ]
+        )
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                amz_date,
+                scope,
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+        key = f"AWS4{self.secret_access_key}".encode()
+        for part in (amz_date[:8], self.region, "s3", "aws4_request"):
+            key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        return http_client.request(method, url, content=content, headers=headers)
+
+    async def put(self, object_name, data, content_type, cache_control=None):
+        headers = {"content-type": content_type}
+        if cache_control:
+            headers["cache-control"] = cache_control
+        await with_retries(
+            lambda: self.signed_request(
+                "PUT", object_name, content=data, headers=headers
+            )
+        )
+
+    async def put_stream(self, object_name, chunks, size, content_type):
+        first = await anext(chunks, b"")
+        second = await anext(chunks, None)
+        if second is None:
+            # fits in one part, a plain PUT is cheaper than a multipart upload
+            await self.put(object_name, first, content_type)
+            return len(first)
+
+        response = await with_retries(
+            lambda: self.signed_request(
+                "POST",
+                object_name,
+                params={"uploads": ""},
+                headers={"content-type": content_type},
+            ),
+            idempotent=False,
+        )
+        upload_id = xml_text(response.content, "UploadId")
+        parts = []
+        try:
+            async for chunk in prepend(chunks, first, second):
+                number = len(parts) + 1
+                response = await with_retries(
+                    lambda: self.signed_request(
+                        "PUT",
+                        object_name,
+                        params={"partNumber": str(number), "uploadId": upload_id},
+                        content=chunk,
+                    )
+                )
+                parts.append((number, response.headers["etag"], len(chunk)))
+
+            body = "".join(
+                f"<Part><PartNumber>{number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for number, etag, _ in parts
+            )
+            response = await with_retries(
+                lambda: self.signed_request(
+                    "POST",
+                    object_name,
+                    params={"uploadId": upload_id},
+                    content=(
+                        f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>"
+                    ).encode(),
+                )
+            )
+            # completion errors can arrive with a 200 status
+            if b"<Error>" in response.content:
+                raise StorageError(f"Multipart upload of {object_name} failed")
+        except BaseException:
+            try:
+                await self.signed_request(
+                    "DELETE", object_name, params={"uploadId": upload_id}
+                )
+            except httpx.HTTPError as e:
+                print(f"Warning: Failed to abort upload of {object_name}: {e}")
+            raise
+        return sum(length for _, _, length in parts)
+
+    async def delete(self, object_names):
+        # DeleteObjects takes at most 1000 keys per request
+        for start in range(0, len(object_names), 1000):
+            body = (
+                "<Delete><Quiet>true</Quiet>"
+                + "".join(
+                    f"<Object><Key>{escape_xml(name)}</Key></Object>"
+                    for name in object_names[start : start + 1000]
+                )
+                + "</Delete>"
+            ).encode()
+            md5 = base64.b64encode(hashlib.md5(body).digest()).decode()
+            await with_retries(
+                lambda: self.signed_request(
+                    "POST",
+                    params={"delete": ""},
+                    content=body,
+                    headers={"content-md5": md5, "content-type": "application/xml"},
+                )
+            )
+
+    def public_url(self, object_name):
+        return f"{self.public_base_url}/{quote(object_name)}"
+
+
+async def prepend(chunks: AsyncIterator[bytes], *first: bytes):
+    """Yields the chunks already taken off `chunks`, then the rest of it."""
+    for chunk in first:
+        yield chunk
+    async for chunk in chunks:
+        yield chunk
+
+
+def xml_text(document: bytes, tag: str) -> str:
+    for element in ElementTree.fromstring(document).iter():
+        if element.tag.rsplit("}", 1)[-1] == tag:
+            return element.text
+    raise StorageError(f"No {tag} in storage response")
+
+
+def escape_xml(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def create_backend(name: str) -> StorageBackend:
+    if name == "local":
+        return LocalStorage(LOCAL_STORAGE_DIR, LOCAL_STORAGE_URL)
+    if name == "supabase":
+        return SupabaseStorage(SUPABASE_URL, SUPABASE_KEY, BUCKET_NAME)
+    if name == "s3":
+        if not all(
+            (S3_ENDPOINT_URL, S3_BUCKET, S3_ACCESS_KEY_ID, S3_SECRET_ACCESS_KEY)
+        ):
+            raise ValueError("S3 environment variables are missing")
+        return S3Storage(
+            S3_ENDPOINT_URL,
+            S3_BUCKET,
+            S3_REGION,
+            S3_ACCESS_KEY_ID,
+            S3_SECRET_ACCESS_KEY,
+            S3_PUBLIC_URL,
+        )
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+_backends: dict[str, StorageBackend] = {}
+
+
+def get_backend(name: str) -> StorageBackend:
+    """The backend called `name`, e.g. to delete objects stored before a switch."""
+    if name not in _backends:
+        _backends[name] = create_backend(name)
+    return _backends[name]
+
+
+# where new uploads go
+storage = get_backend(STORAGE_BACKEND)
+local_storage = get_backend("local")
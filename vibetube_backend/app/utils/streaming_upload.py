@@ -0,0 +1,65 @@
+import hashlib
+from dataclasses import dataclass
+from fastapi import UploadFile
+from app.constants.app_constants import UPLOAD_CHUNK_SIZE
+from app.utils.storage import StorageBackend
+from app.utils.videos import MediaInfo, StreamingProbe, probe_cache
+
+
+@dataclass
+class StreamedUpload:
+    object_name: str
+    size: int
+    media: MediaInfo
+
+
+async def hash_upload(file: UploadFile) -> str:
+    """
+    sha256 of an upload, read from the copy the server has already spooled
+    to disk. The file is rewound, so it can still be streamed afterwards.
+    """
+    digest = hashlib.sha256()
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+async def stream_to_storage(
+    storage: StorageBackend,
+    file: UploadFile,
+    object_name: str,
+    content_type: str,
+    content_hash: str,
+) -> StreamedUpload:
+    """
+    Pipes an upload to storage one UPLOAD_CHUNK_SIZE chunk at a time,
+    probing it on the way, so memory use is one chunk. The object is
+    dropped if anything fails, including a file ffprobe can't read.
+    """
+    probe = StreamingProbe()
+
+    async def chunks():
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await probe.feed(chunk)
+            yield chunk
+
+    try:
+        await probe.start()
+        size = await storage.put_stream(object_name, chunks(), file.size, content_type)
+    except BaseException:
+        probe.kill()
+        raise
+
+    try:
+        media = await probe.result()
+    except BaseException:
+        await storage.delete([object_name])
+        raise
+
+    # piped containers often don't report an overall bit rate
+    if media.bit_rate is None and media.duration_seconds:
+        media.bit_rate = int(size * 8 / media.duration_seconds)
+    probe_cache.put(content_hash, media)
+
+    return StreamedUpload(object_name=object_name, size=size, media=media)
@@ -0,0 +1,213 @@
+import heapq
+import threading
+from bisect import bisect_left, insort
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models import database_models
+from app.constants.app_constants import (
+    SUGGEST_MAX_RESULTS,
+    SUGGEST_SCAN_LIMIT,
+    SEARCH_INDEX_REFRESH_SECONDS,
+)
+from app.utils.background import PeriodicWorker
+
+# sorts after every character, bounding the entries that start with a prefix
+LAST_CHAR = "\U0010ffff"
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+class SuggestIndex:
+    """
+    Sorted array of (normalized text, kind, display text) entries weighted by
+    views. A prefix maps to a contiguous slice found with bisect. Every
+    prefix matching more than SUGGEST_SCAN_LIMIT entries has its top-k
+    precomputed on rebuild and kept up to date on every change, so a lookup
+    never ranks more than SUGGEST_SCAN_LIMIT entries however many match.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._keys: list[tuple[str, str, str]] = []
+        self._weights: dict[tuple[str, str, str], int] = {}
+        self._channel_keys: dict[int, tuple[str, str, str]] = {}
+        self._top_cache: dict[str, list[tuple[str, str, str]]] = {}
+
+    def _rank(self, key: tuple[str, str, str]):
+        return (-self._weights[key], key)
+
+    def _top_of(self, keys) -> list[tuple[str, str, str]]:
+        return heapq.nsmallest(SUGGEST_MAX_RESULTS, keys, key=self._rank)
+
+    def _range(self, prefix: str, lo: int = 0, hi: int | None = None):
+        """[start, end) of the entries starting with `prefix`."""
+        hi = len(self._keys) if hi is None else hi
+        start = bisect_left(self._keys, (prefix,), lo, hi)
+        return start, bisect_left(self._keys, (prefix + LAST_CHAR,), start, hi)
+
+    def _children(self, prefix: str, start: int, end: int):
+        """
+        Splits the entries of a prefix into the ones equal to it and the
+        one-character-longer prefixes, with their ranges.
+        """
+        depth = len(prefix)
+        pos = start
+        # entries equal to the prefix sort first
+        while pos < end and len(self._keys[pos][0]) == depth:
+            pos += 1
+        exact = self._keys[start:pos]
+        children = []
+        while pos < end:
+            child = self._keys[pos][0][: depth + 1]
+            child_start, child_end = self._range(child, pos, end)
+            children.append((child, child_start, child_end))
+            pos = child_end
+        return exact, children
+
+    def _compute_top(self, prefix: str, start: int, end: int):
+        # merged from the children, whose own tops are used when they have one
+        candidates, children = self._children(prefix, start, end)
+        for child, child_start, child_end in children:
+            top = self._top_cache.get(child)
+            candidates.extend(
+                top if top is not None else self._keys[child_start:child_end]
+            )
+        return self._top_of(candidates)
+
+    def _warm_cache(self):
+        self._top_cache = {}
+        heavy = []
+        pending = [("", 0, len(self._keys))]
+        while pending:
+            prefix, start, end = pending.pop()
+            if end - start <= SUGGEST_SCAN_LIMIT:
+                continue
+            heavy.append((prefix, start, end))
+            pending.extend(self._children(prefix, start, end)[1])
+        # longest first, so every prefix is merged from its children's tops
+        for prefix, start, end in sorted(heavy, key=lambda item: -len(item[0])):
+            self._top_cache[prefix] = self._compute_top(prefix, start, end)
+
+    def _put(self, key: tuple[str, str, str], weight: int):
+        if weight < self._weights.get(key, weight):
+            # whatever ranks next may now outrank it, find that out on removal
+            self._remove(key)
+        if key not in self._weights:
+            insort(self._keys, key)
+        self._weights[key] = weight
+        text = key[0]
+        for depth in range(len(text) + 1):
+            prefix = text[:depth]
+            top = self._top_cache.get(prefix)
+            if top is None:
+                start, end = self._range(prefix)
+                if end - start <= SUGGEST_SCAN_LIMIT:
+                    # longer prefixes match no more entries than this one
+                    break
+                self._top_cache[prefix] = self._compute_top(prefix, start, end)
+                continue
+            if key not in top:
+                top.append(key)
+            top.sort(key=self._rank)
+            del top[SUGGEST_MAX_RESULTS:]
+
+    def _remove(self, key: tuple[str, str, str]):
+        if key not in self._weights:
+            return
+        del self._keys[bisect_left(self._keys, key)]
+        del self._weights[key]
+        text = key[0]
+        # longest first, a parent is recomputed from its children's tops
+        for depth in range(len(text), -1, -1):
+            prefix = text[:depth]
+            top = self._top_cache.get(prefix)
+            if top is None:
+                continue
+            start, end = self._range(prefix)
+            if end - start <= SUGGEST_SCAN_LIMIT:
+                del self._top_cache[prefix]
+            elif key in top:
+                self._top_cache[prefix] = self._compute_top(prefix, start, end)
+
+    def add_title(self, title: str, views: int = 0):
+        key = (normalize(title), "title", title)
+        with self._lock:
+            self._put(key, max(views, self._weights.get(key, 0)))
+
+    def set_channel(self, user_id: int, username: str):
+        """Adds or renames a channel, keeping its popularity weight."""
+        key = (normalize(username), "channel", username)
+        with self._lock:
+            old_key = self._channel_keys.get(user_id)
+            weight = self._weights.get(old_key, 0) if old_key else 0
+            if old_key and old_key != key:
+                self._remove(old_key)
+            self._put(key, weight)
+            self._channel_keys[user_id] = key
+
+    def rebuild(self, titles, channels):
+        """Replaces the index from (title, views) and (user_id, username, views) rows."""
+        weights = {}
+        for title, views in titles:
+            key = (normalize(title), "title", title)
+            weights[key] = max(views or 0, weights.get(key, 0))
+        channel_keys = {}
+        for user_id, username, views in channels:
+            key = (normalize(username), "channel", username)
+            weights[key] = views or 0
+            channel_keys[user_id] = key
+        fresh = SuggestIndex()
+        fresh._keys = sorted(weights)
+        fresh._weights = weights
+        fresh._channel_keys = channel_keys
+        fresh._warm_cache()
+
+        with self._lock:
+            self._keys = fresh._keys
+            self._weights = fresh._weights
+            self._channel_keys = fresh._channel_keys
+            self._top_cache = fresh._top_cache
+
+    def suggest(self, prefix: str, limit: int = SUGGEST_MAX_RESULTS) -> list[dict]:
+        prefix = normalize(prefix)
+        with self._lock:
+            top = self._top_cache.get(prefix)
+            if top is None:
+                # at most SUGGEST_SCAN_LIMIT entries, larger slices are cached
+                start, end = self._range(prefix)
+                top = self._top_of(self._keys[start:end])
+        return [{"text": key[2], "type": key[1]} for key in top[:limit]]
+
+
+def load_suggest_index(db: Session, index: SuggestIndex):
+    titles = db.query(database_models.Video.title, database_models.Video.views).all()
+    channels = (
+        db.query(
+            database_models.User.id,
+            database_models.User.username,
+            func.coalesce(func.sum(database_models.Video.views), 0),
+        )
+        .outerjoin(database_models.User.videos)
+        .group_by(database_models.User.id, database_models.User.username)
+        .all()
+    )
+    index.rebuild(titles, channels)
+
+
+suggest_index = SuggestIndex()
+
+
+def refresh_suggest_index_job():
+    db = SessionLocal()
+    try:
+        load_suggest_index(db, suggest_index)
+    finally:
+        db.close()
+
+
+suggest_index_worker = PeriodicWorker(
+    "suggest-index", SEARCH_INDEX_REFRESH_SECONDS, refresh_suggest_index_job
+)
@@ -0,0 +1,214 @@
+from sqlalchemy import delete, func, literal, select, true, tuple_, union, update
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models import database_models
+from app.constants.app_constants import (
+    FANOUT_INTERVAL_SECONDS,
+    FANOUT_BATCH_SIZE,
+    FANOUT_MAX_SUBSCRIBERS,
+    FANOUT_BACKFILL_VIDEOS,
+)
+from app.utils.background import PeriodicWorker
+from app.utils.pagination import cursor_key
+from app.utils.upserts import upsert_insert
+
+
+def is_large_channel(db: Session, channel_id: int) -> bool:
+    subscribers = db.scalar(
+        select(database_models.ChannelStats.total_subscribers).where(
+            database_models.ChannelStats.channel_id == channel_id
+        )
+    )
+    return (subscribers or 0) > FANOUT_MAX_SUBSCRIBERS
+
+
+def push_to_timelines(db: Session, video: database_models.Video):
+    """
+    Copies the video into every subscriber's timeline, FANOUT_BATCH_SIZE
+    subscribers per statement, in the caller's transaction. Inserts are
+    idempotent, so a retried run does no harm.
+    """
+    Subscription = database_models.Subscription
+    Video = database_models.Video
+    last_id = 0
+    while True:
+        batch_end = db.scalar(
+            select(func.max(Subscription.id)).select_from(
+                select(Subscription.id)
+                .where(
+                    Subscription.channel_id == video.user_id,
+                    Subscription.id > last_id,
+                )
+                .order_by(Subscription.id)
+                .limit(FANOUT_BATCH_SIZE)
+                .subquery()
+            )
+        )
+        if batch_end is None:
+            return
+
+        # created_at is copied as the database stores it, SQLite keeps the
+        # text of a timestamp and the feed compares it with the video's own
+        db.execute(
+            upsert_insert(db, database_models.TimelineEntry)
+            .from_select(
+                ["user_id", "video_id", "channel_id", "created_at"],
+                select(
+                    Subscription.user_id, Video.id, Video.user_id, Video.created_at
+                ).where(
+                    Video.id == video.id,
+                    Subscription.channel_id == video.user_id,
+                    Subscription.id > last_id,
+                    Subscription.id <= batch_end,
+                ),
+            )
+            .on_conflict_do_nothing()
+        )
+        last_id = batch_end
+
+
+def fan_out_pending(db: Session):
+    """
+    Pushes videos that have not been fanned out yet. The `fanned_out` flag
+    makes the videos table itself the work queue, so nothing is lost if the
+    process dies between upload and fan-out. Every process runs this worker;
+    videos are claimed one at a time with SKIP LOCKED, so the workers share
+    the queue instead of all pushing the same videos.
+    """
+    Video = database_models.Video
+    while True:
+        video = db.scalars(
+            select(Video)
+            .where(Video.fanned_out.is_(False))
+            .order_by(Video.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        ).first()
+        if video is None:
+            db.commit()
+            return
+
+        # large channels are pulled at read time instead
+        pull_only = is_large_channel(db, video.user_id)
+        if not pull_only:
+            push_to_timelines(db, video)
+        db.execute(
+            update(Video)
+            .where(Video.id == video.id)
+            .values(fanned_out=True, pull_only=pull_only)
+        )
+        db.commit()
+
+
+def backfill_timeline(db: Session, user_id: int, channel_id: int):
+    """Copies a channel's recent videos into a new subscriber's timeline."""
+    Video = database_models.Video
+    recent = (
+        select(Video.id, Video.user_id, Video.created_at)
+        .where(Video.user_id == channel_id)
+        .order_by(Video.created_at.desc())
+        .limit(FANOUT_BACKFILL_VIDEOS)
+        .subquery()
+    )
+    db.execute(
+        upsert_insert(db, database_models.TimelineEntry)
+        .from_select(
+            ["user_id", "video_id", "channel_id", "created_at"],
+            select(
+                literal(user_id), recent.c.id, recent.c.user_id, recent.c.created_at
+            ).where(true()),
+        )
+        .on_conflict_do_nothing()
+    )
+
+
+def backfill_timelines(db: Session):
+    """
+    Backfills every subscription that has nothing in its timeline yet. For
+    databases from before timelines, whose videos are marked as fanned out
+    when the column is added rather than pushed to every subscriber.
+    """
+    Subscription = database_models.Subscription
+    TimelineEntry = database_models.TimelineEntry
+    empty = db.execute(
+        select(Subscription.user_id, Subscription.channel_id).where(
+            ~select(TimelineEntry.video_id)
+            .where(
+                TimelineEntry.user_id == Subscription.user_id,
+                TimelineEntry.channel_id == Subscription.channel_id,
+            )
+            .exists()
+        )
+    ).all()
+    for user_id, channel_id in empty:
+        backfill_timeline(db, user_id, channel_id)
+
+
+def drop_from_timeline(db: Session, user_id: int, channel_id: int):
+    db.execute(
+        delete(database_models.TimelineEntry).where(
+            database_models.TimelineEntry.user_id == user_id,
+            database_models.TimelineEntry.channel_id == channel_id,
+        )
+    )
+
+
+def subscription_feed_ids(
+    db: Session, user_id: int, cursor: str | None, offset: int, limit: int
+) -> list[tuple]:
+    """
+    (created_at, video_id) keys of one feed page, newest first: the pushed
+    timeline rows merged with the pull-only videos of subscribed channels.
+    Both sides are index range scans limited to one page.
+    """
+    TimelineEntry = database_models.TimelineEntry
+    Video = database_models.Video
+
+    subscribed = select(database_models.Subscription.channel_id).where(
+        database_models.Subscription.user_id == user_id
+    )
+
+    pushed = select(
+        TimelineEntry.created_at.label("created_at"),
+        TimelineEntry.video_id.label("id"),
+    ).where(TimelineEntry.user_id == user_id)
+    # by the flag set at fan-out, not the channel's current size, so nothing
+    # falls between the two sides when a channel shrinks below the threshold
+    pulled = select(Video.created_at.label("created_at"), Video.id.label("id")).where(
+        Video.pull_only.is_(True), Video.user_id.in_(subscribed)
+    )
+
+    # each side is cut to the deepest row the page could need before merging
+    depth = limit if cursor else offset + limit
+    sides = []
+    for side, created_at_col, id_col in (
+        (pushed, TimelineEntry.created_at, TimelineEntry.video_id),
+        (pulled, Video.created_at, Video.id),
+    ):
+        if cursor:
+            side = side.where(
+                tuple_(created_at_col, id_col) < tuple_(*cursor_key(db, cursor))
+            )
+        sides.append(
+            side.order_by(created_at_col.desc(), id_col.desc()).limit(depth).subquery()
+        )
+
+    # a backfilled pull-only video is on both sides
+    merged = union(*(select(side.c.created_at, side.c.id) for side in sides)).subquery()
+    return db.execute(
+        select(merged.c.created_at, merged.c.id)
+        .order_by(merged.c.created_at.desc(), merged.c.id.desc())
+        .offset(0 if cursor else offset)
+        .limit(limit)
+    ).all()
+
+
+def fan_out_job():
+    db = SessionLocal()
+    try:
+        fan_out_pending(db)
+    finally:
+        db.close()
+
+
+fanout_worker = PeriodicWorker("fan-out", FANOUT_INTERVAL_SECONDS, fan_out_job)
@@ -0,0 +1,386 @@
+import asyncio
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from collections.abc import Callable
+from pathlib import Path
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.config.http_client import run_on_app_loop
+from app.models import database_models
+from app.constants.app_constants import (
+    HLS_DIR,
+    HLS_LADDER,
+    HLS_SEGMENT_SECONDS,
+    TRANSCODE_WORKERS,
+    TRANSCODE_POLL_SECONDS,
+    TRANSCODE_MAX_ATTEMPTS,
+    TRANSCODE_STALE_SECONDS,
+)
+from app.utils.background import PeriodicWorker
+from app.utils.videos import MediaInfo, probe_media
+from app.utils.storage import storage, local_storage
+from app.utils.cache import response_cache
+
+PROGRESS_INTERVAL_SECONDS = 5
+HLS_CONTENT_TYPES = {".m3u8": "application/vnd.apple.mpegurl", ".ts": "video/mp2t"}
+HLS_UPLOAD_CONCURRENCY = 8  # segments read into memory and in flight at once
+
+
+class TranscodeCancelled(Exception):
+    pass
+
+
+def local_source(video_url: str) -> str | None:
+    """Path of a locally stored upload, None for videos in a bucket."""
+    object_name = local_storage.object_for_url(video_url)
+    return str(local_storage.path(object_name)) if object_name else None
+
+
+def ladder_for(height: int) -> list[tuple[int, int]]:
+    rungs = [rung for rung in HLS_LADDER if rung[0] <= height]
+    # sources below the lowest rung get a single rendition at their own size
+    return rungs or [(height - height % 2, HLS_LADDER[0][1])]
+
+
+def hls_command(
+    source: str,
+    out_dir: Path,
+    rungs: list[tuple[int, int]],
+    has_audio: bool,
+    threads: int,
+) -> list[str]:
+    """
+    One ffmpeg run that decodes the source once and encodes every rung,
+    with keyframes forced on segment boundaries so players can switch
+    renditions between any two segments.
+    """
+    count = len(rungs)
+    filters = [f"[0:v]split={count}" + "".join(f"[v{i}]" for i in range(count))]
+    filters += [
+        f"[v{i}]scale=-2:{height}[v{i}out]" for i, (height, _) in enumerate(rungs)
+    ]
+
+    command = ["ffmpeg", "-y", "-v", "error", "-nostats", "-progress", "pipe:1"]
+    command += ["-i", source, "-threads", str(threads)]
+    command += ["-filter_complex", ";".join(filters)]
+    stream_map = []
+    for i, (height, kbps) in enumerate(rungs):
+        command += ["-map", f"[v{i}out]"]
+        command += [f"-c:v:{i}", "libx264", f"-b:v:{i}", f"{kbps}k"]
+        command += [f"-maxrate:v:{i}", f"{kbps}k", f"-bufsize:v:{i}", f"{kbps * 2}k"]
+        if has_audio:
+            command += ["-map", "a:0"]
+        stream_map.append(
+            f"v:{i},a:{i},name:{height}p" if has_audio else f"v:{i},name:{height}p"
+        )
+    # 4:2:0 is the only chroma layout every HLS player can decode
+    command += ["-pix_fmt", "yuv420p", "-preset", "veryfast", "-sc_threshold", "0"]
+    command += ["-force_key_frames", f"expr:gte(t,n_forced*{HLS_SEGMENT_SECONDS})"]
+    if has_audio:
+        command += ["-c:a", "aac", "-b:a", "128k", "-ac", "2"]
+    command += [
+        "-f",
+        "hls",
+        "-hls_time",
+        str(HLS_SEGMENT_SECONDS),
+        "-hls_playlist_type",
+        "vod",
+        "-hls_segment_filename",
+        str(out_dir / "%v" / "segment_%04d.ts"),
+        "-master_pl_name",
+        "master.m3u8",
+        "-var_stream_map",
+        " ".join(stream_map),
+        str(out_dir / "%v" / "index.m3u8"),
+    ]
+    return command
+
+
+async def upload_renditions(video_id: int, out_dir: Path):
+    slots = asyncio.Semaphore(HLS_UPLOAD_CONCURRENCY)
+
+    async def upload(path: Path):
+        async with slots:
+            await storage.put(
+                f"hls/{video_id}/{path.relative_to(out_dir).as_posix()}",
+                await asyncio.to_thread(path.read_bytes),
+                HLS_CONTENT_TYPES.get(path.suffix, "application/octet-stream"),
+            )
+
+    await asyncio.gather(
+        *(upload(path) for path in sorted(out_dir.rglob("*")) if path.is_file())
+    )
+
+
+def publish_renditions(
+    video: database_models.Video,
+    out_dir: Path,
+    heartbeat: Callable[[], None] | None = None,
+) -> str:
+    """
+    Returns the master playlist URL. Renditions of local videos, or of any
+    video when storage is local, are already in place under storage/hls.
+    Otherwise they are uploaded, calling heartbeat every
+    PROGRESS_INTERVAL_SECONDS until the upload finishes.
+    """
+    master = f"hls/{video.id}/master.m3u8"
+    if local_source(video.video_url) or storage is local_storage:
+        return local_storage.public_url(master)
+
+    # uploads run on the app's event loop, through the pooled client
+    run_on_app_loop(
+        upload_renditions(video.id, out_dir), heartbeat, PROGRESS_INTERVAL_SECONDS
+    )
+    shutil.rmtree(out_dir, ignore_errors=True)
+    return storage.public_url(master)
+
+
+def invalidate_video(video_id: int, category: str | None, user_id: int):
+    # every cached response showing the video's processing_status and hls_url
+    response_cache.invalidate(
+        f"video:{video_id}",
+        f"feed:{category}",
+        "feed:trending",
+        f"videos:{user_id}",
+        "search",
+    )
+
+
+class TranscodePool:
+    """
+    TRANSCODE_WORKERS threads, each draining `transcode_jobs` one job at a
+    time. The pool size is capped at the number of cores and each ffmpeg
+    gets an equal share of them. Jobs are claimed with SKIP LOCKED, so
+    several app processes can share the queue, and a job whose heartbeat
+    stops for TRANSCODE_STALE_SECONDS is picked up again.
+    """
+
+    def __init__(self, size: int = TRANSCODE_WORKERS):
+        self.threads_per_job = max(1, (os.cpu_count() or 1) // size)
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: set[subprocess.Popen] = set()
+        self._workers = [
+            PeriodicWorker(f"transcode-{i}", TRANSCODE_POLL_SECONDS, self.drain)
+            for i in range(size)
+        ]
+
+    # ---------------- queue ----------------
+
+    def _fail_dead_jobs(self, db: Session):
+        Job = database_models.TranscodeJob
+        stale = datetime.now(timezone.utc) - timedelta(seconds=TRANSCODE_STALE_SECONDS)
+        dead = db.scalars(
+            update(Job)
+            .where(
+                Job.status == "running",
+                Job.updated_at < stale,
+                Job.attempts >= TRANSCODE_MAX_ATTEMPTS,
+            )
+            .values(status="failed", error="Worker stopped responding")
+            .returning(Job.video_id)
+        ).all()
+        if dead:
+            db.execute(
+                update(database_models.Video)
+                .where(database_models.Video.id.in_(dead))
+                .values(processing_status="failed")
+            )
+        db.commit()
+
+    def _claim(self, db: Session):
+        Job = database_models.TranscodeJob
+        stale = datetime.now(timezone.utc) - timedelta(seconds=TRANSCODE_STALE_SECONDS)
+        next_job = (
+            select(Job.id)
+            .where(
+                or_(
+                    Job.status == "queued",
+                    and_(Job.status == "running", Job.updated_at < stale),
+                ),
+                Job.attempts < TRANSCODE_MAX_ATTEMPTS,
+            )
+            .order_by(Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        job = db.execute(
+            update(Job)
+            .where(Job.id == next_job)
+            .values(
+                status="running",
+                attempts=Job.attempts + 1,
+                progress=0.0,
+                updated_at=func.now(),
+            )
+            .returning(Job.id, Job.video_id, Job.attempts)
+        ).first()
+        db.commit()
+        return job
+
+    # ---------------- transcoding ----------------
+
+    def _run_ffmpeg(self, command: list[str], duration: float, report):
+        process = subprocess.Popen(
+            command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+        )
+        with self._lock:
+            self._processes.add(process)
+        output_tail = deque(maxlen=20)
+        last_report = time.monotonic()
+        try:
+            for line in process.stdout:
+                key, _, value = line.strip().partition("=")
+                if key == "out_time_us" and value.isdigit():
+                    if time.monotonic() - last_report >= PROGRESS_INTERVAL_SECONDS:
+                        report(min(int(value) / 1_000_000 / duration, 0.99))
+                        last_report = time.monotonic()
+                elif not value:
+                    output_tail.append(line.strip())
+            process.wait()
+        finally:
+            with self._lock:
+                self._processes.discard(process)
+        if process.returncode != 0:
+            if self._stopping.is_set():
+                raise TranscodeCancelled()
+            raise RuntimeError("ffmpeg failed: " + " ".join(output_tail))
+
+    def _transcode(self, db: Session, job_id: int, video_id: int):
+        Job = database_models.TranscodeJob
+        Video = database_models.Video
+        video = db.get(Video, video_id)
+        video.processing_status = "processing"
+        db.commit()
+        invalidate_video(video_id, video.category, video.user_id)
+
+        source = local_source(video.video_url) or video.video_url
+        media = MediaInfo.from_video(video)
+        if media is None:
+            # uploaded before media info was stored, probe once and keep it
+            media = probe_media(source)
+            for column, value in media.as_columns().items():
+                setattr(video, column, value)
+            db.commit()
+        if not media.height:
+            raise RuntimeError("Source has no video stream")
+
+        rungs = ladder_for(media.height)
+        out_dir = HLS_DIR / str(video_id)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        for height, _ in rungs:
+            os.makedirs(out_dir / f"{height}p", exist_ok=True)
+
+        def report(progress: float):
+            # also refreshes updated_at, the job's heartbeat
+            db.execute(update(Job).where(Job.id == job_id).values(progress=progress))
+            db.commit()
+
+        def heartbeat():
+            # uploads can outlast TRANSCODE_STALE_SECONDS, keep the job claimed
+            db.execute(
+                update(Job).where(Job.id == job_id).values(updated_at=func.now())
+            )
+            db.commit()
+
+        self._run_ffmpeg(
+            hls_command(
+                source,
+                out_dir,
+                rungs,
+                media.audio_codec is not None,
+                self.threads_per_job,
+            ),
+            max(media.duration_seconds, 1.0),
+            report,
+        )
+
+        video.hls_url = publish_renditions(video, out_dir, heartbeat)
+        video.processing_status = "ready"
+        db.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .values(status="done", progress=1.0, error=None, finished_at=func.now())
+        )
+        db.commit()
+        invalidate_video(video_id, video.category, video.user_id)
+
+    def _give_up_or_retry(self, db: Session, job, error: Exception):
+        Job = database_models.TranscodeJob
+        if isinstance(error, TranscodeCancelled):
+            # shutdown, not the video's fault: don't count the attempt
+            values = {"status": "queued", "attempts": Job.attempts - 1}
+        elif job.attempts >= TRANSCODE_MAX_ATTEMPTS:
+            values = {
+                "status": "failed",
+                "error": str(error),
+                "finished_at": func.now(),
+            }
+        else:
+            values = {"status": "queued", "error": str(error)}
+
+        db.execute(update(Job).where(Job.id == job.id).values(**values))
+        Video = database_models.Video
+        video = db.execute(
+            update(Video)
+            .where(Video.id == job.video_id)
+            .values(
+                processing_status="failed" if values["status"] == "failed" else "queued"
+            )
+            .returning(Video.category, Video.user_id)
+        ).first()
+        db.commit()
+        if video is not None:  # unless it was deleted meanwhile
+            invalidate_video(job.video_id, *video)
+
+    def run_next(self, db: Session) -> bool:
+        """Claims and runs one job, returns False when the queue is empty."""
+        job = self._claim(db)
+        if job is None:
+            return False
+        try:
+            self._transcode(db, job.id, job.video_id)
+        except Exception as e:
+            db.rollback()
+            if not isinstance(e, TranscodeCancelled):
+                print(f"Warning: transcoding video {job.video_id} failed: {e}")
+            self._give_up_or_retry(db, job, e)
+        return True
+
+    def drain(self):
+        db = SessionLocal()
+        try:
+            self._fail_dead_jobs(db)
+            while not self._stopping.is_set() and self.run_next(db):
+                pass
+        finally:
+            db.close()
+
+    # ---------------- lifecycle ----------------
+
+    def start(self):
+        self._stopping.clear()
+        for worker in self._workers:
+            worker.start()
+
+    def wake(self):
+        for worker in self._workers:
+            worker.wake()
+
+    def stop(self):
+        self._stopping.set()
+        with self._lock:
+            for process in self._processes:
+                process.terminate()
+        for worker in self._workers:
+            worker.stop()
+
+
+transcode_pool = TranscodePool()
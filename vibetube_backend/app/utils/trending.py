@@ -0,0 +1,103 @@
+import zlib
+from datetime import datetime, timezone
+from sqlalchemy import func, select, delete, insert
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models import database_models
+from app.constants.app_constants import TRENDING_REFRESH_SECONDS, TRENDING_WINDOW_SIZE
+from app.utils.background import PeriodicWorker
+from app.utils.cache import response_cache
+from app.utils.conditional import as_utc
+
+# Postgres advisory lock held by the process rebuilding the window
+TRENDING_LOCK_KEY = zlib.crc32(b"video_trending")
+
+
+def age_in_hours(db: Session, created_at):
+    """Hours since `created_at`, never negative, in the session's SQL dialect."""
+    if db.get_bind().dialect.name == "sqlite":
+        # timestamps are text there, julianday() reads them as UTC days
+        return func.max(
+            (func.julianday("now") - func.julianday(created_at)) * 24.0, 0.0
+        )
+    current_time = datetime.now(timezone.utc)
+    return func.greatest(func.extract("epoch", current_time - created_at) / 3600.0, 0.0)
+
+
+def claim_refresh(db: Session, min_interval: float) -> bool:
+    """
+    Whether this process should rebuild the window now. On Postgres a
+    transaction-level advisory lock lets one process in at a time and is
+    released by the commit; SQLite runs one write transaction at a time on
+    its own. A window another process rebuilt less than `min_interval`
+    seconds ago is kept.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        locked = db.scalar(select(func.pg_try_advisory_xact_lock(TRENDING_LOCK_KEY)))
+        if not locked:
+            return False
+    refreshed_at = db.scalar(
+        select(func.max(database_models.VideoTrending.refreshed_at))
+    )
+    if refreshed_at is None:
+        return True
+    age = datetime.now(timezone.utc) - as_utc(refreshed_at)
+    return age.total_seconds() >= min_interval
+
+
+def refresh_trending(
+    db: Session,
+    window_size: int = TRENDING_WINDOW_SIZE,
+    min_interval: float = TRENDING_REFRESH_SECONDS / 2,
+) -> bool:
+    """
+    Recomputes trend scores and replaces the ranked window in one transaction,
+    so readers keep seeing the previous ranking until the commit. Every
+    process runs this on its own timer; claim_refresh keeps the rebuilds
+    from overlapping, which would collide on the unique ranks, and from
+    repeating once per process. Returns whether the window was rebuilt.
+    """
+    if not claim_refresh(db, min_interval):
+        db.rollback()
+        return False
+
+    # trend score formula
+    trend_score = database_models.Video.views / func.pow(
+        age_in_hours(db, database_models.Video.created_at) + 2, 1.2
+    )
+
+    ranked = (
+        select(
+            database_models.Video.id,
+            func.row_number().over(order_by=trend_score.desc()),
+            trend_score,
+        )
+        .order_by(trend_score.desc())
+        .limit(window_size)
+    )
+
+    db.execute(delete(database_models.VideoTrending))
+    db.execute(
+        insert(database_models.VideoTrending).from_select(
+            ["video_id", "rank", "score"], ranked
+        )
+    )
+    db.commit()
+    response_cache.invalidate("feed:trending")
+    return True
+
+
+def refresh_trending_job():
+    db = SessionLocal()
+    try:
+        refresh_trending(db)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+trending_worker = PeriodicWorker(
+    "trending", TRENDING_REFRESH_SECONDS, refresh_trending_job
+)
@@ -0,0 +1,221 @@
+import re
+import threading
+from collections import defaultdict
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models import database_models
+from app.constants.app_constants import (
+    SEARCH_TRIGRAM_THRESHOLD,
+    SEARCH_INDEX_REFRESH_SECONDS,
+)
+from app.utils.background import PeriodicWorker
+
+
+def split_words(text: str | None) -> list[str]:
+    return re.findall(r"\w+", (text or "").lower())
+
+
+def word_trigrams(word: str) -> frozenset[str]:
+    """Trigrams of a single word, padded the same way pg_trgm does it."""
+    padded = f"  {word} "
+    return frozenset(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+class TrigramIndex:
+    """
+    In-process, typo tolerant index over video titles and channel names.
+
+    Matching happens at word level: trigram postings lead from a query word
+    to similar vocabulary words, and each vocabulary word lists the titles
+    and channels it appears in. A document scores the average, over the
+    query words, of its best word similarity.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._word_grams: dict[str, frozenset[str]] = {}
+        self._gram_words: dict[str, set[str]] = defaultdict(set)
+        # word -> ids of videos whose title / users whose name contain it
+        self._title_docs: dict[str, set[int]] = defaultdict(set)
+        self._user_docs: dict[str, set[int]] = defaultdict(set)
+        self._video_words: dict[int, set[str]] = {}
+        self._user_words: dict[int, set[str]] = {}
+        self._user_videos: dict[int, set[int]] = defaultdict(set)
+        self._video_owner: dict[int, int] = {}
+        self._views: dict[int, int] = {}
+
+    # ---------------- maintenance ----------------
+
+    def _add_word(self, word: str):
+        if word not in self._word_grams:
+            grams = word_trigrams(word)
+            self._word_grams[word] = grams
+            for gram in grams:
+                self._gram_words[gram].add(word)
+
+    def _drop_word_if_unused(self, word: str):
+        if self._title_docs.get(word) or self._user_docs.get(word):
+            return
+        self._title_docs.pop(word, None)
+        self._user_docs.pop(word, None)
+        for gram in self._word_grams.pop(word, ()):
+            words = self._gram_words[gram]
+            words.discard(word)
+            if not words:
+                del self._gram_words[gram]
+
+    def _index_video(self, video_id: int, user_id: int, title: str, views: int):
+        words = set(split_words(title))
+        for word in words:
+            self._add_word(word)
+            self._title_docs[word].add(video_id)
+        self._video_words[video_id] = words
+        self._video_owner[video_id] = user_id
+        self._user_videos[user_id].add(video_id)
+        self._views[video_id] = views or 0
+
+    def _unindex_video(self, video_id: int):
+        for word in self._video_words.pop(video_id, ()):
+            self._title_docs[word].discard(video_id)
+            self._drop_word_if_unused(word)
+        owner = self._video_owner.pop(video_id, None)
+        if owner is not None:
+            self._user_videos[owner].discard(video_id)
+        self._views.pop(video_id, None)
+
+    def _index_user(self, user_id: int, username: str):
+        for word in self._user_words.pop(user_id, ()):
+            self._user_docs[word].discard(user_id)
+            self._drop_word_if_unused(word)
+        words = set(split_words(username))
+        for word in words:
+            self._add_word(word)
+            self._user_docs[word].add(user_id)
+        self._user_words[user_id] = words
+
+    def add_video(self, video_id: int, user_id: int, title: str, views: int = 0):
+        with self._lock:
+            self._unindex_video(video_id)
+            self._index_video(video_id, user_id, title, views)
+
+    def remove_video(self, video_id: int):
+        with self._lock:
+            self._unindex_video(video_id)
+
+    def set_username(self, user_id: int, username: str):
+        with self._lock:
+            self._index_user(user_id, username)
+
+    def rebuild(self, videos, users):
+        """
+        Replaces the whole index from (id, user_id, title, views) and
+        (id, username) rows. Built aside, so searches never see a partial index.
+        """
+        fresh = TrigramIndex()
+        for video_id, user_id, title, views in videos:
+            fresh._index_video(video_id, user_id, title, views)
+        for user_id, username in users:
+            fresh._index_user(user_id, username)
+        with self._lock:
+            self.__dict__.update(
+                {k: v for k, v in fresh.__dict__.items() if k != "_lock"}
+            )
+
+    # ---------------- lookup ----------------
+
+    def _similar_words(self, query_word: str, threshold: float) -> dict[str, float]:
+        """Vocabulary words whose trigram similarity to query_word reaches threshold."""
+        query_grams = word_trigrams(query_word)
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for word in self._gram_words.get(gram, ()):
+                shared[word] += 1
+
+        similar = {}
+        for word, count in shared.items():
+            union = len(query_grams) + len(self._word_grams[word]) - count
+            score = count / union
+            if score >= threshold:
+                similar[word] = score
+        return similar
+
+    def search(
+        self,
+        query: str,
+        offset: int = 0,
+        limit: int = 12,
+        threshold: float = SEARCH_TRIGRAM_THRESHOLD,
+    ) -> list[int]:
+        """Video ids ranked by similarity, most viewed first on ties."""
+        query_words = list(dict.fromkeys(split_words(query)))
+        if not query_words:
+            return []
+
+        with self._lock:
+            title_scores = defaultdict(float)
+            user_scores = defaultdict(float)
+            for query_word in query_words:
+                best_title = {}
+                best_user = {}
+                for word, score in self._similar_words(query_word, threshold).items():
+                    for video_id in self._title_docs.get(word, ()):
+                        if score > best_title.get(video_id, 0.0):
+                            best_title[video_id] = score
+                    for user_id in self._user_docs.get(word, ()):
+                        if score > best_user.get(user_id, 0.0):
+                            best_user[user_id] = score
+                for video_id, score in best_title.items():
+                    title_scores[video_id] += score
+                for user_id, score in best_user.items():
+                    user_scores[user_id] += score
+
+            scores = {
+                video_id: total / len(query_words)
+                for video_id, total in title_scores.items()
+            }
+            for user_id, total in user_scores.items():
+                score = total / len(query_words)
+                for video_id in self._user_videos.get(user_id, ()):
+                    if score > scores.get(video_id, 0.0):
+                        scores[video_id] = score
+
+            ranked = sorted(
+                (
+                    (video_id, score)
+                    for video_id, score in scores.items()
+                    if score >= threshold
+                ),
+                key=lambda item: (-item[1], -self._views.get(item[0], 0)),
+            )
+        return [video_id for video_id, _ in ranked[offset : offset + limit]]
+
+
+def load_trigram_index(db: Session, index: TrigramIndex):
+    videos = db.query(
+        database_models.Video.id,
+        database_models.Video.user_id,
+        database_models.Video.title,
+        database_models.Video.views,
+    ).all()
+    users = db.query(database_models.User.id, database_models.User.username).all()
+    index.rebuild(videos, users)
+
+
+trigram_index = TrigramIndex()
+
+
+def refresh_trigram_index_job():
+    db = SessionLocal()
+    try:
+        load_trigram_index(db, trigram_index)
+    finally:
+        db.close()
+
+
+# the periodic rebuild refreshes view counts and picks up edits made by other workers
+trigram_index_worker = PeriodicWorker(
+    "trigram-index", SEARCH_INDEX_REFRESH_SECONDS, refresh_trigram_index_job
+)
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models import database_models
+from app.constants.app_constants import (
+    UPLOAD_SESSION_DIR,
+    UPLOAD_SESSION_TTL_SECONDS,
+    UPLOAD_SESSION_GC_SECONDS,
+)
+from app.utils.background import PeriodicWorker
+
+
+def staged_path(session_id: str) -> Path:
+    return UPLOAD_SESSION_DIR / session_id
+
+
+def remove_staged(session_id: str):
+    staged_path(session_id).unlink(missing_ok=True)
+
+
+def collect_abandoned_uploads(db: Session):
+    """
+    Deletes upload sessions that received nothing for
+    UPLOAD_SESSION_TTL_SECONDS, then any staged file that is just as old and
+    has no session left (e.g. its user was deleted).
+    """
+    UploadSession = database_models.UploadSession
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=UPLOAD_SESSION_TTL_SECONDS)
+
+    expired = db.scalars(
+        delete(UploadSession)
+        .where(UploadSession.updated_at < cutoff)
+        .returning(UploadSession.id)
+    ).all()
+    db.commit()
+    for session_id in expired:
+        remove_staged(session_id)
+
+    stale = {
+        path.name: path
+        for path in UPLOAD_SESSION_DIR.iterdir()
+        if path.stat().st_mtime < cutoff.timestamp()
+    }
+    if stale:
+        live = set(
+            db.scalars(select(UploadSession.id).where(UploadSession.id.in_(stale)))
+        )
+        for session_id, path in stale.items():
+            if session_id not in live:
+                path.unlink(missing_ok=True)
+
+
+def collect_abandoned_uploads_job():
+    db = SessionLocal()
+    try:
+        collect_abandoned_uploads(db)
+    finally:
+        db.close()
+
+
+upload_gc_worker = PeriodicWorker(
+    "upload-gc", UPLOAD_SESSION_GC_SECONDS, collect_abandoned_uploads_job
+)
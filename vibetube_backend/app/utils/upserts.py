@@ -0,0 +1,15 @@
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert_insert(db: Session, entity):
+    """
+    INSERT for the session's database that takes ON CONFLICT clauses.
+    Postgres and SQLite write the clause the same way, but SQLite only
+    resolves conflicts named by their columns (`index_elements`), not by
+    constraint name. An INSERT ... SELECT needs a WHERE clause on its
+    SELECT (`.where(true())`) for SQLite to parse the ON CONFLICT after it.
+    """
+    if db.get_bind().dialect.name == "sqlite":
+        return sqlite.insert(entity)
+    return postgresql.insert(entity)
@@ -0,0 +1,84 @@
+from typing import Any
+import orjson
+from sqlalchemy.orm import Session
+from starlette.responses import JSONResponse
+from app.models import database_models
+
+Video = database_models.Video
+User = database_models.User
+
+# every VideoOut field, read as plain columns instead of hydrating entities
+CARD_COLUMNS = (
+    Video.id,
+    Video.user_id,
+    Video.title,
+    Video.description,
+    Video.visibility,
+    Video.category,
+    Video.video_url,
+    Video.thumbnail_url,
+    Video.thumbnail_variants,
+    Video.views,
+    Video.created_at,
+    Video.duration,
+    Video.duration_seconds,
+    Video.width,
+    Video.height,
+    Video.hls_url,
+    Video.processing_status,
+    User.username.label("owner_username"),
+    User.profile_image.label("owner_profile_image"),
+    User.avatar_variants.label("owner_avatar_variants"),
+)
+
+
+def dumps(content: Any) -> bytes:
+    # UTC as "Z", the way Pydantic writes the same datetimes
+    return orjson.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse encoded with orjson. Bytes are sent as they are, for bodies
+    that were encoded (or cached) beforehand. Returning it skips FastAPI's
+    response_model validation, so the content must already have its shape.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def card_query(db: Session):
+    """Rows of CARD_COLUMNS, videos joined with their owner."""
+    return db.query(*CARD_COLUMNS).join(User, User.id == Video.user_id)
+
+
+def video_card(row) -> dict:
+    """A VideoOut as a plain dict, built from a card_query row."""
+    return {
+        "title": row.title,
+        "description": row.description,
+        "visibility": row.visibility,
+        "category": row.category,
+        "id": row.id,
+        "user_id": row.user_id,
+        "video_url": row.video_url,
+        "thumbnail_url": row.thumbnail_url,
+        "thumbnail_variants": row.thumbnail_variants,
+        "views": row.views,
+        "created_at": row.created_at,
+        "duration": row.duration,
+        "duration_seconds": row.duration_seconds,
+        "width": row.width,
+        "height": row.height,
+        "hls_url": row.hls_url,
+        "processing_status": row.processing_status,
+        "owner": {
+            "id": row.user_id,
+            "username": row.owner_username,
+            "profile_image": row.owner_profile_image,
+            "avatar_variants": row.owner_avatar_variants,
+        },
+    }
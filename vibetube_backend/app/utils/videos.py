@@ -1,5 +1,26 @@
+import asyncio
 import subprocess
 import json
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from fractions import Fraction
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models import database_models
+from app.constants.app_constants import MEDIA_PROBE_CONCURRENCY, MEDIA_PROBE_CACHE_SIZE
+
+# everything we store about a file, read in a single ffprobe pass
+FFPROBE_ARGS = [
+    "ffprobe",
+    "-v",
+    "error",
+    "-show_entries",
+    "format=duration,bit_rate:"
+    "stream=codec_type,codec_name,width,height,avg_frame_rate,r_frame_rate",
+    "-of",
+    "json",
+]
 
 
 def format_duration(seconds: float) -> str:
@@ -9,27 +30,188 @@ def format_duration(seconds: float) -> str:
     return f"{minutes:02d}:{secs:02d}"
 
 
-def get_video_duration(file_path: str) -> str:
+@dataclass
+class MediaInfo:
+    """Typed probe result; field names match the columns on Video."""
+
+    duration_seconds: float
+    width: int | None
+    height: int | None
+    video_codec: str | None
+    audio_codec: str | None
+    bit_rate: int | None
+    frame_rate: float | None
+
+    @property
+    def duration(self) -> str:
+        return format_duration(self.duration_seconds)
+
+    def as_columns(self) -> dict:
+        return {**asdict(self), "duration": self.duration}
+
+    @classmethod
+    def from_video(cls, video: database_models.Video) -> "MediaInfo | None":
+        if video.duration_seconds is None:
+            return None
+        return cls(
+            **{field: getattr(video, field) for field in cls.__dataclass_fields__}
+        )
+
+
+def parse_rate(rate: str | None) -> float | None:
     try:
-        result = subprocess.run(
-            [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_entries",
-                "format=duration",
-                "-of",
-                "json",
-                file_path,
-            ],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
+        value = float(Fraction(rate))
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return round(value, 3) or None
+
+
+def parse_probe_output(output: str | bytes) -> MediaInfo:
+    try:
+        data = json.loads(output)
+        streams = data.get("streams", [])
+        video = next((s for s in streams if s["codec_type"] == "video"), {})
+        audio = next((s for s in streams if s["codec_type"] == "audio"), {})
+        bit_rate = data["format"].get("bit_rate")
+        return MediaInfo(
+            duration_seconds=float(data["format"]["duration"]),
+            width=video.get("width"),
+            height=video.get("height"),
+            video_codec=video.get("codec_name"),
+            audio_codec=audio.get("codec_name"),
+            bit_rate=int(bit_rate) if bit_rate and bit_rate.isdigit() else None,
+            frame_rate=parse_rate(video.get("avg_frame_rate"))
+            or parse_rate(video.get("r_frame_rate")),
         )
+    except (ValueError, KeyError, TypeError) as e:
+        raise RuntimeError(f"Failed to read media info: {e}")
+
+
+class ProbeCache:
+    """LRU of probe results keyed by the sha256 of the file."""
+
+    def __init__(self, size: int = MEDIA_PROBE_CACHE_SIZE):
+        self.size = size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, MediaInfo] = OrderedDict()
+
+    def get(self, content_hash: str) -> MediaInfo | None:
+        with self._lock:
+            info = self._entries.get(content_hash)
+            if info is not None:
+                self._entries.move_to_end(content_hash)
+            return info
+
+    def put(self, content_hash: str, info: MediaInfo):
+        with self._lock:
+            self._entries[content_hash] = info
+            self._entries.move_to_end(content_hash)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+
+probe_cache = ProbeCache()
+
+
+def known_media_info(db: Session, content_hash: str) -> MediaInfo | None:
+    """Probe result of a file seen before, from the cache or a stored Video."""
+    info = probe_cache.get(content_hash)
+    if info is None:
+        video = db.scalars(
+            select(database_models.Video)
+            .where(
+                database_models.Video.content_hash == content_hash,
+                database_models.Video.duration_seconds.is_not(None),
+            )
+            .limit(1)
+        ).first()
+        info = MediaInfo.from_video(video) if video else None
+        if info is not None:
+            probe_cache.put(content_hash, info)
+    return info
+
+
+def probe_media(source: str) -> MediaInfo:
+    """Blocking probe of a local file or URL, for worker threads."""
+    result = subprocess.run(
+        [*FFPROBE_ARGS, source],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    return parse_probe_output(result.stdout)
+
+
+probe_slots = asyncio.Semaphore(MEDIA_PROBE_CONCURRENCY)
+
+
+async def probe_file(path: str) -> MediaInfo:
+    """Probes a local file without blocking, MEDIA_PROBE_CONCURRENCY at a time."""
+    async with probe_slots:
+        process = await asyncio.create_subprocess_exec(
+            *FFPROBE_ARGS,
+            path,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        stdout, _ = await process.communicate()
+    return parse_probe_output(stdout)
+
+
+class StreamingProbe:
+    """
+    Runs ffprobe on stdin so the media info is read while an upload streams
+    through, instead of from a finished file on disk. ffprobe may exit as
+    soon as it has seen the headers; anything fed after that is dropped.
+    The process holds one of the MEDIA_PROBE_CONCURRENCY probe slots from
+    start() until result() returns or kill() is called.
+    """
+
+    def __init__(self):
+        self._process: asyncio.subprocess.Process | None = None
+        self._closed = False
+        self._holds_slot = False
+
+    async def start(self):
+        await probe_slots.acquire()
+        self._holds_slot = True
+        try:
+            self._process = await asyncio.create_subprocess_exec(
+                *FFPROBE_ARGS,
+                "-i",
+                "pipe:0",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except BaseException:
+            self._release_slot()
+            raise
+
+    def _release_slot(self):
+        if self._holds_slot:
+            self._holds_slot = False
+            probe_slots.release()
+
+    async def feed(self, chunk: bytes):
+        if self._closed:
+            return
+        try:
+            self._process.stdin.write(chunk)
+            await self._process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            self._closed = True
 
-        data = json.loads(result.stdout)
-        duration_float = float(data["format"]["duration"])
-        return format_duration(duration_float)
+    async def result(self) -> MediaInfo:
+        # communicate() closes stdin, which tells ffprobe the input is complete
+        self._closed = True
+        try:
+            stdout, _ = await self._process.communicate()
+        finally:
+            self.kill()
+        return parse_probe_output(stdout)
 
-    except Exception as e:
-        raise RuntimeError(f"Failed to read duration: {e}")
+    def kill(self):
+        if self._process and self._process.returncode is None:
+            self._process.kill()
+        self._release_slot()
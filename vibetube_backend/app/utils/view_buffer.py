@@ -0,0 +1,330 @@
+import fcntl
+import os
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from sqlalchemy import select, update, bindparam
+from sqlalchemy.orm import Session
+from app.config.database import SessionLocal
+from app.models import database_models
+from app.constants.app_constants import (
+    VIEW_FLUSH_INTERVAL_MS,
+    VIEW_FLUSH_MAX_EVENTS,
+    VIEW_DURABILITY,
+    VIEW_JOURNAL_PATH,
+)
+from app.utils.background import PeriodicWorker
+from app.utils.counters import bump_channel_stats
+from app.utils.upserts import upsert_insert
+
+VIEW_WRITE_CHUNK = 1000
+
+
+def lock_file(path: Path, create: bool) -> int | None:
+    """
+    Opens `path` and takes an exclusive flock on it, which the kernel
+    releases when the holder dies. Waits for it when `create`, otherwise
+    returns None if it is missing or held by another process.
+    """
+    while True:
+        try:
+            fd = os.open(path, os.O_RDWR | (os.O_CREAT if create else 0), 0o644)
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if create else fcntl.LOCK_NB))
+        except BlockingIOError:
+            os.close(fd)
+            return None
+        try:
+            current = os.stat(path).st_ino == os.fstat(fd).st_ino
+        except FileNotFoundError:
+            current = False
+        if current:
+            return fd
+        # unlinked by its previous holder while we waited, not a lock anymore
+        os.close(fd)
+        if not create:
+            return None
+
+
+def fsync_dir(path: Path):
+    # makes files created or renamed in `path` survive an OS crash
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_views(db: Session, events: dict[tuple[int, int], datetime]):
+    """
+    Persists a batch of (user_id, video_id) -> watched_at events and one
+    views increment per video (and per channel) that gained a first-time
+    viewer. Each chunk is inserted with ON CONFLICT DO NOTHING first, the
+    rows it returns are the new viewers even when another process flushes
+    the same pair concurrently; the pairs already stored then get their
+    watched_at moved forward.
+    """
+    video_ids = {video_id for _, video_id in events}
+    channel_of = dict(
+        db.execute(
+            select(database_models.Video.id, database_models.Video.user_id).where(
+                database_models.Video.id.in_(video_ids)
+            )
+        ).all()
+    )
+    rows = [
+        {"user_id": user_id, "video_id": video_id, "created_at": watched_at}
+        for (user_id, video_id), watched_at in events.items()
+        if video_id in channel_of
+    ]
+
+    View = database_models.View
+    pair = [View.user_id, View.video_id]
+    new_viewers = Counter()
+    for start in range(0, len(rows), VIEW_WRITE_CHUNK):
+        chunk = rows[start : start + VIEW_WRITE_CHUNK]
+        inserted = set(
+            db.execute(
+                upsert_insert(db, View)
+                .values(chunk)
+                .on_conflict_do_nothing(index_elements=pair)
+                .returning(*pair)
+            ).all()
+        )
+        for _, video_id in inserted:
+            new_viewers[video_id] += 1
+
+        seen_before = [
+            row for row in chunk if (row["user_id"], row["video_id"]) not in inserted
+        ]
+        if seen_before:
+            stmt = upsert_insert(db, View).values(seen_before)
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=pair, set_={"created_at": stmt.excluded.created_at}
+                )
+            )
+
+    if new_viewers:
+        videos = database_models.Video.__table__
+        db.execute(
+            update(videos)
+            .where(videos.c.id == bindparam("video_id"))
+            .values(views=videos.c.views + bindparam("new_views")),
+            [
+                {"video_id": video_id, "new_views": count}
+                for video_id, count in new_viewers.items()
+            ],
+        )
+
+        channel_views = Counter()
+        for video_id, count in new_viewers.items():
+            channel_views[channel_of[video_id]] += count
+        bump_channel_stats(
+            db,
+            [
+                {"channel_id": channel_id, "total_views": count}
+                for channel_id, count in channel_views.items()
+            ],
+        )
+    db.commit()
+
+
+class ViewBuffer:
+    """
+    Write-behind buffer for video views. Events are coalesced per
+    (user, video) in memory and written by a background flush every
+    VIEW_FLUSH_INTERVAL_MS, or sooner once VIEW_FLUSH_MAX_EVENTS are pending.
+
+    Durability modes:
+      memory  - events only live in memory until flushed, a crash loses them.
+      journal - events are appended and fsynced to a local journal before
+                being acknowledged and replayed on the next start. Every
+                process keeps its own journal next to VIEW_JOURNAL_PATH,
+                locked for as long as it runs; journals left by processes
+                that are gone are taken over on start.
+      sync    - every event is written to the database inside the request.
+    """
+
+    def __init__(
+        self, mode: str = VIEW_DURABILITY, journal_path: Path = VIEW_JOURNAL_PATH
+    ):
+        if mode not in ("memory", "journal", "sync"):
+            raise ValueError(f"Unknown view durability mode: {mode}")
+        self.mode = mode
+        self.journal_base = Path(journal_path)
+        # per process, so they are only known once the worker has started
+        self.journal_path: Path | None = None
+        self._flushing_path: Path | None = None
+        self._lock_path: Path | None = None
+        self._lock_fd: int | None = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: dict[tuple[int, int], datetime] = {}
+        self._journal = None
+        self._worker = PeriodicWorker(
+            "view-buffer",
+            VIEW_FLUSH_INTERVAL_MS / 1000,
+            self.flush,
+            run_on_stop=True,
+        )
+
+    # ---------------- journal ----------------
+
+    def _journal_files(self, pid: str) -> tuple[Path, Path, Path]:
+        """Journal, batch being flushed and lock file of process `pid`."""
+        name = f"{self.journal_base.stem}.{pid}"
+        return (
+            self.journal_base.with_name(name + self.journal_base.suffix),
+            self.journal_base.with_name(name + ".flushing"),
+            self.journal_base.with_name(name + ".lock"),
+        )
+
+    def _open_journal(self):
+        self._journal = open(self.journal_path, "a", encoding="utf-8")
+        fsync_dir(self.journal_path.parent)
+
+    def _append_to_journal(self, events: dict[tuple[int, int], datetime]):
+        for (user_id, video_id), watched_at in events.items():
+            self._journal.write(f"{user_id},{video_id},{watched_at.isoformat()}\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def _replay(self, paths: list[Path]) -> list[Path]:
+        """Merges the events of the journals in `paths`, returns the ones read."""
+        replayed = []
+        for path in paths:
+            if not path.exists():
+                continue
+            with open(path, encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        user_id, video_id, watched_at = line.strip().split(",")
+                        key = (int(user_id), int(video_id))
+                        watched_at = datetime.fromisoformat(watched_at)
+                    except ValueError:
+                        continue  # torn last line
+                    self._merge({key: watched_at})
+            replayed.append(path)
+        return replayed
+
+    def _claim_journals(self) -> tuple[list[Path], list[int]]:
+        """
+        Locks this process's journal and reads every journal whose process
+        is gone, including one left under this pid by an earlier process.
+        Returns the files read and the locks held on them, to be released
+        once their events are safe in this process's journal.
+        """
+        self.journal_base.parent.mkdir(parents=True, exist_ok=True)
+        pid = str(os.getpid())
+        self.journal_path, self._flushing_path, self._lock_path = self._journal_files(
+            pid
+        )
+        self._lock_fd = lock_file(self._lock_path, create=True)
+
+        # a .flushing file means the process died in the middle of a flush
+        replayed = self._replay([self._flushing_path, self.journal_path])
+        held = []
+        for lock_path in self.journal_base.parent.glob(
+            f"{self.journal_base.stem}.*.lock"
+        ):
+            owner = lock_path.name[len(self.journal_base.stem) + 1 : -len(".lock")]
+            if owner == pid:
+                continue
+            fd = lock_file(lock_path, create=False)
+            if fd is None:
+                continue  # its process is still running
+            journal_path, flushing_path, _ = self._journal_files(owner)
+            replayed += self._replay([flushing_path, journal_path]) + [lock_path]
+            held.append(fd)
+        return replayed, held
+
+    # ---------------- buffering ----------------
+
+    def _merge(self, events: dict[tuple[int, int], datetime]):
+        for key, watched_at in events.items():
+            if key not in self._pending or self._pending[key] < watched_at:
+                self._pending[key] = watched_at
+
+    def record(self, user_id: int, video_id: int):
+        event = {(user_id, video_id): datetime.now(timezone.utc)}
+
+        if self.mode == "sync":
+            db = SessionLocal()
+            try:
+                write_views(db, event)
+            finally:
+                db.close()
+            return
+
+        with self._lock:
+            self._merge(event)
+            if self._journal:
+                self._append_to_journal(event)
+            pending = len(self._pending)
+
+        if pending >= VIEW_FLUSH_MAX_EVENTS:
+            self._worker.wake()
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return
+                events, self._pending = self._pending, {}
+                if self._journal:
+                    # new events go to a fresh journal while this batch is written
+                    self._journal.close()
+                    os.replace(self.journal_path, self._flushing_path)
+                    self._open_journal()
+
+            db = SessionLocal()
+            try:
+                write_views(db, events)
+            except Exception:
+                db.rollback()
+                with self._lock:
+                    self._merge(events)
+                    if self._journal:
+                        self._append_to_journal(events)
+                raise
+            finally:
+                db.close()
+                if self._flushing_path.exists():
+                    self._flushing_path.unlink()
+
+    # ---------------- lifecycle ----------------
+
+    def start(self):
+        if self.mode == "journal":
+            with self._lock:
+                replayed, held = self._claim_journals()
+                self._open_journal()
+                self._append_to_journal(self._pending)
+                # their events are in this process's journal now
+                for path in replayed:
+                    path.unlink(missing_ok=True)
+                for fd in held:
+                    os.close(fd)
+        if self.mode != "sync":
+            self._worker.start()
+
+    def stop(self):
+        # the worker runs a final flush before it exits
+        self._worker.stop()
+        if self._journal:
+            self._journal.close()
+            self._journal = None
+            # an empty journal has nothing left to replay; otherwise the
+            # released lock lets the next process to start take it over
+            if self.journal_path.stat().st_size == 0:
+                self.journal_path.unlink()
+                self._lock_path.unlink()
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+
+view_buffer = ViewBuffer()
@@ -0,0 +1,197 @@
+"""
+Requests per second of one uvicorn worker serving an async handler that
+queries through a blocking Session (how upload_video and
+update_channel_details ran before the async layer) against the same
+handler on an AsyncSession. A few clients poll a handler that does no
+database work meanwhile; its latency shows how long the worker's event
+loop is held up by the queries.
+
+Runs against DATABASE_URL, or a throwaway SQLite file when it is unset;
+the async engine derives its URL from it the way the app does. The
+comparison is meant for Postgres (asyncpg). On SQLite aiosqlite hands each
+query to a thread, and the AsyncSession comes out slower (40 against 47
+req/s on one worker), which says nothing about asyncpg.
+
+    cd vibetube_backend
+    DATABASE_URL=postgresql://... python -m benchmarks.db_throughput
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+import benchmarks.environment  # noqa: F401, before any app import
+import httpx
+from fastapi import FastAPI
+from sqlalchemy import func, insert, select
+from app.config.database import AsyncSessionLocal, SessionLocal, engine
+from app.models.database_models import Base, User, Video
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+WORDS = "lofi beats study chill music live gaming tutorial cooking travel".split()
+
+
+def matching_videos():
+    """A query that has to scan, like the ilike search path."""
+    return select(func.count()).select_from(Video).where(Video.title.ilike("%lofi%"))
+
+
+blocking_app = FastAPI()
+async_app = FastAPI()
+
+
+@blocking_app.get("/ping")
+@async_app.get("/ping")
+async def ping():
+    return {}
+
+
+@blocking_app.get("/")
+async def blocking_handler():
+    db = SessionLocal()
+    try:
+        return {"count": db.execute(matching_videos()).scalar_one()}
+    finally:
+        db.close()
+
+
+@async_app.get("/")
+async def async_handler():
+    async with AsyncSessionLocal() as db:
+        return {"count": (await db.execute(matching_videos())).scalar_one()}
+
+
+def build_catalog(videos: int):
+    rng = random.Random(0)
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"id": 1, "username": "load", "password_hash": "-"}])
+        rows = [
+            {
+                "user_id": 1,
+                "title": " ".join(rng.choices(WORDS, k=5)),
+                "video_url": f"/storage/videos/{i}.mp4",
+                "thumbnail_url": f"/storage/thumbnails/{i}.webp",
+                "duration": "03:00",
+                "views": 0,
+            }
+            for i in range(videos)
+        ]
+        for i in range(0, len(rows), 10_000):
+            db.execute(insert(Video), rows[i : i + 10_000])
+        db.commit()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app_name: str) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            f"benchmarks.db_throughput:{app_name}",
+            "--app-dir",
+            str(BACKEND_DIR),
+            "--port",
+            str(port),
+            "--workers",
+            "1",
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        # the servers inherit the database this process just filled
+        env=os.environ.copy(),
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(base_url, timeout=5)
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{app_name} did not start")
+
+
+async def load(url: str, args) -> tuple[float, float, float]:
+    """Requests per second, p99 latency in ms, and p99 of /ping meanwhile."""
+    latencies = []
+    pings = []
+    done = asyncio.Event()
+
+    async def client(http: httpx.AsyncClient, count: int):
+        for _ in range(count):
+            began = time.perf_counter()
+            response = await http.get(url)
+            latencies.append(time.perf_counter() - began)
+            assert response.status_code == 200, response.status_code
+
+    async def pinger(http: httpx.AsyncClient):
+        while not done.is_set():
+            began = time.perf_counter()
+            await http.get(f"{url}ping")
+            pings.append(time.perf_counter() - began)
+            await asyncio.sleep(0.01)
+
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as http:
+        await asyncio.gather(*(client(http, 2) for _ in range(args.concurrency)))
+        latencies.clear()
+        per_client = args.requests // args.concurrency
+        pingers = [asyncio.create_task(pinger(http)) for _ in range(4)]
+        began = time.perf_counter()
+        await asyncio.gather(
+            *(client(http, per_client) for _ in range(args.concurrency))
+        )
+        elapsed = time.perf_counter() - began
+        done.set()
+        await asyncio.gather(*pingers)
+    p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+    ping_p99 = statistics.quantiles(pings, n=100)[98] * 1000
+    return len(latencies) / elapsed, p99, ping_p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--videos", type=int, default=50_000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    build_catalog(args.videos)
+    print(
+        f"{engine.dialect.name}, {args.videos} videos, one worker, "
+        f"{args.concurrency} concurrent clients"
+    )
+    for label, app_name in [
+        ("Session on the event loop", "blocking_app"),
+        ("AsyncSession", "async_app"),
+    ]:
+        process, base_url = start_server(app_name)
+        try:
+            rps, p99, ping_p99 = asyncio.run(load(f"{base_url}/", args))
+        finally:
+            process.terminate()
+            process.wait()
+        print(
+            f"{label:26s} {rps:8.0f} req/s  p99 {p99:7.1f} ms  "
+            f"/ping p99 {ping_p99:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
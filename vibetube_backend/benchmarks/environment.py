@@ -0,0 +1,18 @@
+"""
+Settings the app refuses to import without. Benchmarks import this module
+before anything from app, so they run with no .env, against a throwaway
+SQLite file unless DATABASE_URL points elsewhere.
+"""
+
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{tempfile.mkdtemp()}/benchmark.db")
+for name, value in {
+    "SUPABASE_URL": "http://localhost",
+    "SUPABASE_KEY": "benchmark",
+    "SECRET_KEY": "benchmark",
+    "ALGORITHM": "HS256",
+    "FRONTEND_URL": "http://localhost",
+}.items():
+    os.environ.setdefault(name, value)
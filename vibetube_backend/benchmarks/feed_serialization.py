@@ -0,0 +1,131 @@
+"""
+CPU cost of building a feed page: the entity + VideoOut + stdlib JSON path
+the feeds used before, against card_query + video_card + orjson.
+
+Runs against DATABASE_URL, or a throwaway SQLite file when it is unset.
+
+    cd vibetube_backend
+    python -m benchmarks.feed_serialization --page 50
+"""
+
+import argparse
+import json
+import statistics
+import time
+import benchmarks.environment  # noqa: F401, before any app import
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+from app.config.database import SessionLocal, engine
+from app.models.database_models import Base, User, Video
+from app.schemas.pydantic_models import VideoOut
+from app.utils.video_cards import card_query, dumps, video_card
+
+
+def build_catalog(db, videos: int):
+    db.execute(
+        insert(User),
+        [
+            {
+                "id": i,
+                "username": f"channel_{i}",
+                "password_hash": "-",
+                "profile_image": f"/storage/avatars/{i}.webp",
+                "avatar_variants": {"48": f"/a/{i}-48.webp", "128": f"/a/{i}-128.webp"},
+            }
+            for i in range(1, 11)
+        ],
+    )
+    db.execute(
+        insert(Video),
+        [
+            {
+                "user_id": i % 10 + 1,
+                "title": f"video {i}",
+                "description": "description " * 20,
+                "category": "music",
+                "video_url": f"/storage/videos/{i}.mp4",
+                "thumbnail_url": f"/storage/thumbnails/{i}-320.webp",
+                "thumbnail_variants": {
+                    size: f"/storage/thumbnails/{i}-{size}.webp"
+                    for size in ("160", "320", "640")
+                },
+                "duration": "03:00",
+                "duration_seconds": 180.0,
+                "width": 1920,
+                "height": 1080,
+                "views": i,
+                "hls_url": f"/storage/hls/{i}/master.m3u8",
+                "processing_status": "ready",
+            }
+            for i in range(videos)
+        ],
+    )
+    db.commit()
+
+
+def entity_page(db, limit: int) -> bytes:
+    videos = (
+        db.query(Video)
+        .options(joinedload(Video.owner))
+        .order_by(Video.created_at.desc(), Video.id.desc())
+        .limit(limit)
+        .all()
+    )
+    content = jsonable_encoder(
+        [VideoOut.model_validate(video, from_attributes=True) for video in videos]
+    )
+    # what JSONResponse.render does
+    body = json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+    db.expunge_all()
+    return body
+
+
+def card_page(db, limit: int) -> bytes:
+    rows = (
+        card_query(db)
+        .order_by(Video.created_at.desc(), Video.id.desc())
+        .limit(limit)
+        .all()
+    )
+    return dumps([video_card(row) for row in rows])
+
+
+def cpu_ms(run, repeat: int) -> tuple[float, float]:
+    """Median and p99 CPU time in ms."""
+    samples = []
+    for _ in range(repeat):
+        began = time.process_time()
+        run()
+        samples.append((time.process_time() - began) * 1000)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--videos", type=int, default=1_000)
+    parser.add_argument("--page", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    build_catalog(db, args.videos)
+
+    print(f"{engine.dialect.name}, pages of {args.page}, CPU per page")
+    for label, page in [
+        ("entities + VideoOut + json", entity_page),
+        ("card_query + orjson", card_page),
+    ]:
+        page(db, args.page)  # warm up
+        median, p99 = cpu_ms(lambda: page(db, args.page), args.repeat)
+        print(f"{label:28s} {median:6.2f} ms  p99 {p99:6.2f} ms")
+
+    rows = card_query(db).limit(args.page).all()
+    median, _ = cpu_ms(lambda: dumps([video_card(row) for row in rows]), args.repeat)
+    print(f"{'encoding alone (cards)':28s} {median:6.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Latency of the random feed's index seeks against ORDER BY random(), as the
+catalog grows.
+
+Runs against DATABASE_URL, or a throwaway SQLite file when it is unset.
+The videos table is grown in steps, so point it at an empty database.
+
+    cd vibetube_backend
+    python -m benchmarks.random_feed --sizes 10000 100000 400000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import benchmarks.environment  # noqa: F401, before any app import
+from sqlalchemy import func, insert
+from app.config.database import SessionLocal, engine
+from app.models.database_models import Base, User, Video
+from app.routers.videos.controller.get_videos import sample_random_videos
+from app.utils.video_cards import card_query
+
+
+def grow_catalog(db, start: int, stop: int):
+    rows = [
+        {
+            "user_id": 1,
+            "title": f"video {i}",
+            "video_url": f"/storage/videos/{i}.mp4",
+            "thumbnail_url": f"/storage/thumbnails/{i}.webp",
+            "duration": "03:00",
+            "views": 0,
+            "random_key": random.random(),
+        }
+        for i in range(start, stop)
+    ]
+    for i in range(0, len(rows), 10_000):
+        db.execute(insert(Video), rows[i : i + 10_000])
+    db.commit()
+
+
+def timed(run, repeat: int) -> tuple[float, float]:
+    """Median and p99 in ms."""
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - began) * 1000)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 400_000]
+    )
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    db.add(User(id=1, username="benchmark", password_hash="-"))
+    db.commit()
+
+    print(f"{engine.dialect.name}, pages of {args.limit}")
+    print(f"{'videos':>8s}  {'index seeks':>22s}  {'ORDER BY random()':>22s}")
+    size = 0
+    for target in sorted(args.sizes):
+        grow_catalog(db, size, target)
+        size = target
+
+        seeks = timed(
+            lambda: sample_random_videos(card_query(db), args.limit), args.repeat
+        )
+        # the sort has to read every row, fewer repeats keep the run short
+        shuffle = timed(
+            lambda: card_query(db).order_by(func.random()).limit(args.limit).all(),
+            max(args.repeat // 10, 20),
+        )
+        print(
+            f"{size:8d}  {seeks[0]:7.2f} ms  p99 {seeks[1]:6.2f} ms  "
+            f"{shuffle[0]:7.2f} ms  p99 {shuffle[1]:6.2f} ms"
+        )
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+search_videos' full-text path against the ilike path it replaced, on a
+synthetic catalog.
+
+The full-text path needs Postgres; against SQLite (the default, a
+throwaway file) only the ilike numbers are printed. Point DATABASE_URL at
+an empty Postgres database to compare both.
+
+    cd vibetube_backend
+    DATABASE_URL=postgresql://... python -m benchmarks.search --videos 200000
+"""
+
+import argparse
+import random
+import statistics
+import time
+import benchmarks.environment  # noqa: F401, before any app import
+from sqlalchemy import insert
+from app.config.database import SessionLocal, engine
+from app.models.database_models import Base, User, Video
+from app.routers.videos.controller.search_videos import (
+    full_text_search,
+    substring_search,
+)
+from app.utils.search import refresh_search_vectors, supports_full_text
+
+WORDS = (
+    "lofi beats study chill music live stream gaming speedrun minecraft tutorial "
+    "python rust cooking travel vlog review unboxing anime trailer podcast news "
+    "guitar piano drums remix official video highlights football cricket "
+    "workout yoga science space history documentary comedy sketch reaction"
+).split()
+QUERIES = ["lofi", "minecraft speedrun", "pyth", "space documentary", "zzzz"]
+
+
+def build_catalog(db, videos: int, channels: int):
+    rng = random.Random(0)
+    db.execute(
+        insert(User),
+        [
+            {"id": i, "username": f"{rng.choice(WORDS)}_{i}", "password_hash": "-"}
+            for i in range(1, channels + 1)
+        ],
+    )
+    rows = [
+        {
+            "user_id": rng.randint(1, channels),
+            "title": " ".join(rng.choices(WORDS, k=5)),
+            "description": " ".join(rng.choices(WORDS, k=30)),
+            "video_url": f"/storage/videos/{i}.mp4",
+            "thumbnail_url": f"/storage/thumbnails/{i}.webp",
+            "duration": "03:00",
+            "views": rng.randrange(1_000_000),
+            "random_key": rng.random(),
+        }
+        for i in range(videos)
+    ]
+    for i in range(0, len(rows), 10_000):
+        db.execute(insert(Video), rows[i : i + 10_000])
+    refresh_search_vectors(db)
+    db.commit()
+
+
+def timed(run, repeat: int) -> tuple[float, float]:
+    """Median and p99 in ms."""
+    samples = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        run()
+        samples.append((time.perf_counter() - began) * 1000)
+    return statistics.median(samples), statistics.quantiles(samples, n=100)[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--videos", type=int, default=200_000)
+    parser.add_argument("--channels", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    build_catalog(db, args.videos, args.channels)
+    if engine.dialect.name == "postgresql":
+        db.connection().exec_driver_sql("ANALYZE videos")
+        db.commit()
+
+    paths = [("ilike", substring_search)]
+    if supports_full_text(db):
+        paths.append(("full text", full_text_search))
+    else:
+        print("full text needs Postgres, timing the ilike path only")
+
+    print(f"{engine.dialect.name}, {args.videos} videos, first page of 12")
+    for query in QUERIES:
+        for label, search in paths:
+            median, p99 = timed(lambda: search(db, query, 0, 12), args.repeat)
+            print(f"{query!r:22s} {label:10s} {median:8.2f} ms  p99 {p99:8.2f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
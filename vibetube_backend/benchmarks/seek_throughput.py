@@ -0,0 +1,155 @@
+"""
+Concurrent seek throughput of the storage router against the StaticFiles
+mount it replaced.
+
+Each server runs in its own uvicorn process, serving a synthetic video
+from a temporary storage/ directory. Clients issue Range requests at
+random offsets, the way a player does while seeking.
+
+    cd vibetube_backend
+    python -m benchmarks.seek_throughput --concurrency 32 --requests 4000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+import httpx
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from app.routers.storage.storage_router import storage_router
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+# both apps resolve storage/ against the working directory, as app_setup does
+static_app = FastAPI()
+static_app.mount(
+    "/storage/videos", StaticFiles(directory="storage/videos", check_dir=False)
+)
+
+router_app = FastAPI()
+router_app.include_router(storage_router, prefix="/storage")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(app_name: str, storage_root: Path) -> tuple[subprocess.Popen, str]:
+    port = free_port()
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            f"benchmarks.seek_throughput:{app_name}",
+            "--app-dir",
+            str(BACKEND_DIR),
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        cwd=storage_root,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            httpx.get(base_url, timeout=0.5)
+            return process, base_url
+        except httpx.TransportError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{app_name} did not start")
+
+
+async def seek(url: str, size: int, args) -> tuple[float, float, int]:
+    """Requests per second, p99 latency in ms and bytes received."""
+    rng = random.Random(0)
+    offsets = [rng.randrange(size - args.range_size) for _ in range(args.requests)]
+    latencies = []
+    received = 0
+
+    async def client(http: httpx.AsyncClient, offsets: list[int]):
+        nonlocal received
+        for start in offsets:
+            headers = {"Range": f"bytes={start}-{start + args.range_size - 1}"}
+            began = time.perf_counter()
+            response = await http.get(url, headers=headers)
+            latencies.append(time.perf_counter() - began)
+            assert response.status_code == 206, response.status_code
+            received += len(response.content)
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as http:
+        # warm the page cache and both servers' connections
+        await asyncio.gather(
+            *(client(http, offsets[:4]) for _ in range(args.concurrency))
+        )
+        latencies.clear()
+        received = 0
+        began = time.perf_counter()
+        await asyncio.gather(
+            *(
+                client(http, offsets[i :: args.concurrency])
+                for i in range(args.concurrency)
+            )
+        )
+        elapsed = time.perf_counter() - began
+    p99 = statistics.quantiles(latencies, n=100)[98] * 1000
+    return len(latencies) / elapsed, p99, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--file-mb", type=int, default=256)
+    parser.add_argument("--range-size", type=int, default=256 * 1024)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=4000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        video_dir = Path(root, "storage", "videos")
+        video_dir.mkdir(parents=True)
+        filename = f"{uuid.uuid4()}.mp4"
+        size = args.file_mb * 1024 * 1024
+        with open(video_dir / filename, "wb") as f:
+            for _ in range(args.file_mb):
+                f.write(os.urandom(1024 * 1024))
+
+        print(
+            f"{args.file_mb} MB file, {args.range_size // 1024} KB ranges, "
+            f"{args.concurrency} concurrent clients, {args.requests} requests"
+        )
+        for label, app_name in [
+            ("StaticFiles mount", "static_app"),
+            ("storage router", "router_app"),
+        ]:
+            process, base_url = start_server(app_name, Path(root))
+            try:
+                rps, p99, received = asyncio.run(
+                    seek(f"{base_url}/storage/videos/{filename}", size, args)
+                )
+            finally:
+                process.terminate()
+                process.wait()
+            throughput = received / 1024 / 1024 * rps / args.requests
+            print(
+                f"{label:18s} {rps:8.0f} req/s  {throughput:7.1f} MB/s  "
+                f"p99 {p99:6.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
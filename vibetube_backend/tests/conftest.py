@@ -0,0 +1,84 @@
+"""
+The app reads its settings at import, so they are set here before anything
+from app is imported: a throwaway SQLite database, no Redis, and views
+written inside the request. Every test starts from empty tables.
+"""
+
+import os
+import tempfile
+
+STATE_DIR = tempfile.mkdtemp()
+os.environ.update(
+    {
+        "DATABASE_URL": f"sqlite:///{STATE_DIR}/test.db",
+        "REDIS_URL": "",
+        "VIEW_DURABILITY": "sync",
+        "VIEW_JOURNAL_PATH": f"{STATE_DIR}/view_journal.log",
+        "UPLOAD_SESSION_DIR": f"{STATE_DIR}/uploads",
+        "SUPABASE_URL": "http://localhost",
+        "SUPABASE_KEY": "test",
+        "SECRET_KEY": "test",
+        "ALGORITHM": "HS256",
+        "FRONTEND_URL": "http://localhost",
+    }
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from app.config.database import SessionLocal, engine
+from app.config.jwt_config import create_access_token
+from app.constants.app_constants import CACHE_SIZE
+from app.main import app
+from app.models import database_models
+from app.utils.cache import LocalCache, response_cache
+
+
+@pytest.fixture(autouse=True)
+def tables(monkeypatch):
+    database_models.Base.metadata.create_all(bind=engine)
+    # ids restart with the tables, so entries of an earlier test would match
+    monkeypatch.setattr(response_cache, "local", LocalCache(CACHE_SIZE))
+    yield
+    database_models.Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def client():
+    # not entered as a context manager: the lifespan's background workers
+    # stay off, tests run the jobs they need themselves
+    return TestClient(app)
+
+
+def auth(user_id: int) -> dict:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def add_user(db, username: str) -> database_models.User:
+    user = database_models.User(username=username, password_hash="-")
+    db.add(user)
+    db.commit()
+    return user
+
+
+def add_videos(db, owner: database_models.User, count: int, **columns) -> list:
+    videos = [
+        database_models.Video(
+            user_id=owner.id,
+            title=f"{owner.username} video {i}",
+            video_url=f"/storage/videos/{owner.id}-{i}.mp4",
+            thumbnail_url=f"/storage/thumbnails/{owner.id}-{i}.webp",
+            duration="03:00",
+            **columns,
+        )
+        for i in range(count)
+    ]
+    db.add_all(videos)
+    db.commit()
+    return videos
@@ -0,0 +1,49 @@
+from conftest import add_user, add_videos, auth
+from app.models import database_models
+
+
+def test_cached_feed_shows_a_renamed_channel(client, db):
+    viewer = add_user(db, "viewer")
+    channel = add_user(db, "channel")
+    add_videos(db, channel, 2, category="music")
+    feed = {"vid_query": "music", "limit": 10}
+
+    before = client.get("/api/videos/", params=feed, headers=auth(viewer.id))
+    assert {card["owner"]["username"] for card in before.json()} == {"channel"}
+
+    response = client.put(
+        "/api/users/", data={"username": "renamed"}, headers=auth(channel.id)
+    )
+    assert response.status_code == 200
+
+    after = client.get("/api/videos/", params=feed, headers=auth(viewer.id))
+    assert {card["owner"]["username"] for card in after.json()} == {"renamed"}
+
+
+def test_comments_revalidate_until_a_comment_is_added(client, db):
+    viewer = add_user(db, "viewer")
+    (video,) = add_videos(db, add_user(db, "channel"), 1)
+    db.add(database_models.Comment(video_id=video.id, user_id=viewer.id, text="one"))
+    db.commit()
+    url = f"/api/videos/comments/{video.id}"
+
+    first = client.get(url)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    unchanged = client.get(url, headers={"If-None-Match": etag})
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == etag
+
+    response = client.post(
+        "/api/videos/comments/",
+        json={"video_id": video.id, "text": "two"},
+        headers=auth(viewer.id),
+    )
+    assert response.status_code == 200
+
+    changed = client.get(url, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert sorted(comment["text"] for comment in changed.json()) == ["one", "two"]
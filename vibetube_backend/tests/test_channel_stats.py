@@ -0,0 +1,37 @@
+from conftest import add_user, add_videos
+from app.models import database_models
+from app.utils.counters import bump_channel_stats, reconcile_channel_stats
+
+
+def test_reconcile_recounts_drifted_and_missing_stats(db):
+    channel = add_user(db, "channel")
+    quiet = add_user(db, "quiet")
+    viewer = add_user(db, "viewer")
+    (video,) = add_videos(db, channel, 1)
+    db.add_all(
+        [
+            database_models.Subscription(channel_id=channel.id, user_id=viewer.id),
+            database_models.View(user_id=viewer.id, video_id=video.id),
+        ]
+    )
+    # drifted: counts a video and subscribers that are not there
+    bump_channel_stats(
+        db, [{"channel_id": channel.id, "total_videos": 5, "total_subscribers": 7}]
+    )
+    db.commit()
+
+    reconcile_channel_stats(db)
+
+    totals = {
+        stats.channel_id: (
+            stats.total_videos,
+            stats.total_views,
+            stats.total_subscribers,
+        )
+        for stats in db.query(database_models.ChannelStats)
+    }
+    assert totals == {
+        channel.id: (1, 1, 1),
+        quiet.id: (0, 0, 0),
+        viewer.id: (0, 0, 0),
+    }
@@ -0,0 +1,56 @@
+from conftest import add_user, add_videos, auth
+from app.models import database_models
+
+
+def test_like_toggles_and_moves_the_counters(client, db):
+    viewer = add_user(db, "viewer")
+    (video,) = add_videos(db, add_user(db, "channel"), 1)
+
+    for expected, likes in (("Added", 1), ("Removed", 0), ("Added", 1)):
+        response = client.post(
+            "/api/videos/likes/",
+            json={"video_id": video.id, "type": "like"},
+            headers=auth(viewer.id),
+        )
+        assert response.status_code == 200
+        assert response.json() == {"message": expected}
+        db.refresh(video)
+        assert (video.like_count, video.dislike_count) == (likes, 0)
+
+    count = client.get(f"/api/videos/likes/{video.id}", headers=auth(viewer.id))
+    assert count.json() == {"liked": "true", "likes": 1}
+
+
+def test_removing_a_dislike_moves_the_dislike_counter(client, db):
+    viewer = add_user(db, "viewer")
+    (video,) = add_videos(db, add_user(db, "channel"), 1)
+
+    client.post(
+        "/api/videos/likes/",
+        json={"video_id": video.id, "type": "dislike"},
+        headers=auth(viewer.id),
+    )
+    db.refresh(video)
+    assert (video.like_count, video.dislike_count) == (0, 1)
+
+    # toggling off removes whatever reaction is stored
+    response = client.post(
+        "/api/videos/likes/",
+        json={"video_id": video.id, "type": "like"},
+        headers=auth(viewer.id),
+    )
+    assert response.json() == {"message": "Removed"}
+    db.refresh(video)
+    assert (video.like_count, video.dislike_count) == (0, 0)
+
+
+def test_liking_a_missing_video_is_not_found(client, db):
+    viewer = add_user(db, "viewer")
+
+    response = client.post(
+        "/api/videos/likes/",
+        json={"video_id": 999, "type": "like"},
+        headers=auth(viewer.id),
+    )
+    assert response.status_code == 404
+    assert db.query(database_models.Like).count() == 0
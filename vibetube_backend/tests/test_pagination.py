@@ -0,0 +1,95 @@
+from conftest import add_user, add_videos, auth
+from app.models import database_models
+from app.utils.timeline import fan_out_pending
+
+
+def walk(client, url: str, params: dict, headers: dict | None = None) -> list[list]:
+    """Ids of every page, following X-Next-Cursor until it runs out."""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url, params={**params, "cursor": cursor}, headers=headers)
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return pages
+        assert len(pages) <= 10, "the cursor does not advance"
+
+
+def test_category_feed_pages_reach_every_video_once(client, db):
+    viewer = add_user(db, "viewer")
+    # stamped by the database default, most of them within the same second
+    videos = add_videos(db, add_user(db, "channel"), 7, category="music")
+
+    pages = walk(
+        client,
+        "/api/videos/",
+        {"vid_query": "music", "limit": 3},
+        auth(viewer.id),
+    )
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    seen = [video_id for page in pages for video_id in page]
+    assert sorted(seen) == sorted(video.id for video in videos)
+
+
+def test_subscription_feed_pages_reach_every_video_once(client, db):
+    viewer = add_user(db, "viewer")
+    pushed = add_user(db, "pushed")
+    pulled = add_user(db, "pulled")
+    videos = add_videos(db, pushed, 4) + add_videos(db, pulled, 3)
+    for channel in (pushed, pulled):
+        db.add(database_models.Subscription(channel_id=channel.id, user_id=viewer.id))
+    db.commit()
+    fan_out_pending(db)
+    # as if `pulled` had grown past FANOUT_MAX_SUBSCRIBERS before its uploads
+    db.query(database_models.Video).filter_by(user_id=pulled.id).update(
+        {"pull_only": True}
+    )
+    db.query(database_models.TimelineEntry).filter_by(channel_id=pulled.id).delete()
+    db.commit()
+
+    pages = walk(
+        client,
+        "/api/videos/",
+        {"vid_query": "subscriptions", "limit": 2},
+        auth(viewer.id),
+    )
+
+    seen = [video_id for page in pages for video_id in page]
+    assert sorted(seen) == sorted(video.id for video in videos)
+
+
+def test_comment_pages_reach_every_comment_once(client, db):
+    author = add_user(db, "author")
+    (video,) = add_videos(db, author, 1)
+    comments = [
+        database_models.Comment(user_id=author.id, video_id=video.id, text=f"#{i}")
+        for i in range(5)
+    ]
+    db.add_all(comments)
+    db.commit()
+
+    pages = walk(client, f"/api/videos/comments/{video.id}", {"limit": 2})
+
+    seen = [comment_id for page in pages for comment_id in page]
+    assert sorted(seen) == sorted(comment.id for comment in comments)
+
+
+def test_history_pages_reach_every_watched_video_once(client, db):
+    viewer = add_user(db, "viewer")
+    videos = add_videos(db, add_user(db, "channel"), 5)
+    for video in videos:
+        client.post(
+            "/api/videos/view", json={"video_id": video.id}, headers=auth(viewer.id)
+        )
+
+    pages = walk(
+        client, "/api/videos/", {"vid_query": "history", "limit": 2}, auth(viewer.id)
+    )
+
+    # most recently watched first
+    assert [video_id for page in pages for video_id in page] == [
+        video.id for video in reversed(videos)
+    ]
@@ -0,0 +1,41 @@
+import asyncio
+import pytest
+from app.utils import videos
+
+# reads the piped upload like ffprobe would, then prints a result
+FAKE_PROBE = [
+    "sh",
+    "-c",
+    """cat > /dev/null; echo '{"format": {"duration": "2.5"}, "streams": []}'""",
+]
+
+
+@pytest.fixture
+def fake_ffprobe(monkeypatch):
+    monkeypatch.setattr(videos, "FFPROBE_ARGS", FAKE_PROBE)
+
+
+def test_streaming_probe_holds_a_slot_while_it_runs(fake_ffprobe):
+    async def run():
+        free = videos.probe_slots._value
+        probe = videos.StreamingProbe()
+        await probe.start()
+        assert videos.probe_slots._value == free - 1
+        await probe.feed(b"media bytes")
+        info = await probe.result()
+        assert videos.probe_slots._value == free
+        return info
+
+    assert asyncio.run(run()).duration_seconds == 2.5
+
+
+def test_killed_streaming_probe_gives_its_slot_back(fake_ffprobe):
+    async def run():
+        free = videos.probe_slots._value
+        probe = videos.StreamingProbe()
+        await probe.start()
+        probe.kill()
+        probe.kill()
+        assert videos.probe_slots._value == free
+
+    asyncio.run(run())
@@ -0,0 +1,39 @@
+from conftest import add_user, add_videos, auth
+from app.models import database_models
+
+
+def test_random_page_is_not_one_stretch_of_the_index(client, db):
+    viewer = add_user(db, "viewer")
+    add_videos(db, add_user(db, "channel"), 200)
+    by_key = [
+        video_id
+        for (video_id,) in db.query(database_models.Video.id).order_by(
+            database_models.Video.random_key
+        )
+    ]
+
+    response = client.get(
+        "/api/videos/",
+        params={"vid_query": "random", "limit": 10},
+        headers=auth(viewer.id),
+    )
+
+    ids = [card["id"] for card in response.json()]
+    assert len(set(ids)) == 10
+    positions = sorted(by_key.index(video_id) for video_id in ids)
+    # ten neighbours in the index would span exactly ten positions
+    assert positions[-1] - positions[0] > 9
+
+
+def test_random_page_of_a_small_catalog_has_every_video_once(client, db):
+    viewer = add_user(db, "viewer")
+    videos = add_videos(db, add_user(db, "channel"), 5)
+
+    response = client.get(
+        "/api/videos/",
+        params={"vid_query": "random", "limit": 10, "exclude_ids": str(videos[0].id)},
+        headers=auth(viewer.id),
+    )
+
+    ids = [card["id"] for card in response.json()]
+    assert sorted(ids) == [video.id for video in videos[1:]]
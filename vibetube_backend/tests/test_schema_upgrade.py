@@ -0,0 +1,30 @@
+from sqlalchemy import text
+from conftest import add_user, add_videos
+from app.config.database import engine
+from app.models import database_models
+from app.utils.schema_upgrade import upgrade_schema
+from app.utils.timeline import backfill_timelines
+
+
+def test_videos_from_before_the_fanout_column_are_not_pushed_again(db):
+    viewer = add_user(db, "viewer")
+    channel = add_user(db, "channel")
+    video_ids = [video.id for video in add_videos(db, channel, 3)]
+    viewer_id, channel_id = viewer.id, channel.id
+    db.add(database_models.Subscription(user_id=viewer_id, channel_id=channel_id))
+    db.commit()
+    db.close()
+    with engine.begin() as conn:
+        conn.execute(text("DROP INDEX ix_videos_pending_fanout"))
+        conn.execute(text("ALTER TABLE videos DROP COLUMN fanned_out"))
+
+    upgrade_schema(engine)
+    backfill_timelines(db)
+    db.commit()
+
+    assert db.query(database_models.Video).filter_by(fanned_out=False).count() == 0
+    timeline = db.query(database_models.TimelineEntry).filter_by(user_id=viewer_id)
+    assert sorted(entry.video_id for entry in timeline) == video_ids
+    # a new video is still left for the fan-out worker
+    (new,) = add_videos(db, db.get(database_models.User, channel_id), 1)
+    assert not new.fanned_out
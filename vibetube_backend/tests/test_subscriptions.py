@@ -0,0 +1,43 @@
+from conftest import add_user, add_videos, auth
+from app.models import database_models
+
+
+def test_subscribe_backfills_the_timeline(client, db):
+    viewer = add_user(db, "viewer")
+    channel = add_user(db, "channel")
+    videos = add_videos(db, channel, 3)
+
+    response = client.post(
+        "/api/subscribers/", json={"user_id": channel.id}, headers=auth(viewer.id)
+    )
+    assert response.status_code == 200
+    assert response.json() == {"message": "Added"}
+
+    timeline = db.query(database_models.TimelineEntry).filter_by(user_id=viewer.id)
+    assert sorted(entry.video_id for entry in timeline) == [v.id for v in videos]
+    stats = db.get(database_models.ChannelStats, channel.id)
+    assert stats.total_subscribers == 1
+
+    feed = client.get(
+        "/api/videos/",
+        params={"vid_query": "subscriptions", "limit": 10},
+        headers=auth(viewer.id),
+    )
+    assert feed.status_code == 200
+    assert sorted(card["id"] for card in feed.json()) == [v.id for v in videos]
+
+
+def test_unsubscribe_drops_the_channel_from_the_timeline(client, db):
+    viewer = add_user(db, "viewer")
+    channel = add_user(db, "channel")
+    add_videos(db, channel, 2)
+
+    for expected in ("Added", "Removed"):
+        response = client.post(
+            "/api/subscribers/", json={"user_id": channel.id}, headers=auth(viewer.id)
+        )
+        assert response.json() == {"message": expected}
+
+    db.expire_all()
+    assert db.query(database_models.TimelineEntry).count() == 0
+    assert db.get(database_models.ChannelStats, channel.id).total_subscribers == 0
@@ -0,0 +1,53 @@
+import asyncio
+import threading
+import pytest
+from app.config import http_client
+from app.models import database_models
+from app.utils import transcoding
+
+
+@pytest.fixture
+def app_loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    http_client.bind_app_loop(loop)
+    yield loop
+    http_client.bind_app_loop(None)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+class SlowBucket:
+    def __init__(self):
+        self.uploaded = []
+
+    async def put(self, object_name: str, data: bytes, content_type: str):
+        await asyncio.sleep(0.1)
+        self.uploaded.append(object_name)
+
+    def public_url(self, object_name: str) -> str:
+        return f"https://bucket.example/{object_name}"
+
+
+def test_heartbeat_keeps_beating_while_renditions_upload(
+    app_loop, monkeypatch, tmp_path
+):
+    bucket = SlowBucket()
+    monkeypatch.setattr(transcoding, "storage", bucket)
+    monkeypatch.setattr(transcoding, "PROGRESS_INTERVAL_SECONDS", 0.05)
+    monkeypatch.setattr(transcoding, "HLS_UPLOAD_CONCURRENCY", 1)
+    for segment in range(3):
+        (tmp_path / f"{segment}.ts").write_bytes(b"segment")
+    video = database_models.Video(id=7, video_url="https://bucket.example/7.mp4")
+    beats = []
+
+    url = transcoding.publish_renditions(
+        video, tmp_path, lambda: beats.append(len(bucket.uploaded))
+    )
+
+    assert url == "https://bucket.example/hls/7/master.m3u8"
+    assert len(bucket.uploaded) == 3
+    # beats came in before the last segment was up, not only at the end
+    assert beats and beats[0] < 3
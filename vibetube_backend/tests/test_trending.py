@@ -0,0 +1,48 @@
+from conftest import add_user, add_videos, auth
+from app.models import database_models
+from app.utils.trending import refresh_trending
+
+
+def test_trending_ranks_by_views_and_pages_by_rank(client, db):
+    viewer = add_user(db, "viewer")
+    videos = add_videos(db, add_user(db, "channel"), 5)
+    for views, video in enumerate(videos):
+        video.views = views * 10
+    db.commit()
+
+    assert refresh_trending(db, min_interval=0)
+
+    ranks = dict(
+        db.query(
+            database_models.VideoTrending.video_id, database_models.VideoTrending.rank
+        )
+    )
+    assert ranks == {video.id: 5 - i for i, video in enumerate(videos)}
+
+    first = client.get(
+        "/api/videos/",
+        params={"vid_query": "trending", "limit": 3},
+        headers=auth(viewer.id),
+    )
+    rest = client.get(
+        "/api/videos/",
+        params={
+            "vid_query": "trending",
+            "limit": 3,
+            "cursor": first.headers["X-Next-Cursor"],
+        },
+        headers=auth(viewer.id),
+    )
+    assert [card["id"] for card in first.json() + rest.json()] == [
+        video.id for video in reversed(videos)
+    ]
+
+
+def test_recently_rebuilt_window_is_kept(db):
+    (video,) = add_videos(db, add_user(db, "channel"), 1)
+    assert refresh_trending(db, min_interval=0)
+
+    video.views = 100
+    db.commit()
+    assert not refresh_trending(db, min_interval=3600)
+    assert db.query(database_models.VideoTrending).one().score == 0
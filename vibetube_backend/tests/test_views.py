@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta, timezone
+from conftest import add_user, add_videos, auth
+from app.models import database_models
+from app.utils.view_buffer import write_views
+
+
+def test_views_count_first_time_viewers_only(client, db):
+    channel = add_user(db, "channel")
+    (video,) = add_videos(db, channel, 1)
+    viewers = [add_user(db, f"viewer_{i}") for i in range(2)]
+
+    for viewer in (viewers[0], viewers[0], viewers[1]):
+        response = client.post(
+            "/api/videos/view", json={"video_id": video.id}, headers=auth(viewer.id)
+        )
+        assert response.status_code == 200
+
+    db.refresh(video)
+    assert video.views == 2
+    assert db.get(database_models.ChannelStats, channel.id).total_views == 2
+
+
+def test_flush_updates_the_watch_time_of_stored_views(db):
+    channel = add_user(db, "channel")
+    first, second = add_videos(db, channel, 2)
+    viewer = add_user(db, "viewer")
+    earlier = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    later = earlier + timedelta(hours=1)
+
+    write_views(db, {(viewer.id, first.id): earlier})
+    write_views(db, {(viewer.id, first.id): later, (viewer.id, second.id): later})
+
+    views = {
+        view.video_id: view.created_at.replace(tzinfo=timezone.utc)
+        for view in db.query(database_models.View)
+    }
+    assert views == {first.id: later, second.id: later}
+    db.refresh(first)
+    db.refresh(second)
+    assert (first.views, second.views) == (1, 1)
+    assert db.get(database_models.ChannelStats, channel.id).total_views == 2
@@ -7,6 +7,9 @@ import api from "@/api/axios";
 
 export default function Comments({ videoId }) {
   const [comments, setComments] = useState([]);
+  // cursor of the next page, null once every comment is loaded
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [text, setText] = useState("");
   const [loading, setLoading] = useState(false);
   const navigate = useNavigate();
@@ -15,15 +18,24 @@ export default function Comments({ videoId }) {
     fetchComments();
   }, [videoId]);
 
-  async function fetchComments() {
+  async function fetchComments(cursor = null) {
     try {
-      const res = await api.get(`/api/videos/comments/${videoId}`);
-      setComments(res.data);
+      const res = await api.get(`/api/videos/comments/${videoId}`, {
+        params: cursor ? { cursor } : {},
+      });
+      setComments((prev) => (cursor ? [...prev, ...res.data] : res.data));
+      setNextCursor(res.headers["x-next-cursor"] || null);
     } catch (err) {
       console.error(err);
     }
   }
 
+  async function loadMore() {
+    setLoadingMore(true);
+    await fetchComments(nextCursor);
+    setLoadingMore(false);
+  }
+
   async function postComment(e) {
     e.preventDefault();
     if (!text.trim()) return;
@@ -91,6 +103,15 @@ export default function Comments({ videoId }) {
             </div>
           </div>
         ))}
+        {nextCursor && (
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-3 py-1 text-sm text-muted-foreground hover:text-accent-foreground cursor-pointer"
+          >
+            {loadingMore ? "Loading..." : "Show more comments"}
+          </button>
+        )}
       </div>
     </div>
   );